@@ -1,17 +1,37 @@
 """
 FastAPI application for bid recommendation service
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
-from typing import Dict, List, Optional
-import uvicorn
-from bid_inference import recommend_bid_fee
+from typing import Any, Dict, List, Optional
+import os
+from bid_inference import recommend_bid_fee, recommend_bid_fees, get_registry
+from gss_common.search import MIN_TOL, STRATEGIES
+from gss_common.cache import RecommendationCache
+from gss_common import instrumentation
+from gss_common.instrumentation import TimingMiddleware, endpoint, profiler
+from gss_common.startup import Readiness
 
 app = FastAPI(
     title="Bid Recommendation API",
     description="API for getting optimal bid fee recommendations",
     version="1.0.0"
 )
+app.add_middleware(TimingMiddleware)
+
+# The bundle converted to a memory-mapped artifact directory (gss_common.artifact_store) is preferred when present
+ARTIFACTS_DIR = "models/bid_recommendation_artifacts"
+ARTIFACTS_PATH = os.getenv("ARTIFACTS_PATH") or (
+    ARTIFACTS_DIR if os.path.isdir(ARTIFACTS_DIR) else "models/bid_recommendation_artifacts.joblib")
+registry = get_registry(ARTIFACTS_PATH)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+# Set to 0 to report ready without scoring a synthetic opportunity first
+WARMUP = os.getenv("WARMUP", "1") != "0"
+cache = RecommendationCache(
+    maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+)
 
 class OpportunityInput(BaseModel):
     ZipCode: str
@@ -25,23 +45,104 @@ class BidRecommendation(BaseModel):
     best_prob: float
     best_ev: float
     fee_curve: List[Dict[str, float]]
-    diagnostics: Dict[str, any]
+    diagnostics: Dict[str, Any]
+
+class BatchRecommendation(BaseModel):
+    result: Optional[BidRecommendation] = None
+    error: Optional[str] = None
+
+# Only the encoding and fee search matter for the warm-up, not the answer
+WARMUP_OPPORTUNITY = {"ZipCode": "00000"}
+
+def warm_up():
+    """Score a synthetic opportunity through the single and batch paths (timed as the 'warmup' endpoint)."""
+    if not WARMUP:
+        return
+    artifacts = registry.get()
+    with endpoint("warmup"):
+        recommend_bid_fee(WARMUP_OPPORTUNITY, artifacts=artifacts)
+        recommend_bid_fees([WARMUP_OPPORTUNITY] * 2, artifacts=artifacts)
+
+readiness = Readiness(registry.get, warm_up)
+
+@app.on_event("startup")
+def load_artifacts():
+    # load and warm up in the background; /health answers meanwhile, /ready once done.
+    # On failure the server keeps running and /predict reports the error until the file appears
+    readiness.start()
 
 @app.get("/")
 def read_root():
     return {"status": "healthy", "service": "bid-recommendation-api"}
 
 @app.post("/predict", response_model=BidRecommendation)
-def predict(opportunity: OpportunityInput):
-    try:
-        result = recommend_bid_fee(opportunity.dict())
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def predict(opportunity: OpportunityInput, request: Request, strategy: str = "grid", tol: float = 0.01):
+    """Recommend a fee; ``strategy`` is grid, coarse_to_fine or golden (see gss_common.search)."""
+    if strategy not in STRATEGIES or not tol >= MIN_TOL:
+        raise HTTPException(status_code=422, detail=f"strategy must be one of {STRATEGIES} and tol at least {MIN_TOL}")
+    with instrumentation.handler(request, "predict"), profiler.profile("predict"):
+        try:
+            artifacts, version = registry.snapshot()
+            result = recommend_bid_fee(opportunity.dict(), artifacts=artifacts, strategy=strategy, tol=tol,
+                                       cache=cache, artifacts_version=version)
+            return result
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict_batch", response_model=List[BatchRecommendation])
+def predict_batch(opportunities: List[OpportunityInput], request: Request):
+    """Score many opportunities with one stacked fee-grid model call; errors are reported per item."""
+    if len(opportunities) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size {len(opportunities)} exceeds limit of {MAX_BATCH_SIZE}")
+    with instrumentation.handler(request, "predict_batch"), profiler.profile("predict_batch"):
+        try:
+            return recommend_bid_fees([o.dict() for o in opportunities], artifacts=registry.get())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is serving."""
     return {"status": "healthy"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: artifacts loaded and warmed up; 503 until then. A failed load is retried on each probe."""
+    status = readiness.status()
+    if status["ready"]:
+        return status
+    if status["error"] is not None:
+        readiness.start()
+    return JSONResponse(status_code=503, content=status)
+
+@app.get("/model-info")
+def model_info():
+    """Artifact version, load time, reload count and cache counters for monitoring."""
+    return {**registry.stats(), "cache": cache.stats()}
+
+@app.get("/metrics")
+def metrics():
+    """Stage histograms and fallback counters in Prometheus format (needs prometheus_client)."""
+    if instrumentation.STAGE_SECONDS is None:
+        raise HTTPException(status_code=404, detail="prometheus_client not installed")
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/stages")
+def debug_stages():
+    """Per-endpoint stage timings (recent percentiles) and fallback counts."""
+    return instrumentation.stats()
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def debug_profile(reset: bool = False):
+    """Collapsed stacks from the sampling profiler (enabled by PROFILE_SAMPLE_RATE)."""
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set PROFILE_SAMPLE_RATE")
+    text = profiler.collapsed()
+    if reset:
+        profiler.reset()
+    return text
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
@@ -14,57 +14,168 @@ Example opportunity.json:
 """
 import os
 import json
-import joblib
+import time
+import hashlib
+import threading
 import pandas as pd
 import numpy as np
-from sklearn.isotonic import IsotonicRegression
+from gss_common.artifact_store import MANIFEST, is_artifact_dir, load_artifacts
+from gss_common.search import search, STRATEGIES
+from gss_common.cache import RecommendationCache
+from gss_common.instrumentation import fallback, stage
+
+class ArtifactRegistry:
+    """Keeps an artifact bundle in memory and reloads it when the file changes.
+
+    ``path`` is a joblib bundle or an artifact directory (gss_common.artifact_store, converted
+    from one), whose arrays are memory-mapped rather than unpickled. The file (the
+    directory's manifest, which records the hash of every other file) is stat'ed on
+    every ``get()``; a changed mtime/size triggers a content hash, and the bundle is
+    only loaded again when that hash differs.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._current = (None, None)  # (artifacts, version), swapped atomically on reload
+        self._stat_key = None
+        self.version = None
+        self.load_time_seconds = None
+        self.loaded_at = None
+        self.reload_count = 0
+
+    def _watched(self):
+        return os.path.join(self.path, MANIFEST) if os.path.isdir(self.path) else self.path
+
+    def _file_hash(self):
+        h = hashlib.sha256()
+        with open(self._watched(), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def snapshot(self):
+        """Return ``(artifacts, version)``, (re)loading the bundle if the file on disk changed."""
+        if not os.path.exists(self._watched()):
+            raise FileNotFoundError(f"Model artifacts not found at {self.path}")
+        st = os.stat(self._watched())
+        stat_key = (st.st_mtime_ns, st.st_size)
+        current = self._current
+        if current[0] is not None and stat_key == self._stat_key:
+            return current
+        with self._lock:
+            if self._current[0] is None or stat_key != self._stat_key:
+                digest = self._file_hash()
+                if digest != self.version:
+                    start = time.perf_counter()
+                    if is_artifact_dir(self.path):
+                        artifacts = load_artifacts(self.path)
+                    else:
+                        import joblib  # with xgboost/sklearn behind it, paid on first load rather than import
+
+                        artifacts = joblib.load(self.path)
+                    self.load_time_seconds = time.perf_counter() - start
+                    self.loaded_at = time.time()
+                    if self._current[0] is not None:
+                        self.reload_count += 1
+                    self._current = (artifacts, digest)
+                    self.version = digest
+                self._stat_key = stat_key
+            return self._current
+
+    def get(self):
+        """Return the loaded bundle, (re)loading it if the file on disk changed."""
+        return self.snapshot()[0]
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'loaded': self._current[0] is not None,
+            'version': self.version,
+            'load_time_seconds': self.load_time_seconds,
+            'loaded_at': self.loaded_at,
+            'reload_count': self.reload_count
+        }
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_registry(artifacts_path):
+    """Return the process-wide registry for ``artifacts_path``."""
+    key = os.path.abspath(artifacts_path)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ArtifactRegistry(key)
+        return _registries[key]
+
+FEE_COLUMNS = ('median_BidFee', 'lag_1')
+
+def encode_opportunity(row, features, encoders, train_medians):
+    """Encode a single opportunity into a float vector ordered like ``features``.
+
+    Categoricals go through the encoder maps, everything else is coerced to numeric,
+    and missing or unparseable values fall back to the training medians.
+    """
+    x = np.empty(len(features), dtype=float)
+    for i, col in enumerate(features):
+        val = row.get(col, np.nan)
+        if col in encoders:
+            val = encoders[col].get(str(val) if pd.notna(val) else 'MISSING', 0.0)
+        val = pd.to_numeric(val, errors='coerce')
+        x[i] = train_medians.get(col, np.nan) if pd.isna(val) else val
+    return x
+
+def expand_fee_grid(x, features, fees):
+    """Repeat an encoded row once per fee, substituting the fee columns."""
+    fees = np.asarray(fees, dtype=float)
+    X = np.repeat(x[np.newaxis, :], len(fees), axis=0)
+    for col in FEE_COLUMNS:
+        if col in features:
+            X[:, features.index(col)] = fees
+    return X
 
 def transform_row_for_model(row, features, encoders, train_medians, set_fee=None):
     """Transform a single opportunity row into model-ready features."""
-    r = row.copy()
+    x = encode_opportunity(row, features, encoders, train_medians)
     if set_fee is not None:
-        if 'median_BidFee' in r.index: r['median_BidFee'] = set_fee
-        if 'lag_1' in r.index: r['lag_1'] = set_fee
-    df_row = pd.DataFrame([r])[features].copy()
-    for col,m in encoders.items():
-        if col in df_row.columns:
-            val = str(df_row.at[0,col]) if pd.notna(df_row.at[0,col]) else 'MISSING'
-            df_row.at[0,col] = m.get(val,0.0)
-    for c in df_row.columns:
-        df_row[c] = pd.to_numeric(df_row[c], errors='coerce')
-    df_row = df_row.fillna(train_medians)
-    return df_row
+        x = expand_fee_grid(x, features, [set_fee])[0]
+    return pd.DataFrame([x], columns=features)
 
-def find_optimal_fee(sample_row, features, encoders, train_medians, model_full, clf=None, 
-                    base_multiplier=0.2, steps=60):
-    """Find fee that maximizes expected value."""
+def fee_window(sample_row, train_medians, base_multiplier=0.2):
+    """Fee bounds +/-base_multiplier around the opportunity's current fee."""
     cur_fee = float(sample_row.get('median_BidFee', np.nan) if pd.notna(sample_row.get('median_BidFee', np.nan)) 
                    else train_medians.get('lag_1', 0.0))
     if np.isnan(cur_fee) or cur_fee<=0: 
         cur_fee = float(train_medians.get('median_BidFee', 1.0))
     
-    low,high = cur_fee*(1-base_multiplier), cur_fee*(1+base_multiplier)
-    grid = np.linspace(low,high,steps)
-    win_probs=[]; evs=[]
-    
-    for f in grid:
-        xrow = transform_row_for_model(sample_row, features, encoders, train_medians, set_fee=f)
-        if clf is not None:
-            try:
-                p = float(clf.predict_proba(xrow)[:,1][0])
-            except Exception:
-                p = 0.1  # fallback probability
-        else:
-            p = 0.1  # fallback if no classifier
-            
-        p = max(0.0, min(1.0, p))  # clip to [0,1]
-        win_probs.append(p)
-        evs.append(p*f)
-    
-    win_probs = np.array(win_probs)
-    evs = np.array(evs)
+    return cur_fee*(1-base_multiplier), cur_fee*(1+base_multiplier)
+
+def fee_grid(sample_row, train_medians, base_multiplier=0.2, steps=60):
+    """Evenly spaced fee candidates across the fee window."""
+    low,high = fee_window(sample_row, train_medians, base_multiplier)
+    return np.linspace(low,high,steps)
+
+def score_fee_grid(X, features, clf):
+    """Win probability for every row of an encoded fee-grid matrix in one call.
+
+    Without a usable classifier every fee gets a constant 0.1; each such call is counted
+    as a fallback (``fee_grid_no_classifier`` / ``fee_grid_classifier_error``).
+    """
+    win_probs = np.full(len(X), 0.1)  # fallback if no classifier
+    if clf is None:
+        fallback('fee_grid_no_classifier')
+    else:
+        try:
+            with stage('model'):
+                win_probs = np.asarray(clf.predict_proba(pd.DataFrame(X, columns=features))[:,1], dtype=float)
+        except Exception:
+            fallback('fee_grid_classifier_error')  # keep fallback probability
+    return np.clip(win_probs, 0.0, 1.0)
+
+def summarize_fee_curve(grid, win_probs):
+    """Expected value per fee and the fee that maximizes it."""
+    evs = win_probs*grid
     idx = int(np.nanargmax(evs))
-    
     return {
         'fee_grid': grid,
         'win_probs': win_probs,
@@ -74,46 +185,52 @@ def find_optimal_fee(sample_row, features, encoders, train_medians, model_full,
         'best_prob': float(win_probs[idx])
     }
 
-def recommend_bid_fee(opportunity_row, artifacts_path='models/bid_recommendation_artifacts.joblib'):
-    """Production inference function that accepts a new opportunity and returns recommendations."""
-    # Load artifacts
-    if not os.path.exists(artifacts_path):
-        raise FileNotFoundError(f"Model artifacts not found at {artifacts_path}")
-    artifacts = joblib.load(artifacts_path)
-    
-    # Convert dict to series if needed
+def find_optimal_fee(sample_row, features, encoders, train_medians, model_full, clf=None, 
+                    base_multiplier=0.2, steps=60, strategy='grid', tol=0.01, x=None):
+    """Find fee that maximizes expected value.
+
+    The opportunity is encoded once (pass ``x`` when the caller already has it from
+    ``encode_opportunity``); each round of the search (a single round for the
+    ``grid`` strategy) is scored with one ``predict_proba`` call. ``strategy`` is one of
+    ``gss_common.search.STRATEGIES`` and ``tol`` the final bracket width of the adaptive ones
+    as a fraction of the fee window.
+    """
+    with stage('encode'):
+        low,high = fee_window(sample_row, train_medians, base_multiplier)
+        if x is None:
+            x = encode_opportunity(sample_row, features, encoders, train_medians)
+    score = lambda fees: score_fee_grid(expand_fee_grid(x, features, fees), features, clf)
+    with stage('optimizer'):
+        grid, win_probs = search(score, low, high, strategy=strategy, n_steps=steps, tol=tol)
+        res = summarize_fee_curve(grid, win_probs)
+    res['strategy'] = strategy
+    res['n_evals'] = len(grid)
+    return res
+
+def _as_opportunity(opportunity_row):
+    """Convert a dict to a Series and check required columns."""
     if isinstance(opportunity_row, dict):
         opportunity_row = pd.Series(opportunity_row)
-    
-    # Validate required columns
     missing_cols = [c for c in ['ZipCode'] if c not in opportunity_row.index]
     if missing_cols:
         raise ValueError(f"Missing required columns: {missing_cols}")
-    
-    # Run optimizer with loaded artifacts
-    res = find_optimal_fee(
-        sample_row=opportunity_row,
-        features=artifacts['features'],
-        encoders=artifacts['encoders'],
-        train_medians=artifacts['train_medians'],
-        model_full=artifacts['model_full'],
-        clf=artifacts['clf'],
-        base_multiplier=0.2,
-        steps=60
-    )
-    
-    # Add fee curve as DataFrame
-    fee_curve = pd.DataFrame({
-        'fee': res['fee_grid'],
-        'win_prob': res['win_probs'],
-        'expected_value': res['evs']
-    })
+    return opportunity_row
+
+def _recommendation(opportunity_row, res, artifacts):
+    """Shape optimizer output into the API response."""
+    # Fee curve as records (built directly; DataFrame.to_dict dominates batch latency)
+    fee_curve = [
+        {'fee': f, 'win_prob': p, 'expected_value': ev}
+        for f, p, ev in zip(res['fee_grid'].tolist(), res['win_probs'].tolist(), res['evs'].tolist())
+    ]
     
     # Add diagnostics
     diagnostics = {
         'model_type': 'classifier' if artifacts['clf'] is not None else 'regressor_fallback',
         'features_present': sum(c in opportunity_row.index for c in artifacts['features']),
         'total_features': len(artifacts['features']),
+        'search_strategy': res.get('strategy', 'grid'),
+        'model_evaluations': res.get('n_evals', len(res['fee_grid'])),
         'warning': None
     }
     
@@ -124,14 +241,98 @@ def recommend_bid_fee(opportunity_row, artifacts_path='models/bid_recommendation
         'best_fee': float(res['best_fee']),
         'best_prob': float(res['best_prob']),
         'best_ev': float(res['best_ev']),
-        'fee_curve': fee_curve.to_dict(orient='records'),
+        'fee_curve': fee_curve,
         'diagnostics': diagnostics
     }
 
+def recommend_bid_fee(opportunity_row, artifacts_path='models/bid_recommendation_artifacts.joblib', artifacts=None,
+                      strategy='grid', tol=0.01, cache=None, artifacts_version=None):
+    """Production inference function that accepts a new opportunity and returns recommendations.
+
+    Pass a preloaded ``artifacts`` bundle to skip the registry lookup; otherwise the
+    bundle at ``artifacts_path`` is loaded once per process and reused. ``strategy`` and
+    ``tol`` select the fee search (see ``find_optimal_fee``).
+
+    With a ``RecommendationCache``, results are keyed on the encoded feature vector, the
+    fee window, the search settings and the artifact version (taken from the registry,
+    or ``artifacts_version`` when a bundle is passed in), so a reload invalidates them.
+    """
+    if artifacts is None:
+        artifacts, artifacts_version = get_registry(artifacts_path).snapshot()
+    
+    opportunity_row = _as_opportunity(opportunity_row)
+    
+    key = x = None
+    if cache is not None:
+        x = encode_opportunity(opportunity_row, artifacts['features'], artifacts['encoders'], artifacts['train_medians'])
+        key = RecommendationCache.make_key(
+            x, fee_window(opportunity_row, artifacts['train_medians'], 0.2), strategy, tol,
+            sum(c in opportunity_row.index for c in artifacts['features']))
+        cached = cache.get(key, artifacts_version)
+        if cached is not None:
+            return cached
+    
+    # Run optimizer with loaded artifacts
+    res = find_optimal_fee(
+        sample_row=opportunity_row,
+        features=artifacts['features'],
+        encoders=artifacts['encoders'],
+        train_medians=artifacts['train_medians'],
+        model_full=artifacts['model_full'],
+        clf=artifacts['clf'],
+        base_multiplier=0.2,
+        steps=60,
+        strategy=strategy,
+        tol=tol,
+        x=x  # already encoded for the cache key, if any
+    )
+    with stage('response'):
+        result = _recommendation(opportunity_row, res, artifacts)
+    if cache is not None:
+        cache.put(key, result, artifacts_version)
+    return result
+
+def recommend_bid_fees(opportunity_rows, artifacts_path='models/bid_recommendation_artifacts.joblib', artifacts=None):
+    """Batch version of ``recommend_bid_fee``.
+
+    Every valid opportunity's fee grid is stacked into one matrix and scored with a
+    single ``predict_proba`` call. Returns one ``{'result', 'error'}`` entry per input,
+    in order, so a bad record does not fail the rest of the batch.
+    """
+    if artifacts is None:
+        artifacts = get_registry(artifacts_path).get()
+    features, encoders, train_medians = artifacts['features'], artifacts['encoders'], artifacts['train_medians']
+    
+    out = [{'result': None, 'error': None} for _ in opportunity_rows]
+    rows, grids, blocks = [], [], []
+    with stage('encode'):
+        for i, opportunity_row in enumerate(opportunity_rows):
+            try:
+                opportunity_row = _as_opportunity(opportunity_row)
+                grid = fee_grid(opportunity_row, train_medians, base_multiplier=0.2, steps=60)
+                x = encode_opportunity(opportunity_row, features, encoders, train_medians)
+            except Exception as e:
+                out[i]['error'] = str(e)
+                continue
+            rows.append((i, opportunity_row))
+            grids.append(grid)
+            blocks.append(expand_fee_grid(x, features, grid))
+    
+    if blocks:
+        win_probs = score_fee_grid(np.vstack(blocks), features, artifacts['clf'])
+        offsets = np.cumsum([0] + [len(g) for g in grids])
+        with stage('response'):
+            for (i, opportunity_row), grid, lo, hi in zip(rows, grids, offsets[:-1], offsets[1:]):
+                res = summarize_fee_curve(grid, win_probs[lo:hi])
+                out[i]['result'] = _recommendation(opportunity_row, res, artifacts)
+    return out
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Get bid fee recommendations for an opportunity')
     parser.add_argument('--input', type=str, required=True, help='Path to JSON file with opportunity data')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='grid', help='Fee search strategy')
+    parser.add_argument('--tol', type=float, default=0.01, help='Final bracket width for adaptive strategies, as a fraction of the fee window')
     args = parser.parse_args()
     
     # Load opportunity
@@ -139,7 +340,7 @@ if __name__ == '__main__':
         opportunity = json.load(f)
     
     # Get recommendations
-    result = recommend_bid_fee(opportunity)
+    result = recommend_bid_fee(opportunity, strategy=args.strategy, tol=args.tol)
     
     # Print results
     print(f"\nRecommended bid fee: ${result['best_fee']:.2f}")
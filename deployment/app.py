@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 import pandas as pd
-import joblib
+import numpy as np
 import os
 from typing import Dict, Optional, List
 from datetime import datetime
+from feature_encoder import FeatureEncoder
+from gss_common.batching import MicroBatcher
+from gss_common import instrumentation
+from gss_common.instrumentation import TimingMiddleware, endpoint, fallback, profiler, stage
+from gss_common.startup import Readiness, load_parallel
+from gss_common.artifact_store import is_artifact_dir, load_artifacts
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -12,19 +19,64 @@ app = FastAPI(
     description="API for predicting optimal bid fees based on property and market data",
     version="1.0.0"
 )
+app.add_middleware(TimingMiddleware)
 
 # Load model and metadata
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "models/bid_fee_model.joblib")
-METADATA_PATH = os.path.join(os.path.dirname(__file__), "models/model_metadata.joblib")
-
-try:
-    model = joblib.load(MODEL_PATH)
-    metadata = joblib.load(METADATA_PATH)
-    feature_cols = metadata['feature_cols']
-    encoders = metadata['encoders']
-    cat_cols = metadata['cat_cols']
-except Exception as e:
-    raise RuntimeError(f"Failed to load model files: {str(e)}")
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), "models"))
+MODEL_PATH = os.getenv("MODEL_PATH", os.path.join(MODEL_DIR, "bid_fee_model.joblib"))
+METADATA_PATH = os.getenv("METADATA_PATH", os.path.join(MODEL_DIR, "model_metadata.joblib"))
+# Model and metadata converted to a memory-mapped artifact directory (see gss_common.artifact_store); used when present
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", os.path.join(MODEL_DIR, "artifacts"))
+MODEL_ENTRY = os.path.splitext(os.path.basename(MODEL_PATH))[0]
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Concurrent /predict requests are coalesced into micro-batches (see gss_common.batching)
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_WORKERS = int(os.getenv("MICROBATCH_WORKERS", "2"))
+
+# Synthetic requests scored before /ready reports ready (0 skips the warm-up)
+WARMUP_ROWS = int(os.getenv("WARMUP_ROWS", "64"))
+
+# Set by load_models(), which runs in the background after startup (see gss_common.startup)
+model = None
+metadata = None
+feature_cols: List[str] = []
+encoders: Dict = {}
+cat_cols: List[str] = []
+feature_encoder = None
+model_source = MODEL_PATH
+
+def load_models():
+    """
+    Load the model and metadata (from ARTIFACTS_DIR if converted, else the joblib files
+    concurrently) and compile the feature encoder
+    """
+    global model, metadata, feature_cols, encoders, cat_cols, feature_encoder, model_source
+
+    try:
+        if is_artifact_dir(ARTIFACTS_DIR):
+            # native booster and memory-mapped encoder tables; nothing to unpickle
+            artifacts = load_artifacts(ARTIFACTS_DIR)
+            loaded = {"model": artifacts.pop(MODEL_ENTRY), "metadata": artifacts}
+            model_source = os.path.join(ARTIFACTS_DIR, "manifest.json")
+        else:
+            import joblib  # imports xgboost/sklearn while unpickling; kept off the import path
+
+            loaded = load_parallel({
+                "model": lambda: joblib.load(MODEL_PATH),
+                "metadata": lambda: joblib.load(METADATA_PATH)
+            })
+            model_source = MODEL_PATH
+        metadata = loaded["metadata"]
+        feature_cols = metadata['feature_cols']
+        encoders = metadata['encoders']
+        cat_cols = metadata['cat_cols']
+        feature_encoder = FeatureEncoder(feature_cols, encoders, cat_cols)
+        model = loaded["model"]
+    except Exception as e:
+        raise RuntimeError(f"Failed to load model files: {str(e)}")
 
 class BidRequest(BaseModel):
     """Request model for bid fee prediction"""
@@ -61,8 +113,18 @@ class BidResponse(BaseModel):
     model_version: str
     features_used: List[str]
 
+class BatchItemResult(BaseModel):
+    """Per-request outcome within a batch: either a prediction or an error"""
+    index: int
+    prediction: Optional[BidResponse] = None
+    error: Optional[str] = None
+
 def prepare_features(data: Dict) -> pd.DataFrame:
-    """Prepare features for prediction"""
+    """Prepare features for prediction
+
+    Reference implementation; the endpoints use the equivalent, precompiled
+    ``feature_encoder`` (see feature_encoder.py and tests/test_feature_encoder.py).
+    """
     # Convert to DataFrame
     df = pd.DataFrame([data])
     
@@ -95,40 +157,132 @@ def prepare_features(data: Dict) -> pd.DataFrame:
         if col not in df.columns:
             df[col] = 0  # Default value for missing features
     
-    return df[feature_cols]
+    # Unset optional fields arrive as None (object dtype) and isocalendar weeks as UInt32,
+    # neither of which XGBoost accepts
+    return df[feature_cols].astype(float)
+
+def predict_records(records: List[Dict]) -> List:
+    """
+    Score many requests with a single model call.
+    Returns one BidResponse per record, or a ValueError for records whose
+    features cannot be prepared.
+    """
+    results = [None] * len(records)
+    rows = np.empty((len(records), len(feature_cols)))
+    ok = []
+    with stage("features"):
+        for i, data in enumerate(records):
+            try:
+                feature_encoder.transform_into(data, rows[len(ok)])
+                ok.append(i)
+            except Exception as e:
+                fallback("feature_preparation_error")
+                results[i] = ValueError(f"Feature preparation failed: {str(e)}")
+
+    if not ok:
+        return results
+
+    features = rows[:len(ok)]
+    with stage("model"):
+        predictions = model.predict(features)
+        confidences = np.clip(model.predict_proba(features).max(axis=1), 0.5, 0.99)
+
+    with stage("response"):
+        timestamp = datetime.now().isoformat()
+        for i, prediction, confidence in zip(ok, predictions, confidences):
+            results[i] = BidResponse(
+                predicted_fee=float(prediction),
+                confidence_score=float(confidence),
+                timestamp=timestamp,
+                model_version="1.0.0",
+                features_used=feature_cols
+            )
+    return results
+
+def predict_microbatch(records: List[Dict]) -> List:
+    """predict_records for one /predict micro-batch, timed and profiled as the predict endpoint."""
+    with endpoint("predict"), profiler.profile("predict"):
+        return predict_records(records)
+
+predict_batcher = MicroBatcher(predict_microbatch, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS, MICROBATCH_WORKERS)
+
+# Unseen categories and defaults are fine; the warm-up only needs the encoder and model paths
+WARMUP_REQUEST = {"ZipCode": "00000", "PropertyType": "Unknown", "DistanceInMiles": 0.0, "BidDate": "2024-01-01"}
+
+def warm_up():
+    """
+    Score synthetic requests (timed as the 'warmup' endpoint) so the first real one
+    does not pay for XGBoost's predictor setup
+    """
+    if WARMUP_ROWS <= 0:
+        return
+    with endpoint("warmup"):
+        for n in sorted({1, WARMUP_ROWS}):
+            for outcome in predict_records([WARMUP_REQUEST] * n):
+                if isinstance(outcome, Exception):
+                    raise outcome
+
+readiness = Readiness(load_models, warm_up)
+
+def check_ready():
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail=readiness.error or "Model is loading")
+
+@app.on_event("startup")
+def startup_event():
+    # /health answers while the model loads; /ready once it is loaded and warmed up
+    readiness.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    predict_batcher.close()
 
 @app.post("/predict", response_model=BidResponse)
-async def predict(request: BidRequest):
+async def predict(request: BidRequest, http_request: Request):
     """
-    Predict optimal bid fee based on property and market data
+    Predict optimal bid fee based on property and market data.
+    Concurrent requests are scored together in micro-batches off the event loop.
     """
-    try:
-        # Convert request to dict
-        data = request.dict()
-        
-        # Prepare features
-        features = prepare_features(data)
-        
-        # Make prediction
-        prediction = model.predict(features)[0]
-        
-        # Get prediction probability as confidence score
-        confidence = min(max(model.predict_proba(features)[0].max(), 0.5), 0.99)
-        
-        return BidResponse(
-            predicted_fee=float(prediction),
-            confidence_score=float(confidence),
-            timestamp=datetime.now().isoformat(),
-            model_version="1.0.0",
-            features_used=feature_cols
+    check_ready()
+    with instrumentation.handler(http_request, "predict"):
+        try:
+            return await predict_batcher.run(request.dict())
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Prediction failed: {str(e)}"
+            )
+
+@app.post("/predict_batch", response_model=List[BatchItemResult])
+def predict_batch(bid_requests: List[BidRequest], http_request: Request):
+    """
+    Predict bid fees for many requests with a single model call.
+    Requests whose features cannot be prepared are reported individually.
+    """
+    check_ready()
+    with instrumentation.handler(http_request, "predict_batch"), profiler.profile("predict_batch"):
+        return _predict_batch(bid_requests)
+
+def _predict_batch(bid_requests: List[BidRequest]):
+    if len(bid_requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(bid_requests)} exceeds limit of {MAX_BATCH_SIZE}"
         )
-        
+
+    try:
+        outcomes = predict_records([request.dict() for request in bid_requests])
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
 
+    return [
+        BatchItemResult(index=i, error=str(o)) if isinstance(o, Exception) else BatchItemResult(index=i, prediction=o)
+        for i, o in enumerate(outcomes)
+    ]
+
 @app.get("/health")
 async def health_check():
     """
@@ -140,6 +294,16 @@ async def health_check():
         "metadata_loaded": metadata is not None
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: model loaded and warmed up (503 until then, or if loading failed)
+    """
+    status = readiness.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
 @app.get("/model-info")
 async def model_info():
     """
@@ -150,5 +314,34 @@ async def model_info():
         "feature_columns": feature_cols,
         "categorical_columns": cat_cols,
         "model_type": type(model).__name__,
-        "last_updated": datetime.fromtimestamp(os.path.getmtime(MODEL_PATH)).isoformat()
-    }
\ No newline at end of file
+        "last_updated": datetime.fromtimestamp(os.path.getmtime(model_source)).isoformat()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Stage histograms and fallback counters in Prometheus format (needs prometheus_client)
+    """
+    if instrumentation.STAGE_SECONDS is None:
+        raise HTTPException(status_code=404, detail="prometheus_client not installed")
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/debug/stages")
+async def debug_stages():
+    """
+    Per-endpoint stage timings (recent percentiles) and fallback counts
+    """
+    return instrumentation.stats()
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(reset: bool = False):
+    """
+    Collapsed stacks from the sampling profiler (enabled by PROFILE_SAMPLE_RATE)
+    """
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set PROFILE_SAMPLE_RATE")
+    text = profiler.collapsed()
+    if reset:
+        profiler.reset()
+    return text
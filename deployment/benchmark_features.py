@@ -0,0 +1,78 @@
+"""
+Timing for FeatureEncoder against the reference prepare_features.
+
+Parity between the two is tested in tests/test_feature_encoder.py at the repo root.
+
+Run from this directory with the model files in models/:
+    python benchmark_features.py [--iterations 2000]
+"""
+import argparse
+import time
+import app
+
+SAMPLE_REQUESTS = [
+    {
+        "ZipCode": "12345",
+        "PropertyType": "Office",
+        "DistanceInMiles": 10.5,
+        "BidDate": "2025-10-23",
+        "Market": "NYC",
+        "BusinessSegment": "Commercial",
+        "PopulationEstimate": 50000,
+        "AverageHouseValue": 500000,
+        "IncomePerHousehold": 75000,
+        "MedianAge": 35,
+        "NumberofBusinesses": 1000,
+        "NumberofEmployees": 10000,
+        "ZipPopulation": 25000
+    },
+    # Unknown categories, missing optional fields
+    {
+        "ZipCode": "00000",
+        "PropertyType": "Spaceport",
+        "DistanceInMiles": 0.0,
+        "BidDate": "2024-01-01",
+        "Market": "Nowhere",
+        "BusinessSegment": None,
+        "PopulationEstimate": None,
+        "AverageHouseValue": None,
+        "IncomePerHousehold": None,
+        "MedianAge": None,
+        "NumberofBusinesses": None,
+        "NumberofEmployees": None,
+        "ZipPopulation": None
+    },
+    {
+        "ZipCode": "30301",
+        "PropertyType": "Retail",
+        "DistanceInMiles": 250.0,
+        "BidDate": "2023-12-31T15:30:00",
+        "Market": "Atlanta"
+    },
+]
+
+
+def time_per_request(fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)])
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare prepare_features with FeatureEncoder')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    # the app loads its models in the background at startup; here, load them up front
+    app.load_models()
+    feature_encoder = app.feature_encoder
+    reference = time_per_request(app.prepare_features, args.iterations)
+    compiled = time_per_request(feature_encoder.transform, args.iterations)
+    print(f"prepare_features: {reference * 1e6:8.1f} us/request")
+    print(f"FeatureEncoder:   {compiled * 1e6:8.1f} us/request")
+    print(f"Speedup:          {reference / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
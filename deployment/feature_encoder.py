@@ -0,0 +1,84 @@
+"""
+Compiled feature encoder for the bid fee model.
+
+Builds the same ``feature_cols`` vector as ``prepare_features`` in app.py, but plans
+the work once from the model metadata: label encoders become dicts, every feature
+column gets a fixed slot, and each request is assembled directly into a NumPy row
+without building a DataFrame.
+"""
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+MARKET_COLS = [
+    'PopulationEstimate', 'AverageHouseValue', 'IncomePerHousehold',
+    'MedianAge', 'NumberofBusinesses', 'NumberofEmployees', 'ZipPopulation'
+]
+DATE_FEATURES = ('Year', 'Month', 'Week', 'DayOfWeek')
+
+
+def _parse_date(value) -> datetime:
+    """ISO dates take the fast path; anything else goes through pandas like before."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return pd.Timestamp(value).to_pydatetime()
+
+
+class FeatureEncoder:
+    """prepare_features compiled once from ``model_metadata.joblib`` (or its artifact directory)"""
+
+    def __init__(self, feature_cols: List[str], encoders: Dict, cat_cols: List[str]):
+        self.feature_cols = list(feature_cols)
+        slot = {col: i for i, col in enumerate(self.feature_cols)}
+
+        # LabelEncoder.transform([x])[0] is x's position in the sorted classes_; encoders loaded
+        # from an artifact directory are already such lookup tables (gss_common.artifact_store.LookupTable)
+        self._categorical = [
+            (slot[f'{col}_encoded'], col, encoders[col] if isinstance(encoders[col], Mapping)
+             else {str(c): float(i) for i, c in enumerate(encoders[col].classes_)})
+            for col in cat_cols if f'{col}_encoded' in slot
+        ]
+        self._market = [(slot[f'{col}_zip_ratio'], col) for col in MARKET_COLS if f'{col}_zip_ratio' in slot]
+        self._date = [(slot[name], name) for name in DATE_FEATURES if name in slot]
+        derived = {i for i, *_ in self._categorical} | {i for i, _ in self._market} | {i for i, _ in self._date}
+        self._raw = [(i, col) for i, col in enumerate(self.feature_cols) if i not in derived]
+
+    def transform_into(self, data: Dict, out: np.ndarray):
+        """Write one request's features into ``out`` (a row of length len(feature_cols))."""
+        out.fill(0.0)  # default value for missing features
+
+        date = _parse_date(data['BidDate'])
+        parts = {'Year': date.year, 'Month': date.month, 'Week': date.isocalendar()[1], 'DayOfWeek': date.weekday()}
+        for i, name in self._date:
+            out[i] = parts[name]
+
+        for i, col, lookup in self._categorical:
+            if col in data:
+                out[i] = lookup.get(str(data[col]), -1.0)
+
+        for i, col in self._market:
+            if col in data:
+                out[i] = 1.0  # default to 1.0 for single predictions
+
+        for i, col in self._raw:
+            if col in data:
+                value = data[col]
+                out[i] = np.nan if value is None else value
+
+    def transform(self, data: Dict) -> np.ndarray:
+        """Feature row for one request, ordered like ``feature_cols``."""
+        out = np.empty(len(self.feature_cols))
+        self.transform_into(data, out)
+        return out
+
+    def transform_many(self, records: List[Dict]) -> np.ndarray:
+        """Feature matrix for many requests; raises on the first record that cannot be encoded."""
+        out = np.empty((len(records), len(self.feature_cols)))
+        for row, data in zip(out, records):
+            self.transform_into(data, row)
+        return out
@@ -1,16 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from collections import defaultdict
 from datetime import datetime
-import joblib
+import hashlib
 import os
+from pathlib import Path
 import pandas as pd
 import numpy as np
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from starlette.responses import Response
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from src.optimize import sweep, sweep_batch, score_candidates, baseline_bid, bid_window, encoded_features
+from gss_common.cache import RecommendationCache
+from src.fee_table import MAX_P95_ERROR, FeeTable
+from gss_common.search import MIN_TOL, STRATEGIES
+from gss_common.batching import MicroBatcher
+from gss_common.artifact_store import is_artifact_dir
+from src.native import has_native, load_native, load_native_artifacts, native_files
+from src.predictor import Predictor
+from gss_common.startup import Readiness, load_parallel
+from src.feature_engineering import add_time_features
+from src.feature_store import FeatureStore
+from src.online_features import OnlineFeatures
+from src.macro_features import MacroFeatures
+from gss_common import instrumentation
+from gss_common.instrumentation import TimingMiddleware, endpoint, fallback, profiler, stage
 
 
 app = FastAPI(title="GSS Bid Recommendation API")
+app.add_middleware(TimingMiddleware)
 
 # Metrics
 PREDICTION_COUNT = Counter('prediction_requests_total', 'Total prediction requests')
@@ -33,57 +52,195 @@ class PredictResponse(BaseModel):
     timestamp: str
 
 
+class OutcomeRecord(BidRequest):
+    WinStatus: int
+
+
+class BatchPredictItem(BaseModel):
+    index: int
+    prediction: Optional[PredictResponse] = None
+    error: Optional[str] = None
+
+
 MODEL_DIR = os.getenv('MODEL_DIR', 'models')
+# Serve the native boosters (the artifact directory models/artifacts, else models/native; see src/native.py)
+# instead of the joblib pipelines when present
+NATIVE_MODELS = os.getenv('NATIVE_MODELS', '1') != '0'
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+# A fee table is served only if its held-out p95 P(win) error is at most this (see src/fee_table.py)
+FEE_TABLE_MAX_P95_ERROR = float(os.getenv('FEE_TABLE_MAX_P95_ERROR', str(MAX_P95_ERROR)))
+# Synthetic rows scored before /ready reports ready (0 skips the warm-up)
+WARMUP_ROWS = int(os.getenv('WARMUP_ROWS', '64'))
+
+# /optimize results keyed on the encoded opportunity, request parameters and artifact version
+recommendation_cache = RecommendationCache(
+    maxsize=int(os.getenv('RECOMMENDATION_CACHE_SIZE', '4096')),
+    ttl=float(os.getenv('RECOMMENDATION_CACHE_TTL', '300')),
+)
+
+
+# Concurrent /predict and /optimize requests are coalesced into micro-batches (see gss_common.batching)
+MICROBATCH_MAX_SIZE = int(os.getenv('MICROBATCH_MAX_SIZE', '64'))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv('MICROBATCH_MAX_WAIT_MS', '2'))
+MICROBATCH_WORKERS = int(os.getenv('MICROBATCH_WORKERS', '2'))
+
+
+class _CacheCollector:
+    """Exports the recommendation cache counters on /metrics."""
+
+    def collect(self):
+        stats = recommendation_cache.stats()
+        for name in ('hits', 'misses', 'evictions', 'invalidations'):
+            yield CounterMetricFamily(f'recommendation_cache_{name}', f'Recommendation cache {name}', value=stats[name])
+        yield GaugeMetricFamily('recommendation_cache_size', 'Entries in the recommendation cache', value=stats['size'])
+
+
+REGISTRY.register(_CacheCollector())
+
+
+# A request with only the required field; the models' call path is chosen on its serving frame
+PROBE_REQUEST = BidRequest(BidDate='2024-03-15')
+
+
+def _probe_frame(arts: dict) -> pd.DataFrame:
+    df = pd.DataFrame([PROBE_REQUEST.dict()])
+    df['BidDate'] = pd.to_datetime(df['BidDate'])
+    return _serving_features(df, arts)
 
 
 def load_artifacts(model_dir: str = MODEL_DIR):
     """Attempt to load models. Supports either full pipelines saved as joblib or separate artifacts.
 
-    Returns a dict with keys 'clf', 'reg', and optionally 'pre'.
+    Returns a dict with keys 'clf', 'reg', optionally 'pre', and 'predictor' (src/predictor.py)
+    when both models are present. Independent artifacts are read concurrently.
     """
-    artifacts = {}
     base = os.path.abspath(model_dir)
     try:
         # Try full pipeline names first
         clf_path = os.path.join(base, 'win_model.joblib')
         reg_path = os.path.join(base, 'bid_model.joblib')
         pre_path = os.path.join(base, 'preprocessor.joblib')
-        if os.path.exists(clf_path):
-            artifacts['clf'] = joblib.load(clf_path)
-        if os.path.exists(reg_path):
-            artifacts['reg'] = joblib.load(reg_path)
-        if os.path.exists(pre_path):
-            artifacts['pre'] = joblib.load(pre_path)
+        native_dir = os.path.join(base, 'native')
+        artifact_dir = os.path.join(base, 'artifacts')
+        loaders = {}
+        if NATIVE_MODELS and is_artifact_dir(artifact_dir):
+            # boosters + memory-mapped preprocessing arrays (gss_common.artifact_store)
+            loaders['models'] = lambda: load_native_artifacts(artifact_dir)
+            hashed = [os.path.join(artifact_dir, 'manifest.json')]  # records the hash of every file
+        elif NATIVE_MODELS and has_native(native_dir, 'win_model') and has_native(native_dir, 'bid_model'):
+            # NumPy preprocessing + booster; no sklearn objects to unpickle
+            loaders['clf'] = lambda: load_native(native_dir, 'win_model')
+            loaders['reg'] = lambda: load_native(native_dir, 'bid_model')
+            hashed = native_files(native_dir, 'win_model') + native_files(native_dir, 'bid_model')
+        else:
+            import joblib  # only needed for the pickled pipelines
+
+            for key, path in (('clf', clf_path), ('reg', reg_path), ('pre', pre_path)):
+                if os.path.exists(path):
+                    loaders[key] = lambda path=path: joblib.load(path)
+            hashed = [clf_path, reg_path, pre_path]
+        # Optional per-group rolling/lag state written by train.py, memory-mapped
+        store_path = os.path.join(base, 'feature_store')
+        if os.path.exists(os.path.join(store_path, 'manifest.json')):
+            loaders['online_features'] = lambda: OnlineFeatures(FeatureStore.load(store_path, mmap=True))
+            hashed += [os.path.join(store_path, f) for f in ('manifest.json', 'dates.npy', 'values.npy', 'offsets.npy')]
+        # Optional macro series as of each date (FRED, compiled by train.py), memory-mapped
+        macro_path = os.path.join(base, 'macro')
+        if os.path.exists(os.path.join(macro_path, 'manifest.json')):
+            loaders['macro'] = lambda: MacroFeatures.load(macro_path)
+            hashed += [os.path.join(macro_path, f) for f in ('manifest.json', 'dates.npy', 'values.npy')]
+        # Optional precomputed fee-response table (scripts/build_fee_table.py), memory-mapped
+        table_path = os.path.join(base, 'fee_table')
+        if os.path.exists(os.path.join(table_path, 'manifest.json')):
+            loaders['fee_table'] = lambda: _load_fee_table(table_path)
+            # every file of the table, so rebuilding any part of it (e.g. only the ratio grid) changes the version
+            hashed += sorted(str(f) for f in Path(table_path).iterdir() if f.is_file())
 
         # If none found, try the older single-file pickle
-        if not artifacts:
+        if not loaders:
             raise FileNotFoundError('No model artifacts found in ' + base)
 
+        def content_hash():
+            # Content hash of everything loaded; cached results are only valid for this version
+            h = hashlib.sha256()
+            for path in hashed:
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        h.update(f.read())
+            return h.hexdigest()
+
+        artifacts = load_parallel({**loaders, 'version': content_hash})
+        if 'models' in artifacts:
+            models = artifacts.pop('models')
+            artifacts['clf'], artifacts['reg'] = models['win_model'], models['bid_model']
+        if 'clf' in artifacts and 'reg' in artifacts:
+            # One preprocessing pass shared by both models where they allow, checked on a probe row
+            artifacts['predictor'] = Predictor(artifacts['clf'], artifacts['reg'], artifacts.get('pre'),
+                                               probe=_probe_frame(artifacts))
+
         return artifacts
     except Exception as e:
         raise RuntimeError(f'Error loading model artifacts: {e}')
 
 
-# Load on startup
-artifacts = None
+# A typical opportunity for the warm-up; only the model paths matter, not the answer
+WARMUP_REQUEST = BidRequest(BidDate='2024-03-15', EstimatedCost=100000.0, CompetitorCount=3, BidAmount=95000.0)
+
+
+def warm_up():
+    """Run /predict's and /optimize's model paths on synthetic rows (timed under the 'warmup' endpoint).
+
+    First calls pay for XGBoost's predictor setup and the first pass through pandas and
+    the feature code; this moves that cost before the readiness probe passes.
+    """
+    if WARMUP_ROWS <= 0:
+        return
+    with endpoint('warmup'):
+        for n in sorted({1, WARMUP_ROWS}):
+            X, _, _ = _prepare_batch([WARMUP_REQUEST.dict()] * n)
+            _predict_frame(X)
+        X = _prepare_df(WARMUP_REQUEST.dict())
+        sweep(artifacts['clf'], X)
+        sweep_batch(artifacts['clf'], pd.concat([X, X], ignore_index=True))
+
+
+# Loaded in the background after startup; requests get 503 until readiness passes
+artifacts = {}
+
+
+def _load():
+    global artifacts
+    artifacts = load_artifacts(MODEL_DIR)
+
+
+readiness = Readiness(_load, warm_up)
 
 
 @app.on_event('startup')
 def startup_event():
-    global artifacts
-    try:
-        artifacts = load_artifacts(MODEL_DIR)
-        app.state.models_loaded = True
-    except Exception as e:
-        # keep server alive but mark models missing
-        artifacts = {}
-        app.state.models_loaded = False
-        print('Warning: models not loaded at startup:', e)
+    # keep the server up (liveness) while the models load; /ready reports when they are usable
+    readiness.start()
+
+
+@app.on_event('shutdown')
+def shutdown_event():
+    predict_batcher.close()
+    optimize_batcher.close()
 
 
 @app.get('/health')
 def health():
-    return {"status": "healthy", "models_loaded": app.state.models_loaded}
+    """Liveness: the process is serving, whether or not the models are ready."""
+    return {"status": "healthy", "models_loaded": readiness.loaded}
+
+
+@app.get('/ready')
+def ready():
+    """Readiness: models loaded and warmed up (503 until then, or if loading failed)."""
+    status = readiness.status()
+    if not status['ready']:
+        return JSONResponse(status_code=503, content=status)
+    return status
 
 
 @app.get('/metrics')
@@ -92,102 +249,355 @@ def metrics():
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
 
 
-def _prepare_df(payload: Dict[str, Any]) -> pd.DataFrame:
-    # Minimal conversion to DataFrame and basic validation
-    df = pd.DataFrame([payload])
+def _add_serving_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Time features, plus rolling/lag and macro features from the loaded state."""
+    with stage('features'):
+        return _serving_features(df, artifacts)
+
+
+def _serving_features(df: pd.DataFrame, arts: Optional[dict]) -> pd.DataFrame:
     if 'BidDate' in df.columns:
-        df['BidDate'] = pd.to_datetime(df['BidDate'])
+        df = add_time_features(df)
+    online = arts.get('online_features') if arts else None
+    if online is not None:
+        df = df.join(online.features_frame(df))
+    macro = arts.get('macro') if arts else None
+    if macro is not None:
+        df = macro.join(df)
     return df
 
 
+def _prepare_df(payload: Dict[str, Any]) -> pd.DataFrame:
+    # Minimal conversion to DataFrame and basic validation
+    with stage('dataframe'):
+        df = pd.DataFrame([payload])
+        if 'BidDate' in df.columns:
+            df['BidDate'] = pd.to_datetime(df['BidDate'])
+        return _add_serving_features(df)
+
+
+def _prepare_batch(payloads: List[Dict[str, Any]]):
+    """Build one DataFrame from many payloads.
+
+    Returns (df, ok, errors): ``ok`` lists the payload indices present in ``df`` (in row
+    order) and ``errors`` maps the remaining indices to a validation message.
+    """
+    with stage('dataframe'):
+        df = pd.DataFrame(payloads)
+        errors = {}
+        if 'BidDate' in df.columns:
+            dates = pd.to_datetime(df['BidDate'], errors='coerce')
+            for i in np.flatnonzero(dates.isna().values):
+                errors[int(i)] = f"Invalid BidDate: {payloads[i].get('BidDate')!r}"
+            df['BidDate'] = dates
+        ok = [i for i in range(len(payloads)) if i not in errors]
+        return _add_serving_features(df.iloc[ok].reset_index(drop=True)), ok, errors
+
+
+def _check_batch_size(n: int):
+    if n > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f'Batch size {n} exceeds limit of {MAX_BATCH_SIZE}')
+
+
+def _check_window(pct_range: float, n_steps: int):
+    """The /optimize window: pct_range in (0, 1) keeps every candidate bid positive."""
+    if not 0 < pct_range < 1 or n_steps < 1:
+        raise HTTPException(status_code=422, detail='pct_range must be in (0, 1) and n_steps at least 1')
+
+
+def _predict_frame(X: pd.DataFrame):
+    """Win probability and predicted bid for every row of ``X``."""
+    predictor = artifacts.get('predictor')
+    if predictor is None:
+        raise HTTPException(status_code=500, detail='Required model artifacts missing')
+    return predictor(X)
+
+
+def _predict_payloads(payloads: List[Dict[str, Any]]) -> list:
+    """Micro-batch function for /predict: one PredictResponse (or exception) per payload."""
+    with endpoint('predict'), profiler.profile('predict'):
+        X, ok, errors = _prepare_batch(payloads)
+        results = [HTTPException(status_code=500, detail=errors[i]) if i in errors else None for i in range(len(payloads))]
+        if ok:
+            pwin, pred_bid = _predict_frame(X)
+            with stage('response'):
+                ts = datetime.utcnow().isoformat()
+                for i, p, b in zip(ok, pwin, pred_bid):
+                    results[i] = PredictResponse(predicted_bid=float(b), win_probability=float(p), timestamp=ts)
+        return results
+
+
+predict_batcher = MicroBatcher(_predict_payloads, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS, MICROBATCH_WORKERS)
+
+
 @app.post('/predict', response_model=PredictResponse)
-def predict(req: BidRequest):
+async def predict(req: BidRequest, request: Request):
     PREDICTION_COUNT.inc()
-    with PREDICTION_LATENCY.time():
-        if not app.state.models_loaded:
+    with PREDICTION_LATENCY.time(), instrumentation.handler(request, 'predict'):
+        if not readiness.ready:
             raise HTTPException(status_code=503, detail='Models not loaded on server')
 
-        payload = req.dict()
         try:
-            X = _prepare_df(payload)
-
-            # Prefer classifier pipeline that contains preprocessing
-            clf = artifacts.get('clf')
-            reg = artifacts.get('reg')
-
-            if clf is None or reg is None:
-                raise HTTPException(status_code=500, detail='Required model artifacts missing')
-
-            # If clf is a pipeline that accepts DataFrame directly, call predict_proba
-            try:
-                if hasattr(clf, 'predict_proba'):
-                    pwin = clf.predict_proba(X)[:, 1]
-                else:
-                    pwin = clf.predict(X)
-            except Exception:
-                # Try applying preprocessor if available
-                pre = artifacts.get('pre')
-                if pre is not None:
-                    Xp = pre.transform(X)
-                    if hasattr(clf, 'predict_proba'):
-                        pwin = clf.named_steps['model'].predict_proba(Xp)[:, 1] if hasattr(clf, 'named_steps') else clf.predict_proba(Xp)[:,1]
-                    else:
-                        pwin = clf.named_steps['model'].predict(Xp) if hasattr(clf, 'named_steps') else clf.predict(Xp)
-                else:
-                    raise
-
-            # Regression prediction: prefer using reg.predict (assumes it handles preprocessing)
-            try:
-                pred_bid = reg.predict(X)
-            except Exception:
-                pre = artifacts.get('pre')
-                if pre is not None:
-                    Xp = pre.transform(X)
-                    pred_bid = reg.named_steps['model'].predict(Xp) if hasattr(reg, 'named_steps') else reg.predict(Xp)
-                else:
-                    raise
-
-            pwin_val = float(np.asarray(pwin).ravel()[0])
-            pred_bid_val = float(np.asarray(pred_bid).ravel()[0])
-
-            return PredictResponse(predicted_bid=pred_bid_val, win_probability=pwin_val, timestamp=datetime.utcnow().isoformat())
+            return await predict_batcher.run(req.dict())
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post('/optimize')
-def optimize(req: BidRequest, pct_range: float = 0.2, n_steps: int = 41):
-    """Search for bid that maximizes expected profit = P(win) * bid"""
-    if not app.state.models_loaded:
+@app.post('/predict_batch', response_model=List[BatchPredictItem])
+def predict_batch(reqs: List[BidRequest], request: Request):
+    """Score many opportunities with one model call; invalid records get a per-item error."""
+    with instrumentation.handler(request, 'predict_batch'), profiler.profile('predict_batch'):
+        return _predict_batch(reqs)
+
+
+def _predict_batch(reqs: List[BidRequest]):
+    _check_batch_size(len(reqs))
+    PREDICTION_COUNT.inc(len(reqs))
+    if not readiness.ready:
         raise HTTPException(status_code=503, detail='Models not loaded on server')
-    payload = req.dict()
-    X = _prepare_df(payload)
 
+    X, ok, errors = _prepare_batch([r.dict() for r in reqs])
+    results = [BatchPredictItem(index=i, error=errors.get(i)) for i in range(len(reqs))]
+    if not ok:
+        return results
+    try:
+        pwin, pred_bid = _predict_frame(X)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    with stage('response'):
+        ts = datetime.utcnow().isoformat()
+        for i, p, b in zip(ok, pwin, pred_bid):
+            results[i].prediction = PredictResponse(predicted_bid=float(b), win_probability=float(p), timestamp=ts)
+    return results
+
+
+def _load_fee_table(path: str) -> Optional[FeeTable]:
+    """The fee table, or None (``/optimize`` then scores live) if it is outdated or too far from the model."""
+    try:
+        table = FeeTable.load(path)
+    except ValueError as e:  # a table from an older format
+        print('Warning:', e)
+        return None
+    if not table.validated(FEE_TABLE_MAX_P95_ERROR):
+        print(f"Warning: fee table {path} not served: held-out p95 error {table.error.get('p95_abs')} "
+              f"exceeds FEE_TABLE_MAX_P95_ERROR={FEE_TABLE_MAX_P95_ERROR}")
+        return None
+    return table
+
+
+def _plan_optimize(payload: Dict[str, Any], opts: Dict[str, Any]) -> dict:
+    """Everything /optimize decides before scoring: cache hit, or where P(win) comes from."""
+    X = _prepare_df(payload)
     clf = artifacts.get('clf')
     if clf is None:
         raise HTTPException(status_code=500, detail='Classifier missing')
 
-    baseline = payload.get('BidAmount') or payload.get('EstimatedCost') or 100000.0
-    candidates = np.linspace(baseline * (1 - pct_range), baseline * (1 + pct_range), n_steps)
-    best = None
-    rows = []
-    for c in candidates:
-        Xc = X.copy()
-        Xc['BidAmount'] = float(c)
+    with stage('plan'):
+        try:
+            key = RecommendationCache.make_key(encoded_features(clf, X), baseline_bid(X.iloc[0]), opts['pct_range'],
+                                               opts['n_steps'], opts['strategy'], opts['tol'], opts['use_table'], opts['compare'])
+        except Exception:
+            fallback('optimize_cache_key_error')
+            key = None
+        cached = recommendation_cache.get(key, artifacts.get('version')) if key is not None else None
+
+        score, source = None, 'model'
+        table = artifacts.get('fee_table') if opts['use_table'] else None
+        if cached is None and table is not None:
+            score = table.scorer(X.iloc[0], *bid_window(baseline_bid(X.iloc[0]), opts['pct_range']))
+            source = 'model' if score is None else 'table'
+    return {'X': X, 'clf': clf, 'key': key, 'cached': cached, 'score': score, 'source': source, 'opts': opts}
+
+
+def _finish_optimize(plan: dict, df_res: Optional[pd.DataFrame]) -> dict:
+    with stage('response'):
+        return _optimize_result(plan, df_res)
+
+
+def _optimize_result(plan: dict, df_res: Optional[pd.DataFrame]) -> dict:
+    opts, source = plan['opts'], plan['source']
+    if df_res is None or df_res.empty:
+        # no scoreable candidates
+        return {"best": None, "candidates": [], "strategy": opts['strategy'], "n_evals": 0, "source": source}
+
+    rows = df_res.to_dict(orient='records')
+    best = rows[int(df_res['expected_profit'].values.argmax())]
+    result = {"best": best, "candidates": rows, "strategy": opts['strategy'], "n_evals": len(rows), "source": source}
+    if opts['compare'] and source == 'table':
+        err = np.abs(df_res['p_win'].values - score_candidates(plan['clf'], plan['X'], df_res['candidate'].values))
+        result["interpolation_error"] = {"max_abs": float(err.max()), "mean_abs": float(err.mean())}
+    if plan['key'] is not None:
+        recommendation_cache.put(plan['key'], result, artifacts.get('version'))
+    return result
+
+
+def _sweep_one(plan: dict) -> dict:
+    opts = plan['opts']
+    try:
+        with stage('optimizer'):
+            df_res = sweep(plan['clf'], plan['X'], pct_range=opts['pct_range'], n_steps=opts['n_steps'],
+                           strategy=opts['strategy'], tol=opts['tol'], score=plan['score'])
+    except Exception:
+        fallback('optimize_sweep_error')
+        df_res = None
+    return _finish_optimize(plan, df_res)
+
+
+def _optimize_payloads(items: List[tuple]) -> list:
+    """Micro-batch function for /optimize.
+
+    Cache hits, table lookups and adaptive searches are answered one by one; live grid
+    sweeps with the same window settings are stacked into a single ``sweep_batch`` call.
+    """
+    with endpoint('optimize'), profiler.profile('optimize'):
+        return _optimize_items(items)
+
+
+def _optimize_items(items: List[tuple]) -> list:
+    results = [None] * len(items)
+    grids = defaultdict(list)
+    for j, (payload, opts) in enumerate(items):
         try:
-            if hasattr(clf, 'predict_proba'):
-                p = clf.predict_proba(Xc)[:, 1]
+            plan = _plan_optimize(payload, opts)
+            if plan['cached'] is not None:
+                results[j] = plan['cached']
+            elif plan['score'] is None and opts['strategy'] == 'grid':
+                grids[(opts['pct_range'], opts['n_steps'])].append((j, plan))
             else:
-                p = clf.predict(Xc)
-            p = float(np.asarray(p).ravel()[0])
-            expected = p * float(c)
-            rows.append({'candidate': float(c), 'p_win': p, 'expected_profit': expected})
-            if best is None or expected > best['expected_profit']:
-                best = {'candidate': float(c), 'p_win': p, 'expected_profit': expected}
+                results[j] = _sweep_one(plan)
         except Exception as e:
-            # skip candidate on failure
-            continue
+            results[j] = e
 
-    return {"best": best, "candidates": rows}
+    for (pct_range, n_steps), group in grids.items():
+        try:
+            with stage('optimizer'):
+                X = pd.concat([plan['X'] for _, plan in group], ignore_index=True)
+                curves = sweep_batch(group[0][1]['clf'], X, pct_range=pct_range, n_steps=n_steps)
+            for (j, plan), df_res in zip(group, curves):
+                results[j] = _finish_optimize(plan, df_res)
+        except Exception:
+            fallback('optimize_batch_sweep_error')
+            for j, plan in group:
+                results[j] = _sweep_one(plan)
+    return results
+
+
+optimize_batcher = MicroBatcher(_optimize_payloads, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS, MICROBATCH_WORKERS)
+
+
+class _BatcherCollector:
+    """Exports the /predict and /optimize micro-batcher counters on /metrics."""
+
+    def collect(self):
+        for endpoint, batcher in (('predict', predict_batcher), ('optimize', optimize_batcher)):
+            stats = batcher.stats()
+            yield CounterMetricFamily(f'microbatch_{endpoint}_batches', f'Micro-batches run for /{endpoint}', value=stats['batches'])
+            yield CounterMetricFamily(f'microbatch_{endpoint}_items', f'Requests scored in micro-batches for /{endpoint}', value=stats['items'])
+            yield GaugeMetricFamily(f'microbatch_{endpoint}_queued', f'Requests waiting for a /{endpoint} micro-batch', value=stats['queued'])
+
+
+REGISTRY.register(_BatcherCollector())
+
+
+@app.post('/optimize')
+async def optimize(req: BidRequest, request: Request, pct_range: float = 0.2, n_steps: int = 41, strategy: str = 'grid',
+                   tol: float = 0.01, use_table: bool = False, compare: bool = False):
+    """Search for bid that maximizes expected profit = P(win) * bid
+
+    ``strategy`` is one of ``grid`` (n_steps evenly spaced bids), ``coarse_to_fine`` or
+    ``golden``; the adaptive strategies ignore ``n_steps`` and stop once the bracket is
+    ``tol`` of the window. They score fewer bids than ``grid`` but in several sequential
+    model calls instead of one, so they are slower (see gss_common.search).
+
+    ``use_table=true`` interpolates P(win) from the precomputed fee table when it covers
+    the request's segment, competitor bucket and bid/EstimatedCost window, without a
+    model call (``source: "table"``); otherwise, and by default, the model is scored
+    live. The table ignores the request's date, rolling/lag and macro features, so it
+    is approximate: it is only loaded when its held-out error (in its manifest) is
+    within ``FEE_TABLE_MAX_P95_ERROR``. ``compare=true`` also scores the returned
+    candidates live and reports the error.
+    """
+    if strategy not in STRATEGIES or not tol >= MIN_TOL:
+        raise HTTPException(status_code=422, detail=f'strategy must be one of {STRATEGIES} and tol at least {MIN_TOL}')
+    _check_window(pct_range, n_steps)
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail='Models not loaded on server')
+    opts = {'pct_range': pct_range, 'n_steps': n_steps, 'strategy': strategy, 'tol': tol,
+            'use_table': use_table, 'compare': compare}
+    with instrumentation.handler(request, 'optimize'):
+        return await optimize_batcher.run((req.dict(), opts))
+
+
+@app.post('/outcomes')
+def record_outcomes(outcomes: List[OutcomeRecord]):
+    """Fold observed bid outcomes into the online rolling/lag feature state.
+
+    The update lives in memory until the next restart; retraining writes a fresh state.
+    """
+    _check_batch_size(len(outcomes))
+    online = artifacts.get('online_features') if artifacts else None
+    if online is None:
+        raise HTTPException(status_code=503, detail='Online feature state not loaded')
+    df = pd.DataFrame([o.dict() for o in outcomes])
+    df['BidDate'] = pd.to_datetime(df['BidDate'], errors='coerce')
+    bad = np.flatnonzero(df['BidDate'].isna().values)
+    if len(bad):
+        raise HTTPException(status_code=400, detail=f'Invalid BidDate at indices {bad.tolist()}')
+    return {'recorded': online.record(df), 'rows_seen': online.store.rows_seen}
+
+
+@app.post('/optimize_batch')
+def optimize_batch(reqs: List[BidRequest], request: Request, pct_range: float = 0.2, n_steps: int = 41):
+    """``/optimize`` for many opportunities, scored as one stacked candidate matrix."""
+    with instrumentation.handler(request, 'optimize_batch'), profiler.profile('optimize_batch'):
+        return _optimize_batch(reqs, pct_range, n_steps)
+
+
+def _optimize_batch(reqs: List[BidRequest], pct_range: float, n_steps: int):
+    _check_batch_size(len(reqs))
+    _check_window(pct_range, n_steps)
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail='Models not loaded on server')
+
+    clf = artifacts.get('clf')
+    if clf is None:
+        raise HTTPException(status_code=500, detail='Classifier missing')
+
+    X, ok, errors = _prepare_batch([r.dict() for r in reqs])
+    results = [{"index": i, "best": None, "candidates": [], "error": errors.get(i)} for i in range(len(reqs))]
+    if not ok:
+        return results
+    try:
+        with stage('optimizer'):
+            curves = sweep_batch(clf, X, pct_range=pct_range, n_steps=n_steps)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    with stage('response'):
+        for i, df_res in zip(ok, curves):
+            rows = df_res.to_dict(orient='records')
+            results[i]["best"] = rows[int(df_res['expected_profit'].values.argmax())]
+            results[i]["candidates"] = rows
+    return results
+
+
+@app.get('/debug/stages')
+def debug_stages():
+    """Per-endpoint stage timings (recent percentiles) and fallback counts."""
+    return instrumentation.stats()
+
+
+@app.get('/debug/profile', response_class=PlainTextResponse)
+def debug_profile(reset: bool = False):
+    """Collapsed stacks from the sampling profiler (enabled by PROFILE_SAMPLE_RATE)."""
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail='Profiler disabled; set PROFILE_SAMPLE_RATE')
+    text = profiler.collapsed()
+    if reset:
+        profiler.reset()
+    return text
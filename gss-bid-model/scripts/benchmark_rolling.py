@@ -0,0 +1,97 @@
+"""Benchmark the time-based rolling group features against the previous implementations.
+
+Compares, on a synthetic bid history:
+  rows-rolling   the previous add_rolling_group_features (groupby().rolling(window=w),
+                 a row count, one pass per group column x window x target)
+  pandas-time    pandas' own time-based groupby().rolling('wD', on='BidDate'),
+                 the reference for the new semantics (means without the row's
+                 own values)
+  vectorized     the current add_rolling_group_features (cumsum + searchsorted)
+
+Usage:
+    python scripts/benchmark_rolling.py --rows 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.feature_engineering import add_rolling_group_features
+
+GROUP_COLS = ['ClientType', 'Location']
+WINDOWS = [7, 30, 90]
+
+
+def synthetic_bids(n: int, days: int = 3 * 365, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'BidDate': pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, days, n), unit='D'),
+        'ProjectType': rng.choice(['Commercial', 'Residential', 'Infrastructure'], n),
+        'Location': rng.choice([f'LOC{i:02d}' for i in range(40)], n),
+        'ClientType': rng.choice(['Private', 'Government', 'NonProfit'], n),
+        'BidAmount': rng.lognormal(11.5, 0.5, n),
+        'WinStatus': rng.integers(0, 2, n),
+    })
+
+
+def rows_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous add_rolling_group_features (row-count windows)."""
+    df = df.copy().sort_values('BidDate')
+    for g in GROUP_COLS:
+        for w in WINDOWS:
+            df[f'{g}_rolling_{w}d_mean_BidAmount'] = df.groupby(g)['BidAmount'].rolling(window=w, min_periods=1).mean().reset_index(level=0, drop=True)
+            df[f'{g}_rolling_{w}d_winrate'] = df.groupby(g)['WinStatus'].rolling(window=w, min_periods=1).mean().reset_index(level=0, drop=True)
+    return df
+
+
+def pandas_time_rolling(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.sort_values('BidDate', kind='stable')
+    out = {}
+    for g in GROUP_COLS:
+        for w in WINDOWS:
+            rolls = [sub.rolling(f'{w}D', on='BidDate', min_periods=1) for _, sub in df.groupby(g)]
+            # both leave out the row's own value
+            for src, name in (('BidAmount', f'{g}_rolling_{w}d_mean_BidAmount'), ('WinStatus', f'{g}_rolling_{w}d_winrate')):
+                total = pd.concat([r[src].sum() for r in rolls]) - df[src].fillna(0)
+                count = pd.concat([r[src].count() for r in rolls]) - df[src].notna()
+                out[name] = total / count.where(count > 0)
+    return df.join(pd.DataFrame(out))
+
+
+def timed(fn, df, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_bids(args.rows)
+    vectorized = lambda d: add_rolling_group_features(d, GROUP_COLS, 'BidAmount', WINDOWS)
+    results = {}
+    for name, fn in (('rows-rolling', rows_rolling), ('pandas-time', pandas_time_rolling), ('vectorized', vectorized)):
+        results[name] = timed(fn, df, args.repeat)
+        print(f'{name:>13}: {results[name][0]:8.3f} s  ({args.rows / results[name][0]:,.0f} rows/s)')
+
+    cols = [c for c in results['vectorized'][1].columns if '_rolling_' in c]
+    expected, actual = results['pandas-time'][1], results['vectorized'][1]
+    err = np.nanmax(np.abs(actual[cols].to_numpy(float) - expected.loc[actual.index, cols].to_numpy(float))
+                    / np.maximum(np.abs(expected.loc[actual.index, cols].to_numpy(float)), 1.0))
+    print(f'max relative difference vs pandas-time: {err:.2e}')
+    print(f'speedup vs rows-rolling: {results["rows-rolling"][0] / results["vectorized"][0]:.1f}x, '
+          f'vs pandas-time: {results["pandas-time"][0] / results["vectorized"][0]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Benchmark the inference, optimization and feature-engineering hot paths.
+
+Every case runs on synthetic data from src.data_loader.save_sample_data (fixed seed)
+and reports p50/p95/p99 latency, throughput and peak RSS:
+
+  features    add_time_features, add_rolling_group_features, add_lag_features,
+              merge_fred and the full train.py prepare_features, once per --scales size
+  gss         /predict and /optimize (live grid, golden-section, fee table) of api.py,
+              through the ASGI TestClient, on models trained by scripts/train.py
+  root        find_optimal_fee, recommend_bid_fee and recommend_bid_fees of the
+              top-level bid_inference.py, on a bundle fitted to the same sample
+  deployment  prepare_features and FeatureEncoder.transform of deployment/app.py
+              (models from --deployment-model-dir)
+  artifacts   loading the root bundle and the deployment model + metadata from their
+              joblib files and from artifact directories converted from them
+
+Results are written as JSON with the commit and environment; --compare flags every case
+whose p50/p95/p99 grew by more than --threshold against an earlier file.
+
+Usage:
+    python scripts/benchmark_suite.py --output benchmarks/baseline.json
+    python scripts/benchmark_suite.py --output benchmarks/new.json --compare benchmarks/baseline.json
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gss_common.artifact_store import convert, is_artifact_dir, load_artifacts
+from src.benchmark import compare, load_results, measure, save_results
+from src.data_loader import save_sample_data
+from src.feature_engineering import add_time_features, add_rolling_group_features, add_lag_features, merge_fred
+from src.fred_client import FakeFredBackend
+from src.macro_features import MacroFeatures
+
+PACKAGE = Path(__file__).resolve().parents[1]
+REPO = PACKAGE.parent
+GROUPS = ('features', 'gss', 'root', 'deployment', 'artifacts')
+GROUP_COLS = ['ClientType', 'Location']
+
+
+def gss_payloads(df: pd.DataFrame) -> list:
+    """api.py request bodies from sample rows (one distinct opportunity per row)."""
+    rows = df.drop(columns=['WinStatus']).assign(BidDate=df['BidDate'].dt.strftime('%Y-%m-%d'))
+    return rows.to_dict('records')
+
+
+def bench_features(args, workdir: Path) -> list:
+    from scripts.train import prepare_features
+
+    fred = pd.DataFrame({s: FakeFredBackend(end='2026-01-01').get_series(s) for s in ('UNRATE', 'CPIAUCSL')})
+    macro = MacroFeatures.from_frame(fred)
+    results = []
+    for scale in args.scales:
+        df = save_sample_data(str(workdir / f'sample_{scale}.csv'), n=scale, seed=args.seed)
+        timed = add_time_features(df)
+        cases = {
+            'add_time_features': lambda: add_time_features(df),
+            'add_rolling_group_features': lambda: add_rolling_group_features(timed, GROUP_COLS, 'BidAmount', [7, 30, 90]),
+            'add_lag_features': lambda: add_lag_features(timed, GROUP_COLS, ['BidAmount', 'WinStatus'], [1, 2]),
+            'merge_fred': lambda: merge_fred(df, macro),
+            'prepare_features': lambda: prepare_features(df, macro),
+        }
+        for name, fn in cases.items():
+            results.append(_record(f'features/{name}', scale, measure(fn, lambda i: (), args.repeats, warmup=1,
+                                                                          items_per_call=scale)))
+    return results
+
+
+def train_gss_models(workdir: Path, rows: int, seed: int = 0) -> Path:
+    """Models, feature store, macro series and fee table for api.py, trained on a sample."""
+    data = workdir / 'gss_train.csv'
+    models = workdir / 'gss_models'
+    save_sample_data(str(data), n=rows, seed=seed)
+    subprocess.run([sys.executable, str(PACKAGE / 'scripts' / 'train.py'), '--data-path', str(data),
+                    '--output', str(models), '--fred-backend', 'fake', '--fred-cache', str(workdir / 'fred'),
+                    '--cache-dir', str(workdir / 'cache')], check=True, cwd=PACKAGE, stdout=subprocess.DEVNULL)
+    subprocess.run([sys.executable, str(PACKAGE / 'scripts' / 'build_fee_table.py'), '--data-path', str(data),
+                    '--model-dir', str(models)], check=True, cwd=PACKAGE, stdout=subprocess.DEVNULL)
+    return models
+
+
+def bench_gss(args, workdir: Path) -> list:
+    models = train_gss_models(workdir, args.train_rows, args.seed)
+    os.environ['MODEL_DIR'] = str(models)
+    try:
+        import api
+    finally:
+        del os.environ['MODEL_DIR']
+    from fastapi.testclient import TestClient
+
+    n = args.iterations + args.warmup
+    # fresh opportunities each call, so the recommendation cache never answers
+    payloads = gss_payloads(save_sample_data(str(workdir / 'gss_requests.csv'), n=4 * n, seed=args.seed + 1))
+
+    def post(path, offset):
+        def call(body):
+            r = client.post(path, json=body)
+            if r.status_code != 200:
+                raise RuntimeError(f'{path} returned {r.status_code}: {r.text}')
+        return call, lambda i: (payloads[offset + i],)
+
+    results = []
+    with TestClient(api.app) as client:
+        if not api.readiness.wait(timeout=300):
+            raise RuntimeError(f'api.py did not become ready: {api.readiness.error}')
+        cases = {
+            'predict': post('/predict', 0),
+            'optimize[grid]': post('/optimize', n),
+            'optimize[golden]': post('/optimize?strategy=golden', 2 * n),
+            'optimize[table]': post('/optimize?use_table=true', 3 * n),
+        }
+        for name, (fn, args_iter) in cases.items():
+            results.append(_record(f'gss/{name}', args.train_rows, measure(fn, args_iter, args.iterations, args.warmup)))
+    return results
+
+
+# sample columns under the names of app.py's OpportunityInput
+ROOT_COLUMNS = {'ProjectType': 'PropertyType', 'Location': 'Market', 'ClientType': 'BidCompanyType'}
+
+
+def root_opportunities(df: pd.DataFrame) -> list:
+    """Opportunities for the top-level bid_inference.py / app.py, one per sample row."""
+    rows = df.rename(columns=ROOT_COLUMNS)[[*ROOT_COLUMNS.values(), 'EstimatedCost', 'CompetitorCount']]
+    rows.insert(0, 'ZipCode', [f'{10000 + i % 100:05d}' for i in range(len(df))])
+    return rows.assign(median_BidFee=df['BidAmount'], lag_1=df['BidAmount']).to_dict('records')
+
+
+def root_bundle(df: pd.DataFrame) -> dict:
+    """A bid_inference artifact bundle fitted to a sample: encoders, medians, classifier."""
+    from xgboost import XGBClassifier, XGBRegressor
+
+    X = pd.DataFrame(root_opportunities(df))
+    X['lag_1'] = df.groupby('ClientType', observed=True)['BidAmount'].shift(1).to_numpy()
+    encoders = {c: {v: float(i) for i, v in enumerate(sorted(X[c].astype(str).unique()))}
+                for c in ['ZipCode', *ROOT_COLUMNS.values()]}
+    for c, mapping in encoders.items():
+        X[c] = X[c].astype(str).map(mapping)
+    clf = XGBClassifier(n_estimators=100, max_depth=4, tree_method='hist').fit(X, df['WinStatus'])
+    reg = XGBRegressor(n_estimators=50, max_depth=4, tree_method='hist').fit(X, df['BidAmount'])
+    return {'features': list(X.columns), 'encoders': encoders, 'train_medians': X.median(),
+            'model_full': reg, 'clf': clf}
+
+
+def bench_root(args, workdir: Path) -> list:
+    sys.path.insert(0, str(REPO))
+    import joblib
+    import bid_inference
+
+    train = save_sample_data(str(workdir / 'root_train.csv'), n=args.train_rows, seed=args.seed)
+    if args.artifacts:
+        artifacts = load_artifacts(args.artifacts) if is_artifact_dir(args.artifacts) else joblib.load(args.artifacts)
+    else:
+        artifacts = root_bundle(train)
+    rows = root_opportunities(save_sample_data(str(workdir / 'root_requests.csv'), n=args.iterations + args.warmup,
+                                               seed=args.seed + 1))
+    series = [pd.Series(r) for r in rows]
+    static = (artifacts['features'], artifacts['encoders'], artifacts['train_medians'], artifacts['model_full'],
+              artifacts['clf'])
+    batch = 64
+
+    cases = {
+        'find_optimal_fee[grid]': (lambda row: bid_inference.find_optimal_fee(row, *static), lambda i: (series[i],), 1),
+        'find_optimal_fee[golden]': (lambda row: bid_inference.find_optimal_fee(row, *static, strategy='golden'),
+                                     lambda i: (series[i],), 1),
+        'recommend_bid_fee': (lambda row: bid_inference.recommend_bid_fee(row, artifacts=artifacts),
+                              lambda i: (rows[i],), 1),
+        f'recommend_bid_fees[{batch}]': (lambda chunk: bid_inference.recommend_bid_fees(chunk, artifacts=artifacts),
+                                         lambda i: ([rows[(i * batch + j) % len(rows)] for j in range(batch)],), batch),
+    }
+    results = []
+    for name, (fn, args_iter, items) in cases.items():
+        iterations = max(args.iterations // items, 5)
+        results.append(_record(f'root/{name}', args.train_rows,
+                               measure(fn, args_iter, iterations, args.warmup, items_per_call=items)))
+    return results
+
+
+def import_app(path: Path, name: str, env: dict):
+    """Import an app module from ``path`` under ``name``, with ``env`` set while it loads."""
+    sys.path.insert(0, str(path.parent))
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                del os.environ[k]
+            else:
+                os.environ[k] = v
+
+
+def deployment_requests(encoders: dict, dates: pd.Series, seed: int = 0) -> list:
+    """deployment/app.py request bodies: categories drawn from the fitted encoders, one per date."""
+    rng = np.random.default_rng(seed)
+    requests = []
+    for date in dates.dt.strftime('%Y-%m-%d'):
+        req = {c: str(rng.choice(enc.classes_)) for c, enc in encoders.items()}
+        req.update({'BidDate': date, 'DistanceInMiles': float(rng.uniform(0, 100)),
+                    'PopulationEstimate': float(rng.uniform(1e3, 1e6)), 'MedianAge': float(rng.uniform(25, 50))})
+        requests.append(req)
+    return requests
+
+
+def bench_deployment(args, workdir: Path) -> list:
+    model_dir = Path(args.deployment_model_dir)
+    if not (model_dir / 'model_metadata.joblib').exists():
+        print(f'Warning: no deployment models in {model_dir}; skipping deployment cases')
+        return []
+    app = import_app(REPO / 'deployment' / 'app.py', 'deployment_app', {'MODEL_DIR': str(model_dir)})
+    app.load_models()  # done by the startup event when served
+    sample = save_sample_data(str(workdir / 'deployment_requests.csv'), n=args.iterations + args.warmup, seed=args.seed)
+    requests = deployment_requests({c: app.encoders[c] for c in app.cat_cols}, sample['BidDate'], args.seed)
+
+    results = []
+    for name, fn in (('prepare_features', app.prepare_features), ('feature_encoder', app.feature_encoder.transform)):
+        results.append(_record(f'deployment/{name}', None,
+                               measure(fn, lambda i: (requests[i],), args.iterations, args.warmup)))
+    return results
+
+
+def bench_artifacts(args, workdir: Path) -> list:
+    import joblib
+
+    train = save_sample_data(str(workdir / 'artifacts_train.csv'), n=args.train_rows, seed=args.seed)
+    bundle = workdir / 'bid_recommendation_artifacts.joblib'
+    joblib.dump(root_bundle(train), bundle)
+    sources = {'root': [bundle]}
+    model_dir = Path(args.deployment_model_dir)
+    if (model_dir / 'bid_fee_model.joblib').exists() and (model_dir / 'model_metadata.joblib').exists():
+        sources['deployment'] = [model_dir / 'bid_fee_model.joblib', model_dir / 'model_metadata.joblib']
+
+    results = []
+    for name, paths in sources.items():
+        out = convert(paths, workdir / f'{name}_artifacts')
+        cases = {'joblib': lambda paths=paths: [joblib.load(p) for p in paths],
+                 'mmap': lambda out=out: load_artifacts(out)}
+        for label, fn in cases.items():
+            results.append(_record(f'artifacts/{name}[{label}]', None,
+                                   measure(fn, lambda i: (), max(args.iterations // 10, 5), 1)))
+    return results
+
+
+def _record(name: str, scale, stats: dict) -> dict:
+    print(f"{name:<40} {scale or '-':>8}  p50 {stats['p50_ms']:9.3f}  p95 {stats['p95_ms']:9.3f}  p99 {stats['p99_ms']:9.3f} ms"
+          f"  {stats['items_per_s']:12.1f}/s  peak {stats['peak_rss_mb']:7.1f} MB")
+    return {'name': name, 'scale': scale, **stats}
+
+
+def main():
+    default_deployment = REPO / 'deployment' / 'models'
+    if not default_deployment.exists():
+        default_deployment = REPO / 'GSS Bid Models' / 'models'
+    parser = argparse.ArgumentParser(description='Benchmark inference, optimization and feature engineering')
+    parser.add_argument('--output', default='benchmarks/results.json', help='JSON results file')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='latency growth flagged as a regression (0.2 = 20%%)')
+    parser.add_argument('--only', nargs='*', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--scales', nargs='*', type=int, default=[1_000, 10_000, 100_000],
+                        help='sample sizes (rows) for the feature-engineering cases')
+    parser.add_argument('--repeats', type=int, default=7, help='timed calls per feature-engineering case')
+    parser.add_argument('--train-rows', type=int, default=5_000, help='sample size the served models are fitted on')
+    parser.add_argument('--iterations', type=int, default=300, help='timed calls per inference case')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--artifacts', help='bid_inference bundle or artifact directory for the root cases '
+                                            '(default: fitted to the sample)')
+    parser.add_argument('--deployment-model-dir', default=str(default_deployment))
+    args = parser.parse_args()
+
+    benches = {'features': bench_features, 'gss': bench_gss, 'root': bench_root, 'deployment': bench_deployment,
+               'artifacts': bench_artifacts}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for group in args.only:
+            results += benches[group](args, Path(tmp))
+
+    config = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    print('Results written to', save_results(args.output, results, config))
+
+    if args.compare:
+        rows = compare(load_results(args.compare), load_results(args.output), args.threshold)
+        for row in rows:
+            ratios = '  '.join(f"{m} x{row[m]:.2f}" for m in ('p50_ms', 'p95_ms', 'p99_ms', 'items_per_s', 'peak_rss_mb')
+                               if m in row)
+            print(f"{'REGRESSION' if row['regression'] else 'ok':<10} {row['name']:<40} {row['scale'] or '-':>8}  {ratios}")
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
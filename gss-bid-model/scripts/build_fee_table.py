@@ -0,0 +1,64 @@
+"""Precompute the fee-response table served by /optimize?use_table=true. Run after train.py.
+
+The table is built from the earlier rows of the history; the latest --holdout-frac
+(by BidDate) are held out, and the table is compared with live scoring over their
+/optimize windows (src.fee_table.evaluate). That error is printed and stored in the
+table's manifest. --holdout-frac 0 builds from every row and skips the check; the
+API only serves a table whose measured p95 error is within FEE_TABLE_MAX_P95_ERROR.
+
+Usage:
+    python scripts/build_fee_table.py --data-path data/sample_bid_data.csv --model-dir models/
+"""
+import argparse
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data_loader import load_csv
+from src.fee_table import MAX_P95_ERROR, build_fee_table, evaluate
+from src.fred_client import DEFAULT_CACHE_DIR, FredCache
+from src.macro_features import MacroFeatures
+from scripts.train import prepare_features
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data-path', required=True)
+    parser.add_argument('--model-dir', required=True)
+    parser.add_argument('--output', help='table directory (default: <model-dir>/fee_table)')
+    parser.add_argument('--min-ratio', type=float, default=0.1, help='lowest bid / EstimatedCost in the table')
+    parser.add_argument('--max-ratio', type=float, default=10.0, help='highest bid / EstimatedCost in the table')
+    parser.add_argument('--points', type=int, default=193)
+    parser.add_argument('--holdout-frac', type=float, default=0.2,
+                        help='latest fraction of rows kept out of the table to measure its error on')
+    parser.add_argument('--fred-cache', default=DEFAULT_CACHE_DIR,
+                        help='FRED series cache, used when <model-dir>/macro (written by train.py) is absent')
+    args = parser.parse_args()
+
+    df = load_csv(args.data_path)
+    macro_dir = Path(args.model_dir) / 'macro'
+    macro = MacroFeatures.load(str(macro_dir)) if (macro_dir / 'manifest.json').exists() else FredCache(args.fred_cache)
+    df_feat = prepare_features(df, macro).sort_values('BidDate', kind='stable')
+    X = df_feat.drop(columns=['BidDate', 'WinStatus'], errors='ignore')
+    n_build = len(X) - int(round(len(X) * args.holdout_frac))
+    build, holdout = X.iloc[:n_build], X.iloc[n_build:]
+
+    clf = joblib.load(Path(args.model_dir) / 'win_model.joblib')
+    table = build_fee_table(clf, build, ratios=np.geomspace(args.min_ratio, args.max_ratio, args.points))
+    if len(holdout):
+        table.error = evaluate(table, clf, holdout)
+    out = Path(args.output or Path(args.model_dir) / 'fee_table')
+    table.save(str(out))
+    print(f'Saved fee table for {len(table.segments)} cells to {out}')
+    if table.error:
+        print(f'Error vs live scoring on {len(holdout)} held-out rows:', table.error)
+    if not table.validated():
+        print(f'Warning: at the default FEE_TABLE_MAX_P95_ERROR={MAX_P95_ERROR} the API will not serve this '
+              f'table (p95 error above it, or not measured); /optimize scores live')
+
+
+if __name__ == '__main__':
+    main()
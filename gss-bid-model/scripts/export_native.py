@@ -0,0 +1,70 @@
+"""Export trained pipelines to the native serving formats (booster + preprocessing spec).
+
+Writes <model-dir>/native (a JSON spec per model) and <model-dir>/artifacts (both models
+in one memory-mapped artifact directory, gss_common.artifact_store; api.py prefers it).
+train.py already does this; use this script for models trained before it did.
+
+Usage:
+    python scripts/export_native.py --model-dir models/ [--data-path data/sample_bid_data.csv]
+
+With --data-path the exported models are checked against the pipelines on that data.
+"""
+import argparse
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.native import export_native, load_native, load_native_artifacts, save_native_artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model-dir', required=True)
+    parser.add_argument('--output', help='export directory (default: <model-dir>/native)')
+    parser.add_argument('--format', choices=['ubj', 'json'], default='ubj')
+    parser.add_argument('--artifacts', help='artifact directory (default: <model-dir>/artifacts)')
+    parser.add_argument('--data-path', help='CSV to check parity on')
+    args = parser.parse_args()
+
+    out = Path(args.output or Path(args.model_dir) / 'native')
+    pipelines = {}
+    for name in ('win_model', 'bid_model'):
+        path = Path(args.model_dir) / f'{name}.joblib'
+        if path.exists():
+            pipelines[name] = joblib.load(path)
+            export_native(pipelines[name], str(out), name, fmt=args.format)
+            print(f'Exported {name} to {out}')
+    artifacts_dir = Path(args.artifacts or Path(args.model_dir) / 'artifacts')
+    if set(pipelines) == {'win_model', 'bid_model'}:
+        sources = [Path(args.model_dir) / f'{name}.joblib' for name in pipelines]
+        print('Wrote', save_native_artifacts(pipelines, str(artifacts_dir), sources))
+    else:
+        print('Warning: the artifact directory needs both win_model.joblib and bid_model.joblib; not written')
+
+    if args.data_path:
+        from src.data_loader import load_csv
+        from src.fred_client import FredCache
+        from src.macro_features import MacroFeatures
+        from scripts.train import prepare_features
+
+        macro_dir = Path(args.model_dir) / 'macro'
+        macro = MacroFeatures.load(str(macro_dir)) if (macro_dir / 'manifest.json').exists() else FredCache()
+        df_feat = prepare_features(load_csv(args.data_path), macro)
+        X = df_feat.drop(columns=['BidDate', 'WinStatus'], errors='ignore')
+        mapped = load_native_artifacts(str(artifacts_dir), list(pipelines)) if artifacts_dir.exists() else {}
+        for name, pipe in pipelines.items():
+            for label, native in (('native', load_native(str(out), name)), ('artifacts', mapped.get(name))):
+                if native is None:
+                    continue
+                if hasattr(pipe, 'predict_proba'):
+                    diff = np.abs(native.predict_proba(X)[:, 1] - pipe.predict_proba(X)[:, 1])
+                else:
+                    diff = np.abs(native.predict(X) - pipe.predict(X))
+                print(f'{name} ({label}): max abs difference vs pipeline {diff.max():.3g} over {len(X)} rows')
+
+
+if __name__ == '__main__':
+    main()
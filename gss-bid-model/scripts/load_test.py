@@ -0,0 +1,289 @@
+"""Load-test the three FastAPI apps and size the HPA from the results.
+
+Drives gss-bid-model/api.py, the top-level app.py and deployment/app.py with closed-loop
+clients (src/loadgen.py) at each --concurrency level, either in-process through ASGI
+(--target asgi, one event loop shared with the load generator) or against local servers
+started with each --workers count: ``uvicorn --workers N`` (--target uvicorn) or the
+pre-fork launcher, which loads the artifacts once before forking (--target prefork). Every app gets models
+fitted to save_sample_data samples, as in benchmark_suite.py, so nothing external is
+needed.
+
+The request mix is set by --mix (kind=weight; api.py serves predict and optimize,
+app.py's /predict is an optimize, deployment/app.py's a predict) and --repeat-frac, the
+share of requests drawn from a hot set of --hot-set opportunities rather than a fresh
+one. For each app and worker count the report gives the saturation throughput (best
+throughput within --max-error-rate), the throughput that still meets --slo-p95-ms, and,
+with --peak-rps, the replicas needed at the CPU target of k8s/hpa.yaml.
+
+Usage:
+    python scripts/load_test.py --app gss --concurrency 1 4 16 64 --duration 10
+    python scripts/load_test.py --target uvicorn --workers 1 2 4 --peak-rps 200 --output benchmarks/load.json
+"""
+import argparse
+import asyncio
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import httpx
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.benchmark import compare, load_results, save_results
+from src.data_loader import save_sample_data
+from src.loadgen import RequestMix, capacity_at_slo, run_level, saturation
+from scripts.benchmark_suite import (PACKAGE, REPO, deployment_requests, gss_payloads, import_app, root_bundle,
+                                     root_opportunities, train_gss_models)
+
+APPS = ('gss', 'root', 'deployment')
+DEFAULT_HPA = PACKAGE / 'k8s' / 'hpa.yaml'
+
+
+def deployment_models(workdir: Path, metadata_path: Path) -> Path:
+    """A deployment/app.py model directory: the given metadata plus a small classifier over its features."""
+    from xgboost import XGBClassifier
+
+    metadata = joblib.load(metadata_path)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1000, len(metadata['feature_cols']))), columns=metadata['feature_cols'])
+    model = XGBClassifier(n_estimators=50, max_depth=4, tree_method='hist').fit(X, rng.integers(0, 3, len(X)))
+    out = workdir / 'deployment_models'
+    out.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, out / 'bid_fee_model.joblib')
+    joblib.dump(metadata, out / 'model_metadata.joblib')
+    return out
+
+
+def prepare_apps(args, workdir: Path) -> dict:
+    """Per app: module path, environment and request kinds ``{kind: (path, bodies)}``."""
+    n = args.bodies
+    apps = {}
+    if 'gss' in args.app:
+        models = train_gss_models(workdir, args.train_rows, args.seed)
+        bodies = gss_payloads(save_sample_data(str(workdir / 'gss_requests.csv'), n=n, seed=args.seed + 1))
+        apps['gss'] = {'path': PACKAGE / 'api.py', 'env': {'MODEL_DIR': str(models)},
+                       'kinds': {'predict': ('/predict', bodies), 'optimize': ('/optimize', bodies)}}
+    if 'root' in args.app:
+        train = save_sample_data(str(workdir / 'root_train.csv'), n=args.train_rows, seed=args.seed)
+        bundle = workdir / 'bid_recommendation_artifacts.joblib'
+        joblib.dump(root_bundle(train), bundle)
+        bodies = root_opportunities(save_sample_data(str(workdir / 'root_requests.csv'), n=n, seed=args.seed + 1))
+        # app.py's /predict runs the fee search, i.e. an optimize
+        apps['root'] = {'path': REPO / 'app.py', 'env': {'ARTIFACTS_PATH': str(bundle)},
+                        'kinds': {'optimize': ('/predict', bodies)}}
+    if 'deployment' in args.app:
+        model_dir = Path(args.deployment_model_dir) if args.deployment_model_dir else \
+            deployment_models(workdir, Path(args.deployment_metadata))
+        encoders = joblib.load(model_dir / 'model_metadata.joblib')['encoders']
+        dates = save_sample_data(str(workdir / 'deployment_requests.csv'), n=n, seed=args.seed + 1)['BidDate']
+        apps['deployment'] = {'path': REPO / 'deployment' / 'app.py', 'env': {'MODEL_DIR': str(model_dir)},
+                              'kinds': {'predict': ('/predict', deployment_requests(encoders, dates, args.seed))}}
+    return apps
+
+
+def request_mix(spec: dict, args) -> RequestMix:
+    kinds = {k: (args.mix.get(k, 0.0), path, bodies) for k, (path, bodies) in spec['kinds'].items()}
+    return RequestMix(kinds, repeat_frac=args.repeat_frac, hot_set=args.hot_set, seed=args.seed)
+
+
+async def wait_ready(client, timeout: float = 300.0):
+    """Poll /ready until the app has loaded and warmed its models (no endpoint counts as ready)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        r = await client.get('/ready')
+        if r.status_code in (200, 404):
+            return
+        if time.monotonic() > deadline:
+            raise RuntimeError(f'not ready within {timeout:.0f} s: {r.text}')
+        await asyncio.sleep(0.05)
+
+
+async def _levels(client, mix: RequestMix, args) -> list:
+    await wait_ready(client)
+    await run_level(client, mix, max(args.concurrency), args.warmup)
+    return [await run_level(client, mix, c, args.duration) for c in args.concurrency]
+
+
+async def run_asgi(name: str, spec: dict, args) -> list:
+    app = import_app(spec['path'], f'loadtest_{name}', spec['env']).app
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://asgi') as client:
+            return await _levels(client, request_mix(spec, args), args)
+    finally:
+        await app.router.shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def uvicorn_server(spec: dict, workers: int, timeout: float = 180.0, launcher: str = 'uvicorn'):
+    """A local ``uvicorn <module>:app --workers N`` (or the shared pre-fork launcher with ``launcher='prefork'``).
+
+    Yields its base URL and the server's pid once /health answers (see wait_ready).
+    """
+    port = _free_port()
+    module = 'uvicorn' if launcher == 'uvicorn' else 'gss_common.prefork'
+    cmd = [sys.executable, '-m', module, f"{spec['path'].stem}:app", '--host', '127.0.0.1', '--port', str(port),
+           '--workers', str(workers), '--log-level', 'warning']
+    proc = subprocess.Popen(cmd, cwd=spec['path'].parent, env={**os.environ, **spec['env']})
+    url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f'{module} exited with {proc.returncode}: {" ".join(cmd)}')
+            try:
+                if httpx.get(url + '/health', timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'{module} did not answer /health within {timeout:.0f} s')
+            time.sleep(0.2)
+        yield url, proc.pid
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def run_http(url: str, spec: dict, args) -> list:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        return await _levels(client, request_mix(spec, args), args)
+
+
+def read_hpa(path: Path) -> dict:
+    try:
+        import yaml
+    except ImportError:
+        print('Warning: pyyaml not installed; HPA sizing skipped')
+        return {}
+    spec = yaml.safe_load(path.read_text())['spec']
+    cpu = [m['resource']['target'] for m in spec.get('metrics', [])
+           if m.get('type') == 'Resource' and m['resource']['name'] == 'cpu']
+    return {'min_replicas': spec.get('minReplicas', 1), 'max_replicas': spec['maxReplicas'],
+            'target_cpu_utilization': cpu[0].get('averageUtilization') if cpu else None}
+
+
+def summarize_app(name: str, workers: int, levels: list, args, hpa: dict) -> dict:
+    """Saturation point, SLO capacity and (with --peak-rps) the replicas needed for one app/worker count."""
+    sat = saturation(levels, args.max_error_rate)
+    slo = capacity_at_slo(levels, args.slo_p95_ms, args.max_error_rate)
+    out = {
+        'app': name, 'workers': workers,
+        'saturation_rps': sat['throughput_rps'] if sat else None,
+        'saturation_concurrency': sat['concurrency'] if sat else None,
+        'saturation_p95_ms': sat['p95_ms'] if sat else None,
+        'slo_p95_ms': args.slo_p95_ms,
+        'slo_rps': slo['throughput_rps'] if slo else None,
+        'max_error_rate_seen': max(lv['error_rate'] for lv in levels),
+    }
+    util = hpa.get('target_cpu_utilization')
+    if args.peak_rps and sat and util:
+        # a pod held at the HPA's CPU target serves about that share of its saturation throughput
+        per_pod = sat['throughput_rps'] * util / 100
+        if slo:
+            per_pod = min(per_pod, slo['throughput_rps'])
+        out['rps_per_pod_at_target'] = per_pod
+        out['replicas_for_peak'] = math.ceil(args.peak_rps / per_pod)
+        out['max_replicas_sufficient'] = out['replicas_for_peak'] <= hpa['max_replicas']
+    return out
+
+
+def _print_level(label: str, level: dict):
+    if not level.get('calls'):
+        print(f"{label:<28} c={level['concurrency']:<4} no successful requests  errors {level['errors']}")
+        return
+    print(f"{label:<28} c={level['concurrency']:<4} {level['throughput_rps']:9.1f} req/s  p50 {level['p50_ms']:8.1f}"
+          f"  p95 {level['p95_ms']:8.1f}  p99 {level['p99_ms']:8.1f} ms  errors {level['error_rate']:6.2%}")
+
+
+def main():
+    default_deployment = REPO / 'deployment' / 'models' / 'model_metadata.joblib'
+    if not default_deployment.exists():
+        default_deployment = REPO / 'GSS Bid Models' / 'models' / 'model_metadata.joblib'
+    parser = argparse.ArgumentParser(description='Load-test the FastAPI apps in-process or on local uvicorn servers')
+    parser.add_argument('--app', nargs='*', choices=APPS, default=list(APPS))
+    parser.add_argument('--target', choices=['asgi', 'uvicorn', 'prefork'], default='asgi')
+    parser.add_argument('--workers', nargs='*', type=int, default=[1], help='server worker counts (not --target asgi)')
+    parser.add_argument('--concurrency', nargs='*', type=int, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0, help='untimed seconds before the first level')
+    parser.add_argument('--mix', nargs='*', default=['predict=0.5', 'optimize=0.5'], help='request kinds as kind=weight')
+    parser.add_argument('--repeat-frac', type=float, default=0.0, help='share of requests repeating a hot opportunity')
+    parser.add_argument('--hot-set', type=int, default=32, help='number of repeated opportunities')
+    parser.add_argument('--bodies', type=int, default=20_000, help='distinct opportunities generated per app')
+    parser.add_argument('--train-rows', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--deployment-model-dir', help='deployment/app.py models (default: a classifier fitted to '
+                                                       '--deployment-metadata)')
+    parser.add_argument('--deployment-metadata', default=str(default_deployment))
+    parser.add_argument('--slo-p95-ms', type=float, default=200.0)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--peak-rps', type=float, help='expected peak request rate, for HPA sizing')
+    parser.add_argument('--hpa', default=str(DEFAULT_HPA))
+    parser.add_argument('--output', default='benchmarks/load.json')
+    parser.add_argument('--compare', help='earlier load-test results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    args.mix = {k: float(w) for k, w in (item.split('=') for item in args.mix)}
+    if args.target == 'asgi' and args.workers != [1]:
+        parser.error('--workers needs --target uvicorn or prefork; in-process ASGI is a single worker')
+
+    hpa = read_hpa(Path(args.hpa)) if Path(args.hpa).exists() else {}
+    results, summary = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        apps = prepare_apps(args, Path(tmp))
+        for name, spec in apps.items():
+            for workers in args.workers:
+                label = f'{name}/{args.target}/w{workers}'
+                if args.target == 'asgi':
+                    levels = asyncio.run(run_asgi(name, spec, args))
+                else:
+                    with uvicorn_server(spec, workers, launcher=args.target) as (url, _):
+                        levels = asyncio.run(run_http(url, spec, args))
+                for level in levels:
+                    _print_level(label, level)
+                    results.append({'name': label, 'scale': level['concurrency'], **level})
+                summary.append(summarize_app(name, workers, levels, args, hpa))
+
+    print()
+    for s in summary:
+        line = (f"{s['app']:<11} workers={s['workers']}  saturation {s['saturation_rps'] or 0:8.1f} req/s"
+                f" (c={s['saturation_concurrency']}, p95 {s['saturation_p95_ms'] or float('nan'):.1f} ms)"
+                f"  within p95<={s['slo_p95_ms']:.0f} ms: {s['slo_rps'] or 0:8.1f} req/s")
+        if 'replicas_for_peak' in s:
+            line += (f"  -> {s['replicas_for_peak']} replica(s) for {args.peak_rps:.0f} req/s at "
+                     f"{hpa['target_cpu_utilization']}% CPU (maxReplicas {hpa['max_replicas']}"
+                     f"{'' if s['max_replicas_sufficient'] else ', too low'})")
+        print(line)
+
+    config = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    print('Results written to', save_results(args.output, results, config, summary=summary, hpa=hpa))
+    if args.compare:
+        rows = compare(load_results(args.compare), load_results(args.output), args.threshold)
+        for row in rows:
+            print(f"{'REGRESSION' if row['regression'] else 'ok':<10} {row['name']:<28} c={row['scale']:<4}  "
+                  + '  '.join(f"{m} x{row[m]:.2f}" for m in ('p95_ms', 'items_per_s') if m in row))
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,16 @@ Usage:
 """
 import argparse
 import json
-import numpy as np
+import sys
 import pandas as pd
 from pathlib import Path
 import joblib
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.optimize import sweep
+from gss_common.search import STRATEGIES
+
 
 def load_input(path: str) -> pd.DataFrame:
     p = Path(path)
@@ -23,31 +28,11 @@ def load_input(path: str) -> pd.DataFrame:
         raise ValueError('Unsupported input JSON format')
 
 
-def optimize_bid(model_dir: str, input_df: pd.DataFrame, pct_range=0.2, n_steps=41):
+def optimize_bid(model_dir: str, input_df: pd.DataFrame, pct_range=0.2, n_steps=41, strategy='grid', tol=0.01):
     p = Path(model_dir)
     clf = joblib.load(p / 'win_model.joblib')
-    reg = joblib.load(p / 'bid_model.joblib')
-
-    baseline = float(input_df.get('BidAmount', pd.Series([0])).iloc[0])
-    if baseline <= 0:
-        # choose an approximate baseline from EstimatedCost if present
-        baseline = float(input_df.get('EstimatedCost', pd.Series([100000.0])).iloc[0])
-
-    candidates = np.linspace(baseline*(1-pct_range), baseline*(1+pct_range), n_steps)
-
-    results = []
-    for c in candidates:
-        Xc = input_df.copy()
-        Xc['BidAmount'] = c
-        # Align feature order is handled by pipeline inside models
-        p_win = clf.predict_proba(Xc)[:, 1] if hasattr(clf, 'predict_proba') else clf.predict(Xc)
-        # If classifier returns scalar, ensure shape
-        p_win = np.asarray(p_win).ravel()
-        # For regression we may want predicted expected fee but we already choose c as fee
-        expected_profit = p_win * c
-        results.append({'candidate': c, 'p_win': float(p_win[0]), 'expected_profit': float(expected_profit[0])})
 
-    df_res = pd.DataFrame(results)
+    df_res = sweep(clf, input_df, pct_range=pct_range, n_steps=n_steps, strategy=strategy, tol=tol)
     best = df_res.loc[df_res['expected_profit'].idxmax()]
     return df_res, best
 
@@ -56,10 +41,13 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--model-dir', required=True)
     parser.add_argument('--input-json', required=True)
+    parser.add_argument('--strategy', choices=STRATEGIES, default='grid')
+    parser.add_argument('--tol', type=float, default=0.01, help='final bracket width for adaptive strategies, as a fraction of the search window')
     args = parser.parse_args()
 
     input_df = load_input(args.input_json)
-    df_res, best = optimize_bid(args.model_dir, input_df)
+    df_res, best = optimize_bid(args.model_dir, input_df, strategy=args.strategy, tol=args.tol)
+    print(f'Model evaluations ({args.strategy}): {len(df_res)}')
     print('Best candidate:')
     print(best.to_dict())
     out = Path(args.model_dir) / 'last_opt_result.json'
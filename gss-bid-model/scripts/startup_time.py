@@ -0,0 +1,128 @@
+"""Measure how long the FastAPI apps take to come up and to serve their first request.
+
+Each app is started --repeats times as a fresh ``uvicorn <module>:app`` process on models
+fitted to save_sample_data samples (as in load_test.py), and timed from process start:
+
+  live_ms           first 200 from /health (the liveness probe)
+  ready_ms          first 200 from /ready (the readiness probe; /health on builds without it)
+  first_request_ms  latency of the first scoring request once ready
+  warm_request_ms   median latency of the next --warm-requests requests
+
+The median over the repeats is reported and saved; --compare flags a regression in
+ready_ms or first_request_ms against an earlier run.
+
+Usage:
+    python scripts/startup_time.py --output benchmarks/startup.json
+    python scripts/startup_time.py --app gss --compare benchmarks/startup.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.benchmark import compare, load_results, save_results
+from scripts.load_test import APPS, _free_port, prepare_apps
+from scripts.benchmark_suite import REPO
+
+METRICS = ('live_ms', 'ready_ms', 'first_request_ms', 'warm_request_ms')
+
+
+def start_once(spec: dict, warm_requests: int, timeout: float = 180.0) -> dict:
+    """Start the app, poll its probes every 10 ms and time the first requests."""
+    port = _free_port()
+    url = f'http://127.0.0.1:{port}'
+    kind, (path, bodies) = next(iter(spec['kinds'].items()))
+    cmd = [sys.executable, '-m', 'uvicorn', f"{spec['path'].stem}:app", '--host', '127.0.0.1', '--port', str(port),
+           '--log-level', 'warning']
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=spec['path'].parent, env={**os.environ, **spec['env']})
+    out = {}
+    try:
+        with httpx.Client(base_url=url, timeout=30.0) as client:
+            deadline = time.monotonic() + timeout
+            while 'ready_ms' not in out:
+                if proc.poll() is not None:
+                    raise RuntimeError(f'uvicorn exited with {proc.returncode}: {" ".join(cmd)}')
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{spec["path"]} not ready within {timeout:.0f} s')
+                try:
+                    if 'live_ms' not in out and client.get('/health').status_code == 200:
+                        out['live_ms'] = (time.perf_counter() - start) * 1e3
+                    if 'live_ms' in out:
+                        status = client.get('/ready').status_code
+                        if status == 200 or status == 404:  # 404: no readiness endpoint, live means ready
+                            out['ready_ms'] = (time.perf_counter() - start) * 1e3
+                            break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+
+            latencies = []
+            for body in bodies[:warm_requests + 1]:
+                t = time.perf_counter()
+                r = client.post(path, json=body)
+                latencies.append((time.perf_counter() - t) * 1e3)
+                if r.status_code != 200:
+                    raise RuntimeError(f'{path} returned {r.status_code}: {r.text}')
+            out['first_request_ms'] = latencies[0]
+            out['warm_request_ms'] = float(np.median(latencies[1:]))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return out
+
+
+def main():
+    default_deployment = REPO / 'deployment' / 'models' / 'model_metadata.joblib'
+    if not default_deployment.exists():
+        default_deployment = REPO / 'GSS Bid Models' / 'models' / 'model_metadata.joblib'
+    parser = argparse.ArgumentParser(description='Time app startup, readiness and the first requests')
+    parser.add_argument('--app', nargs='*', choices=APPS, default=list(APPS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warm-requests', type=int, default=20)
+    parser.add_argument('--train-rows', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--deployment-model-dir', help='deployment/app.py models (default: a classifier fitted to '
+                                                       '--deployment-metadata)')
+    parser.add_argument('--deployment-metadata', default=str(default_deployment))
+    parser.add_argument('--output', default='benchmarks/startup.json')
+    parser.add_argument('--compare', help='earlier startup results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    args.bodies = args.warm_requests + 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        apps = prepare_apps(args, Path(tmp))
+        for name, spec in apps.items():
+            runs = [start_once(spec, args.warm_requests) for _ in range(args.repeats)]
+            row = {'name': f'{name}/startup', 'scale': None, 'repeats': args.repeats,
+                   **{m: float(np.median([r[m] for r in runs])) for m in METRICS}}
+            print(f"{name:<11} live {row['live_ms']:8.0f} ms  ready {row['ready_ms']:8.0f} ms  "
+                  f"first request {row['first_request_ms']:8.1f} ms  warm {row['warm_request_ms']:6.1f} ms")
+            results.append(row)
+
+    config = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    print('Results written to', save_results(args.output, results, config))
+    if args.compare:
+        rows = compare(load_results(args.compare), load_results(args.output), args.threshold,
+                       metrics=('ready_ms', 'first_request_ms'))
+        for row in rows:
+            print(f"{'REGRESSION' if row['regression'] else 'ok':<10} {row['name']:<20} "
+                  + '  '.join(f"{m} x{row[m]:.2f}" for m in ('ready_ms', 'first_request_ms') if m in row))
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,22 +2,45 @@
 
 Usage:
     python scripts/train.py --data-path data/sample_bid_data.csv --output models/
+
+The CSV is read through the typed, month-partitioned cache in src/data_loader.py;
+--start/--end restrict training to a BidDate range without reading the other months.
+--tune searches the XGBoost params first (src/tuning.py), writes
+<output>/tuning/leaderboard.csv and trains the final models with the pick.
 """
 import argparse
+import json
+import sys
 from pathlib import Path
 import pandas as pd
-from src.data_loader import load_csv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data_loader import load_csv, load_bid_history
 from src.feature_engineering import add_time_features, add_rolling_group_features, add_lag_features, merge_fred
-from src.fred_client import load_cached_fred, fetch_fred_series, save_fred
+from src.fred_client import DEFAULT_CACHE_DIR, FakeFredBackend, FredCache, backend_from_env, load_cached_fred
 from src.models import train_models
+from src.feature_store import FeatureStore, append_features
+from src.macro_features import MacroFeatures
+from src.timing import StageTimer
+from src.tuning import best_params, save_leaderboard, tune
+
 
+def prepare_features(df: pd.DataFrame, fred_df=None, feature_store: str = None):
+    """Time, rolling, lag and FRED features.
 
-def prepare_features(df: pd.DataFrame, fred_df=None):
+    With ``feature_store`` (a directory) the rolling and lag features come from the
+    incremental store in src/feature_store.py, which only computes rows appended since
+    the previous run; the result is the same as the full recompute.
+    """
     df = add_time_features(df)
     group_cols = ['ClientType', 'Location']
     group_cols = [c for c in group_cols if c in df.columns]
-    df = add_rolling_group_features(df, group_cols=group_cols, target_col='BidAmount', windows=[7,30,90])
-    df = add_lag_features(df, group_cols=group_cols, cols_to_lag=['BidAmount', 'WinStatus'], lags=[1,2])
+    if feature_store:
+        df = df.join(append_features(df, feature_store, group_cols=group_cols)).sort_values('BidDate')
+    else:
+        df = add_rolling_group_features(df, group_cols=group_cols, target_col='BidAmount', windows=[7,30,90])
+        df = add_lag_features(df, group_cols=group_cols, cols_to_lag=['BidAmount', 'WinStatus'], lags=[1,2])
     df = merge_fred(df, fred_df)
     return df
 
@@ -27,25 +50,50 @@ def main():
     parser.add_argument('--data-path', required=True)
     parser.add_argument('--output', required=True)
     parser.add_argument('--fred-series', nargs='*', default=['UNRATE'])
+    parser.add_argument('--fred-cache', default=DEFAULT_CACHE_DIR, help='directory of the local FRED series cache')
+    parser.add_argument('--fred-backend', choices=['fred', 'fake'], help='fake: offline synthetic series (default: $FRED_BACKEND, else fredapi)')
+    parser.add_argument('--no-fred-refresh', action='store_true', help='use the cached FRED series as they are')
+    parser.add_argument('--feature-store', help='directory for incremental rolling/lag feature state, reused across runs')
+    parser.add_argument('--cache-dir', help='columnar cache of the CSV (default: data/cache/<csv name>)')
+    parser.add_argument('--no-cache', action='store_true', help='read the CSV with load_csv, without the typed columnar cache')
+    parser.add_argument('--start', help='first BidDate to train on (inclusive)')
+    parser.add_argument('--end', help='last BidDate to train on (inclusive)')
+    parser.add_argument('--n-jobs', type=int, help='XGBoost threads per model (default: half the cores each)')
+    parser.add_argument('--sequential', action='store_true', help='train the two models one after the other')
+    parser.add_argument('--tune', action='store_true', help='search XGBoost params on time-ordered folds before training')
+    parser.add_argument('--tune-method', choices=['halving', 'random'], default='halving')
+    parser.add_argument('--tune-candidates', type=int, default=16)
+    parser.add_argument('--tune-folds', type=int, default=3)
+    parser.add_argument('--tune-max-rounds', type=int, default=900, help='most boosting rounds a candidate can get')
+    parser.add_argument('--tune-workers', type=int, help='candidates fitted at the same time (default: one per core)')
+    parser.add_argument('--max-latency-ms', type=float, help='only pick candidates scoring 1k rows within this many ms')
     args = parser.parse_args()
+    timer = StageTimer()
 
-    df = load_csv(args.data_path)
+    with timer.stage('load'):
+        if args.no_cache:
+            df = load_csv(args.data_path)
+            if args.start:
+                df = df[df['BidDate'] >= pd.Timestamp(args.start)].reset_index(drop=True)
+            if args.end:
+                df = df[df['BidDate'] <= pd.Timestamp(args.end)].reset_index(drop=True)
+        else:
+            df = load_bid_history(args.data_path, start=args.start, end=args.end, cache_dir=args.cache_dir)
 
-    # Try to load cached fred or fetch
-    fred_cache = Path('data/fred_cached.csv')
-    fred_df = None
-    if fred_cache.exists():
-        fred_df = load_cached_fred(str(fred_cache))
-    else:
-        # attempt to fetch first series as example
-        try:
-            fred_df = fetch_fred_series(args.fred_series[0])
-            if not fred_df.empty:
-                save_fred(fred_df, str(fred_cache))
-        except Exception:
-            fred_df = None
+    # Macro series from the local FRED cache, topped up with any new observations
+    with timer.stage('fred'):
+        backend = FakeFredBackend() if args.fred_backend == 'fake' else backend_from_env()
+        fred_cache = FredCache(args.fred_cache, backend)
+        legacy = Path('data/fred_cached.csv')
+        if not fred_cache.series_ids() and legacy.exists():
+            fred_cache.import_frame(load_cached_fred(str(legacy)))
+        if not args.no_fred_refresh:
+            fred_cache.refresh(args.fred_series)
+        # compiled once: sorted dates + carried-forward values, joined with searchsorted
+        macro = MacroFeatures.from_cache(fred_cache, args.fred_series)
 
-    df_feat = prepare_features(df, fred_df)
+    with timer.stage('features'):
+        df_feat = prepare_features(df, macro, feature_store=args.feature_store)
 
     # Select feature columns: keep categorical and numeric
     categorical_cols = [c for c in ['ProjectType', 'Location', 'ClientType'] if c in df_feat.columns]
@@ -55,11 +103,43 @@ def main():
     y_reg = df_feat['BidAmount']
     y_clf = df_feat['WinStatus']
 
-    # Drop columns that are not features
-    X = df_feat.drop(columns=['BidDate', 'BidAmount', 'WinStatus'], errors='ignore')
+    # Drop columns that are not features. BidAmount stays: it is the decision variable the
+    # win model is optimized over; train_models keeps it out of the regressor's inputs.
+    X = df_feat.drop(columns=['BidDate', 'WinStatus'], errors='ignore')
+
+    clf_params = reg_params = None
+    if args.tune:
+        with timer.stage('tune'):
+            board = tune(X, y_reg, y_clf, df_feat['BidDate'], categorical_cols, numeric_cols,
+                         n_candidates=args.tune_candidates, n_folds=args.tune_folds, method=args.tune_method,
+                         max_rounds=args.tune_max_rounds, workers=args.tune_workers)
+        clf_params = best_params(board, 'win', args.max_latency_ms)
+        reg_params = best_params(board, 'bid', args.max_latency_ms)
+        tuning_dir = Path(args.output) / 'tuning'
+        print('Leaderboard written to', save_leaderboard(board, tuning_dir))
+        (tuning_dir / 'best_params.json').write_text(json.dumps({'win': clf_params, 'bid': reg_params}, indent=2))
+        print(board.groupby('model').head(5).drop(columns='params').to_string(index=False))
+        print('Selected:', {'win': clf_params, 'bid': reg_params})
+
+    artifacts = train_models(X, y_reg, y_clf, categorical_cols, numeric_cols, args.output,
+                             n_jobs=args.n_jobs, parallel=not args.sequential, timer=timer,
+                             clf_params=clf_params, reg_params=reg_params)
 
-    artifacts = train_models(X, y_reg, y_clf, categorical_cols, numeric_cols, args.output)
+    # Per-group state after the full history, so the API can fill rolling/lag features online
+    with timer.stage('feature store'):
+        if args.feature_store:
+            store = FeatureStore.load(args.feature_store)
+        else:
+            store = FeatureStore(group_cols=[c for c in ['ClientType', 'Location'] if c in df.columns])
+            store.update(df)
+        store.save(str(Path(args.output) / 'feature_store'))
+    artifacts['feature_store'] = Path(args.output) / 'feature_store'
+    # The macro values training joined, for the API to attach to requests
+    macro.save(str(Path(args.output) / 'macro'))
+    artifacts['macro'] = Path(args.output) / 'macro'
     print('Training complete. Artifacts:', artifacts)
+    print('Wall-clock time per stage:')
+    print(timer.report())
 
 
 if __name__ == '__main__':
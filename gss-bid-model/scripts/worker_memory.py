@@ -0,0 +1,146 @@
+"""Memory per worker: ``uvicorn --workers N`` against the pre-fork launcher (gss_common.prefork).
+
+Each app is started with each --workers count under both launchers, on models fitted
+to save_sample_data samples (as in load_test.py). It is driven at --concurrency for
+--duration seconds over fresh connections, so every worker serves traffic and touches
+its models. Then each process of the server is read from /proc/<pid>/smaps_rollup:
+
+  rss_mb   resident pages, including pages shared with the other workers
+  pss_mb   shared pages divided among the processes mapping them; sums to the total
+  uss_mb   pages private to the process (what killing it would free)
+
+Summed PSS is the memory the server uses. Under uvicorn, every worker imports the app
+and loads its own copy of the artifacts. Under the pre-fork launcher the parent loads
+them once and the workers share those pages, so a worker's USS is what it costs on top
+of the first. The summary gives, per app and worker count, total PSS and mean worker
+USS for both launchers, the saving, and the throughput reached while measuring.
+
+Linux only (/proc/<pid>/smaps_rollup).
+
+Usage:
+    python scripts/worker_memory.py --workers 1 2 4 --output benchmarks/worker_memory.json
+    python scripts/worker_memory.py --app gss --workers 4 --duration 5
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.benchmark import process_memory, process_tree, save_results
+from src.loadgen import run_level
+from scripts.load_test import APPS, prepare_apps, request_mix, uvicorn_server
+from scripts.benchmark_suite import REPO
+
+LAUNCHERS = ('uvicorn', 'prefork')
+
+
+async def wait_all_ready(url: str, workers: int, timeout: float = 300.0):
+    """Poll /ready on fresh connections until it answers 200 several times in a row, i.e. from every worker."""
+    needed, streak = 4 * workers, 0
+    deadline = time.monotonic() + timeout
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=10.0) as client:
+        while streak < needed:
+            r = await client.get('/ready')
+            streak = streak + 1 if r.status_code in (200, 404) else 0
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'{url} workers not ready within {timeout:.0f} s: {r.text}')
+            if not streak:
+                await asyncio.sleep(0.05)
+
+
+async def drive(url: str, spec: dict, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        return await run_level(client, request_mix(spec, args), args.concurrency, args.duration)
+
+
+def measure_server(name: str, spec: dict, launcher: str, workers: int, args) -> dict:
+    with uvicorn_server(spec, workers, launcher=launcher) as (url, pid):
+        asyncio.run(wait_all_ready(url, workers))
+        level = asyncio.run(drive(url, spec, args))
+        pids = process_tree(pid)
+        memory = {p: process_memory(p) for p in pids}
+    if any(m is None for m in memory.values()):
+        raise RuntimeError(f'{name}/{launcher}: could not read process memory (needs /proc/<pid>/smaps_rollup)')
+    # uvicorn --workers 1 serves from the process it was started as, with no supervisor
+    parent = memory[pids[0]] if len(pids) > 1 else dict.fromkeys(memory[pids[0]], 0.0)
+    children = [memory[p] for p in pids[1:]] or [memory[pids[0]]]
+    row = {'name': f'{name}/{launcher}/w{workers}', 'scale': workers, 'app': name, 'launcher': launcher,
+           'workers': workers, 'processes': len(pids), 'throughput_rps': level.get('throughput_rps'),
+           'error_rate': level['error_rate']}
+    for m in ('rss_mb', 'pss_mb', 'uss_mb'):
+        row[f'total_{m}'] = parent[m] + sum(c[m] for c in children)
+        row[f'parent_{m}'] = parent[m]
+        row[f'worker_{m}'] = float(np.mean([c[m] for c in children]))
+    return row
+
+
+def main():
+    default_deployment = REPO / 'deployment' / 'models' / 'model_metadata.joblib'
+    if not default_deployment.exists():
+        default_deployment = REPO / 'GSS Bid Models' / 'models' / 'model_metadata.joblib'
+    parser = argparse.ArgumentParser(description='Compare per-worker memory of uvicorn --workers and the pre-fork '
+                                                 'launcher')
+    parser.add_argument('--app', nargs='*', choices=APPS, default=list(APPS))
+    parser.add_argument('--workers', nargs='*', type=int, default=[1, 2, 4])
+    parser.add_argument('--launcher', nargs='*', choices=LAUNCHERS, default=list(LAUNCHERS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of traffic before measuring')
+    parser.add_argument('--mix', nargs='*', default=['predict=0.5', 'optimize=0.5'], help='request kinds as kind=weight')
+    parser.add_argument('--repeat-frac', type=float, default=0.0)
+    parser.add_argument('--hot-set', type=int, default=32)
+    parser.add_argument('--bodies', type=int, default=5_000)
+    parser.add_argument('--train-rows', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--deployment-model-dir', help='deployment/app.py models (default: a classifier fitted to '
+                                                       '--deployment-metadata)')
+    parser.add_argument('--deployment-metadata', default=str(default_deployment))
+    parser.add_argument('--output', default='benchmarks/worker_memory.json')
+    args = parser.parse_args()
+    args.mix = {k: float(w) for k, w in (item.split('=') for item in args.mix)}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        apps = prepare_apps(args, Path(tmp))
+        for name, spec in apps.items():
+            for workers in args.workers:
+                for launcher in args.launcher:
+                    row = measure_server(name, spec, launcher, workers, args)
+                    print(f"{row['name']:<24} total RSS {row['total_rss_mb']:7.0f}  PSS {row['total_pss_mb']:7.0f} MB"
+                          f"  | per worker RSS {row['worker_rss_mb']:6.0f}  PSS {row['worker_pss_mb']:6.0f}"
+                          f"  USS {row['worker_uss_mb']:6.0f} MB  | parent RSS {row['parent_rss_mb']:5.0f} MB"
+                          f"  | {row['throughput_rps'] or 0:7.1f} req/s  errors {row['error_rate']:.2%}")
+                    results.append(row)
+
+    summary = []
+    by_key = {(r['app'], r['workers'], r['launcher']): r for r in results}
+    print()
+    for (name, workers, launcher), row in by_key.items():
+        base = by_key.get((name, workers, 'uvicorn'))
+        if launcher != 'prefork' or base is None:
+            continue
+        s = {'app': name, 'workers': workers,
+             'uvicorn_total_pss_mb': base['total_pss_mb'], 'prefork_total_pss_mb': row['total_pss_mb'],
+             'uvicorn_worker_uss_mb': base['worker_uss_mb'], 'prefork_worker_uss_mb': row['worker_uss_mb'],
+             'pss_saving': 1 - row['total_pss_mb'] / base['total_pss_mb'],
+             'throughput_ratio': (row['throughput_rps'] / base['throughput_rps']
+                                  if row['throughput_rps'] and base['throughput_rps'] else None)}
+        summary.append(s)
+        print(f"{name:<11} workers={workers}  total PSS {s['uvicorn_total_pss_mb']:6.0f} -> "
+              f"{s['prefork_total_pss_mb']:6.0f} MB ({s['pss_saving']:+.0%} saved)  worker USS "
+              f"{s['uvicorn_worker_uss_mb']:5.0f} -> {s['prefork_worker_uss_mb']:5.0f} MB"
+              + (f"  throughput x{s['throughput_ratio']:.2f}" if s['throughput_ratio'] else ''))
+
+    config = {k: v for k, v in vars(args).items() if k != 'output'}
+    print('Results written to', save_results(args.output, results, config, summary=summary))
+
+
+if __name__ == '__main__':
+    main()
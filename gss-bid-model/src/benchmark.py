@@ -0,0 +1,215 @@
+"""Latency/throughput/memory measurement and result files for the benchmark scripts.
+
+``measure`` calls a function repeatedly and records each call's wall-clock time and the
+process' peak resident set size while it runs; ``summarize`` turns the latencies into
+p50/p95/p99 and throughput. Results are saved as JSON together with the commit, library
+versions and hardware they were measured on, and ``compare`` lines two such files up
+case by case to flag regressions.
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size in bytes from /proc (None where unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss() -> int:
+    """The process' lifetime peak RSS in bytes (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class PeakRSS:
+    """Highest RSS seen while the block runs, sampled from a background thread.
+
+    Falls back to the lifetime peak (``ru_maxrss``) where /proc is not available, which
+    can only overstate a case that follows a larger one.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss() or 0)
+
+    def __enter__(self):
+        self.peak = _current_rss() or 0
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        rss = _current_rss()
+        self.peak = max(self.peak, rss) if rss is not None else _max_rss()
+        return False
+
+
+def process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """RSS, PSS and USS of a process in MB, from /proc/<pid>/smaps_rollup (Linux 4.14+).
+
+    RSS counts every resident page, also those shared with other processes; PSS divides
+    each shared page among the processes mapping it, so PSS adds up across processes to
+    the memory they use together; USS is the pages only this process maps. None where
+    unavailable or the process is gone.
+    """
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == 'kB':
+                    fields[key] = int(parts[0])
+    except (OSError, ValueError):
+        return None
+    if 'Rss' not in fields:
+        return None
+    return {'rss_mb': fields['Rss'] / 1024, 'pss_mb': fields.get('Pss', 0) / 1024,
+            'uss_mb': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024}
+
+
+def process_tree(pid: int) -> List[int]:
+    """``pid`` and its live descendants, parents first (Linux /proc)."""
+    children = {}
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            # the command name may contain spaces and parentheses; the ppid follows the last ')'
+            ppid = int(stat.read_text().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(stat.parent.name))
+    tree, queue = [], [pid]
+    while queue:
+        p = queue.pop(0)
+        tree.append(p)
+        queue.extend(sorted(children.get(p, [])))
+    return tree
+
+
+def summarize(latencies, items_per_call: int = 1) -> Dict[str, float]:
+    """p50/p95/p99/mean/max latency in ms and throughput for per-call ``latencies`` in seconds.
+
+    ``items_per_call`` is the rows (or requests) each call handles, for ``items_per_s``.
+    """
+    lat = np.asarray(latencies, dtype=float)
+    total = float(lat.sum())
+    out = {f'p{q}_ms': float(np.percentile(lat, q)) * 1e3 for q in PERCENTILES}
+    out.update({
+        'mean_ms': float(lat.mean()) * 1e3,
+        'max_ms': float(lat.max()) * 1e3,
+        'calls': int(len(lat)),
+        'calls_per_s': len(lat) / total if total > 0 else float('inf'),
+        'items_per_s': len(lat) * items_per_call / total if total > 0 else float('inf'),
+    })
+    return out
+
+
+def measure(fn: Callable, args_iter: Callable[[int], tuple], iterations: int, warmup: int = 0,
+            items_per_call: int = 1) -> Dict[str, float]:
+    """Time ``iterations`` calls of ``fn(*args_iter(i))`` after ``warmup`` untimed ones.
+
+    Argument construction is outside the timed region. Returns ``summarize`` plus
+    ``peak_rss_mb``.
+    """
+    for i in range(warmup):
+        fn(*args_iter(i))
+    latencies = np.empty(iterations)
+    with PeakRSS() as rss:
+        for i in range(iterations):
+            args = args_iter(i)
+            start = time.perf_counter()
+            fn(*args)
+            latencies[i] = time.perf_counter() - start
+    out = summarize(latencies, items_per_call)
+    out['peak_rss_mb'] = rss.peak / 2**20
+    return out
+
+
+def environment() -> Dict[str, object]:
+    """Commit, interpreter, library versions and hardware the numbers were measured on."""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, timeout=10,
+                                  cwd=Path(__file__).resolve().parent).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    versions = {}
+    for name in ('numpy', 'pandas', 'sklearn', 'xgboost', 'pyarrow', 'fastapi'):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or None,
+        'cpu_count': os.cpu_count(),
+        'versions': versions,
+    }
+
+
+def save_results(path: str, results: List[dict], config: dict = None, **sections) -> Path:
+    """Write ``results`` with the environment, ``config`` and any extra top-level ``sections``."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    doc = {'environment': environment(), 'config': config or {}, 'results': results, **sections}
+    p.write_text(json.dumps(doc, indent=2, default=str))
+    return p
+
+
+def load_results(path: str) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def _key(result: dict) -> tuple:
+    return result['name'], result.get('scale')
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1,
+            metrics=('p50_ms', 'p95_ms', 'p99_ms')) -> List[dict]:
+    """Per-case ratio current/baseline of each latency metric, plus throughput and peak RSS.
+
+    A case is a ``regression`` when any of ``metrics`` grew by more than ``threshold``
+    (0.1 = 10%). Cases present in only one file are skipped.
+    """
+    base = {_key(r): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        b = base.get(_key(r))
+        if b is None:
+            continue
+        row = {'name': r['name'], 'scale': r.get('scale')}
+        for m in metrics + ('items_per_s', 'peak_rss_mb'):
+            if m in r and m in b and b[m]:
+                row[m] = r[m] / b[m]
+        row['regression'] = any(row.get(m, 1.0) > 1 + threshold for m in metrics)
+        rows.append(row)
+    return rows
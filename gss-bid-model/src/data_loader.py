@@ -1,3 +1,5 @@
+import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -14,12 +16,202 @@ def load_csv(path: str) -> pd.DataFrame:
     return df
 
 
-def save_sample_data(path: str, n=500):
-    """Create a small sample dataset for testing/demonstration."""
+# Column types for the bid history. Categories keep the repeated strings as small integer
+# codes and float32 halves the numeric columns; CompetitorCount is float so missing counts
+# survive. Columns not listed here keep pandas' inferred type.
+DTYPES = {
+    'ProjectType': 'category',
+    'Location': 'category',
+    'ClientType': 'category',
+    'BidAmount': 'float32',
+    'EstimatedCost': 'float32',
+    'CompetitorCount': 'float32',
+    'WinStatus': 'int8',
+}
+CACHE_VERSION = 1
+
+
+def read_csv_chunks(path: str, chunksize: int = 500_000, columns=None):
+    """Yield the CSV in typed chunks (``DTYPES``, BidDate parsed), never holding the whole file as text."""
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Data file not found: {path}")
+    header = pd.read_csv(p, nrows=0).columns
+    dtypes = {c: t for c, t in DTYPES.items() if c in header}
+    for chunk in pd.read_csv(p, chunksize=chunksize, usecols=columns, dtype=dtypes):
+        if 'BidDate' in chunk.columns:
+            chunk['BidDate'] = pd.to_datetime(chunk['BidDate'])
+        yield chunk
+
+
+def _source_stamp(p: Path) -> dict:
+    stat = p.stat()
+    return {'source': str(p.resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': CACHE_VERSION}
+
+
+def _arrow_schema(chunk: pd.DataFrame):
+    """One schema for every chunk: categories stored as plain strings, other columns widened."""
+    import pyarrow as pa
+    fields = []
+    for c in chunk.columns:
+        t = DTYPES.get(c)
+        if c == 'BidDate':
+            fields.append(pa.field(c, pa.timestamp('ns')))
+        elif t == 'category' or not pd.api.types.is_numeric_dtype(chunk[c]):
+            fields.append(pa.field(c, pa.string()))
+        elif t is not None:
+            fields.append(pa.field(c, pa.from_numpy_dtype(pd.api.types.pandas_dtype(t))))
+        else:
+            # inferred types can differ between chunks (int vs float once a value is missing)
+            fields.append(pa.field(c, pa.float64()))
+    return pa.schema(fields)
+
+
+def build_cache(path: str, cache_dir: str, chunksize: int = 500_000) -> dict:
+    """Convert the CSV into Feather partitions by BidDate month under ``cache_dir``.
+
+    Each chunk is split by month and written as ``month=YYYY-MM/part-NNNNN.feather``
+    (uncompressed Arrow IPC, so reads can memory-map it). ``manifest.json`` records the
+    source file's size and mtime, the schema, and each partition's rows and date range.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import shutil
+
+    p, out = Path(path), Path(cache_dir)
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+    schema, partitions, rows = None, {}, 0
+    for i, chunk in enumerate(read_csv_chunks(str(p), chunksize)):
+        if schema is None:
+            schema = _arrow_schema(chunk)
+        if 'BidDate' in chunk.columns:
+            months = chunk['BidDate'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+        else:
+            months = np.full(len(chunk), np.datetime64('NaT', 'M'))
+        for key, part in chunk.groupby(months, sort=False, dropna=False):
+            month = 'none' if pd.isna(key) else pd.Timestamp(key).strftime('%Y-%m')
+            part_dir = out / f'month={month}'
+            part_dir.mkdir(exist_ok=True)
+            table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+            feather.write_feather(table, part_dir / f'part-{i:05d}.feather', compression='uncompressed')
+            info = partitions.setdefault(month, {'rows': 0, 'min': None, 'max': None})
+            info['rows'] += len(part)
+            if 'BidDate' in part.columns and part['BidDate'].notna().any():
+                lo, hi = part['BidDate'].min(), part['BidDate'].max()
+                info['min'] = str(lo if info['min'] is None else min(lo, pd.Timestamp(info['min'])))
+                info['max'] = str(hi if info['max'] is None else max(hi, pd.Timestamp(info['max'])))
+        rows += len(chunk)
+    manifest = dict(_source_stamp(p), rows=rows, columns=[] if schema is None else schema.names,
+                    partitions=partitions)
+    (out / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def _cache_manifest(path: str, cache_dir: str) -> dict:
+    """The cache manifest if it was built from the current version of ``path``, else None."""
+    m = Path(cache_dir) / 'manifest.json'
+    if not m.exists():
+        return None
+    manifest = json.loads(m.read_text())
+    stamp = _source_stamp(Path(path))
+    return manifest if all(manifest.get(k) == v for k, v in stamp.items()) else None
+
+
+def default_cache_dir(path: str) -> str:
+    p = Path(path)
+    return str(p.parent / 'cache' / p.stem)
+
+
+def load_bid_history(path: str, columns=None, start=None, end=None, cache_dir: str = None,
+                     chunksize: int = 500_000) -> pd.DataFrame:
+    """Typed bid history, read through a columnar cache of the CSV.
+
+    The first call converts the CSV in chunks (``build_cache``); later calls read only
+    the month partitions overlapping ``[start, end]`` and only ``columns`` (BidDate is
+    always included), memory-mapping the Feather files. The cache is rebuilt when the CSV
+    changes. Categorical columns come back as ``category``; rows are sorted by BidDate
+    like ``load_csv``.
+
+    Without pyarrow this falls back to the typed chunked CSV read, filtered the same way.
+    """
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Data file not found: {path}")
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.feather as feather
+    except ImportError:
+        print('Warning: pyarrow not installed; reading the CSV without a cache')
+        df = pd.concat(read_csv_chunks(path, chunksize), ignore_index=True)
+        return _select(df, columns, start, end)
+
+    cache_dir = cache_dir or default_cache_dir(path)
+    manifest = _cache_manifest(path, cache_dir) or build_cache(path, cache_dir, chunksize)
+    has_date = 'BidDate' in manifest['columns']
+    read_cols = None
+    if columns is not None:
+        read_cols = [c for c in manifest['columns'] if c in columns or (c == 'BidDate' and has_date)]
+
+    tables = []
+    for month, info in sorted(manifest['partitions'].items()):
+        if (start is not None or end is not None) and (info['min'] is None
+                or start is not None and pd.Timestamp(info['max']) < start
+                or end is not None and pd.Timestamp(info['min']) > end):
+            continue
+        for f in sorted((Path(cache_dir) / f'month={month}').glob('*.feather')):
+            table = feather.read_table(f, columns=read_cols, memory_map=True)
+            if has_date and start is not None:
+                table = table.filter(pc.greater_equal(table['BidDate'], pa.scalar(start.value, pa.timestamp('ns'))))
+            if has_date and end is not None:
+                table = table.filter(pc.less_equal(table['BidDate'], pa.scalar(end.value, pa.timestamp('ns'))))
+            tables.append(table)
+    if not tables:
+        return _select(next(read_csv_chunks(path, 1)).iloc[:0], columns, None, None)
+
+    table = pa.concat_tables(tables)
+    for c in table.column_names:
+        if DTYPES.get(c) == 'category':
+            # one dictionary over all partitions, so pandas gets a single set of categories
+            table = table.set_column(table.column_names.index(c), c, table[c].combine_chunks().dictionary_encode())
+    df = table.to_pandas()
+    for c, t in DTYPES.items():
+        if c in df.columns:
+            df[c] = df[c].cat.reorder_categories(sorted(df[c].cat.categories)) if t == 'category' else df[c].astype(t)
+    if has_date:
+        df = df.sort_values('BidDate', kind='stable').reset_index(drop=True)
+    return df
+
+
+def _select(df: pd.DataFrame, columns, start, end) -> pd.DataFrame:
+    if 'BidDate' in df.columns:
+        if start is not None:
+            df = df[df['BidDate'] >= start]
+        if end is not None:
+            df = df[df['BidDate'] <= end]
+        df = df.sort_values('BidDate', kind='stable')
+    if columns is not None:
+        df = df[[c for c in df.columns if c in columns or c == 'BidDate']]
+    return df.reset_index(drop=True)
+
+
+def save_sample_data(path: str, n=500, days=3 * 365, seed=None):
+    """Create a sample dataset for testing/demonstration.
+
+    One bid per day from 2023-01-01 up to ``days`` rows; larger samples spread the rows
+    evenly (still in date order) over those ``days`` days, so any ``n`` stays within the
+    Timestamp range. ``seed`` makes the sample reproducible.
+    """
     import numpy as np
     import pandas as pd
+    if seed is not None:
+        np.random.seed(seed)
     start = pd.Timestamp('2023-01-01')
-    dates = pd.date_range(start=start, periods=n, freq='D')
+    offsets = np.arange(n) if n <= days else np.arange(n) * days // n
+    dates = start + pd.to_timedelta(offsets, unit='D')
     project_types = ['Commercial', 'Residential', 'Industrial']
     locations = ['NY', 'LA', 'CHI']
     client_types = ['Government', 'Private']
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
-from typing import List, Optional
+from typing import List, Sequence
+from src.macro_features import MacroFeatures
 
 
 def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -12,18 +13,74 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def time_window_means(dates: np.ndarray, values: np.ndarray, windows_ns: List[int], start: int = 0,
+                      exclude_current: Sequence[bool] = ()) -> np.ndarray:
+    """Trailing time-window means for one group's rows, in date order.
+
+    ``dates`` are int64 nanoseconds and ``values`` an (n, k) float array. Row i's window
+    holds the rows j <= i with ``dates[j] > dates[i] - w`` (pandas' ``rolling('wD')``
+    with ``closed='right'``); NaNs are skipped. Columns flagged in ``exclude_current``
+    (a label such as WinStatus) use the rows j < i only, so a row never sees its own
+    value; this is ``closed='left'`` except that earlier rows on the same date count.
+    Returns (len(windows_ns), n - start, k) for rows ``start`` onwards: one cumulative
+    sum, one searchsorted per window.
+    """
+    dates = np.maximum.accumulate(dates)  # rows arriving out of order count as the latest date seen
+    valid = ~np.isnan(values)
+    csum = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    ccount = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)])
+    end = np.arange(start + 1, len(dates) + 1)
+    # an excluded column's window drops the row itself: its own value comes off the sums
+    excluded = np.zeros(values.shape[1], dtype=bool)
+    excluded[np.flatnonzero(exclude_current)] = True
+    own_sum = np.where(valid[start:] & excluded, values[start:], 0.0)
+    own_count = valid[start:] & excluded
+    out = np.empty((len(windows_ns), len(end), values.shape[1]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, w in enumerate(windows_ns):
+            lo = np.searchsorted(dates, dates[start:] - w, side='right')
+            count = ccount[end] - ccount[lo] - own_count
+            # an empty window is NaN even when taking off the own value leaves rounding residue
+            out[i] = np.where(count > 0, (csum[end] - csum[lo] - own_sum) / count, np.nan)
+    return out
+
+
 def add_rolling_group_features(df: pd.DataFrame, group_cols: List[str], target_col: str, windows: List[int]) -> pd.DataFrame:
-    df = df.copy()
-    df = df.sort_values('BidDate')
+    """Per-group mean of ``target_col`` (and WinStatus win rate) over the trailing ``w`` days of BidDate.
+
+    Both cover only the bids before the row (in date order), never the row itself: its
+    WinStatus is the win model's label and its ``target_col`` the bid regressor's, and
+    neither is known when a request is served (see src.online_features).
+
+    Rows are sorted by BidDate once (stably, so ties keep their order); each group is
+    then handled in a single pass over its rows for all windows and both targets (see
+    ``time_window_means``).
+    """
+    df = df.sort_values('BidDate', kind='stable')
+    dates = df['BidDate'].to_numpy(dtype='datetime64[ns]').view('int64')
+    cols = [target_col] + (['WinStatus'] if 'WinStatus' in df.columns else [])
+    values = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) for c in cols])
+    windows_ns = [pd.Timedelta(days=w).value for w in windows]
+
+    features = {}
     for g in group_cols:
-        for w in windows:
-            col_name_mean = f'{g}_rolling_{w}d_mean_{target_col}'
-            col_name_win = f'{g}_rolling_{w}d_winrate'
-            # Calculate rolling mean per group by reindexing with date
-            df[col_name_mean] = df.groupby(g)[target_col].rolling(window=w, min_periods=1).mean().reset_index(level=0, drop=True)
+        # rows of each group made contiguous (date order kept), scored per slice, scattered back once
+        codes = pd.factorize(df[g])[0]
+        order = np.argsort(codes, kind='stable')
+        missing = np.count_nonzero(codes < 0)  # rows without a group value sort first and stay NaN
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0]))]) + missing
+        d, v = dates[order], values[order]
+        grouped = np.empty((len(windows), len(df), len(cols)))
+        grouped[:, :missing] = np.nan
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            grouped[:, a:b] = time_window_means(d[a:b], v[a:b], windows_ns, exclude_current=[True] * len(cols))
+        means = np.empty_like(grouped)
+        means[:, order] = grouped
+        for i, w in enumerate(windows):
+            features[f'{g}_rolling_{w}d_mean_{target_col}'] = means[i, :, 0]
             if 'WinStatus' in df.columns:
-                df[col_name_win] = df.groupby(g)['WinStatus'].rolling(window=w, min_periods=1).mean().reset_index(level=0, drop=True)
-    return df
+                features[f'{g}_rolling_{w}d_winrate'] = means[i, :, 1]
+    return pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
 
 
 def add_lag_features(df: pd.DataFrame, group_cols: List[str], cols_to_lag: List[str], lags: List[int]) -> pd.DataFrame:
@@ -32,17 +89,18 @@ def add_lag_features(df: pd.DataFrame, group_cols: List[str], cols_to_lag: List[
         for lag in lags:
             for c in cols_to_lag:
                 name = f'{g}_lag_{lag}_{c}'
-                df[name] = df.groupby(g)[c].shift(lag)
+                df[name] = df.groupby(g, observed=True)[c].shift(lag)
     return df
 
 
-def merge_fred(df: pd.DataFrame, fred_df: Optional[pd.DataFrame], date_col: str = 'BidDate') -> pd.DataFrame:
-    if fred_df is None or fred_df.empty:
+def merge_fred(df: pd.DataFrame, fred_df, date_col: str = 'BidDate') -> pd.DataFrame:
+    """Backward as-of join of macro series onto ``df``, keeping its rows, order and index.
+
+    ``fred_df`` is a date-indexed DataFrame, a ``FredCache`` or an already compiled
+    ``MacroFeatures``; each series contributes its latest value on or before the row's date.
+    """
+    if fred_df is None:
         return df
-    fred_df = fred_df.copy()
-    fred_df.index = pd.to_datetime(fred_df.index)
-    fred_df = fred_df.reset_index().rename(columns={'index': date_col})
-    fred_df[date_col] = pd.to_datetime(fred_df[date_col])
-    # Merge on nearest previous date (as economic indicators are lower frequency)
-    df = pd.merge_asof(df.sort_values(date_col), fred_df.sort_values(date_col), on=date_col, direction='backward')
-    return df
+    if not isinstance(fred_df, MacroFeatures):
+        fred_df = MacroFeatures.from_cache(fred_df) if hasattr(fred_df, 'frame') else MacroFeatures.from_frame(fred_df)
+    return fred_df.join(df, date_col)
@@ -0,0 +1,181 @@
+"""Incremental per-group rolling and lag features.
+
+``FeatureStore`` produces the same ``{group}_rolling_{w}d_mean_BidAmount``,
+``{group}_rolling_{w}d_winrate`` and ``{group}_lag_{n}_{col}`` columns as
+``add_rolling_group_features`` + ``add_lag_features``, without recomputing history.
+For every (group column, group value) it keeps the recent rows (BidDate, BidAmount,
+WinStatus) that a future row can still need: those inside the longest time window of
+the latest date seen, and at least as many as the longest lag. New rows are scored
+against that history with the same kernel as the batch features
+(``time_window_means``) and then appended, so an update costs O(new rows) plus
+O(retained history) per group touched.
+
+Rows are taken in the order they arrive, sorted by BidDate within each update, which
+matches a full recompute as long as each update is newer than what the store has
+seen. The state is saved as .npy arrays plus a JSON manifest, like the fee table.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from src.feature_engineering import time_window_means
+
+
+GROUP_COLS = ['ClientType', 'Location']
+WINDOWS = [7, 30, 90]
+LAGS = [1, 2]
+VALUE_COLS = ['BidAmount', 'WinStatus']
+
+
+class FeatureStore:
+    def __init__(self, group_cols: Sequence[str] = GROUP_COLS, windows: Sequence[int] = WINDOWS,
+                 lags: Sequence[int] = LAGS):
+        self.group_cols = list(group_cols)
+        self.windows = [int(w) for w in windows]
+        self.windows_ns = [pd.Timedelta(days=w).value for w in self.windows]
+        self.lags = [int(n) for n in lags]
+        self.rows_seen = 0
+        self.meta = {}
+        # (group column, group value) -> (int64 ns dates, (m, len(VALUE_COLS)) values), oldest first
+        self._history = {}
+
+    def feature_columns(self, group_cols: Sequence[str] = None, with_winrate: bool = True) -> List[str]:
+        """Column names in the order prepare_features adds them."""
+        group_cols = self.group_cols if group_cols is None else group_cols
+        cols = []
+        for g in group_cols:
+            for w in self.windows:
+                cols.append(f'{g}_rolling_{w}d_mean_BidAmount')
+                if with_winrate:
+                    cols.append(f'{g}_rolling_{w}d_winrate')
+        for g in group_cols:
+            for lag in self.lags:
+                cols += [f'{g}_lag_{lag}_{c}' for c in VALUE_COLS]
+        return cols
+
+    def groups(self) -> list:
+        """(group column, group value) pairs with state."""
+        return list(self._history)
+
+    def history(self, g: str, key) -> Tuple[np.ndarray, np.ndarray]:
+        """Retained (dates, values) for one group, oldest first."""
+        return self._history.get((g, key), (np.empty(0, dtype=np.int64), np.empty((0, len(VALUE_COLS)))))
+
+    def _retain(self, g: str, key, dates: np.ndarray, values: np.ndarray):
+        """Keep the rows a later row can still reach through a window or a lag."""
+        latest = dates.max()
+        first = np.searchsorted(np.maximum.accumulate(dates), latest - max(self.windows_ns), side='right')
+        first = max(min(first, len(dates) - max(self.lags)), 0)
+        self._history[(g, key)] = (dates[first:].copy(), values[first:].copy())
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Features for new rows (indexed like ``df``), then fold the rows into the state.
+
+        ``df`` needs BidDate, the group columns and BidAmount; WinStatus may be absent,
+        in which case no winrate columns are produced, as in add_rolling_group_features.
+        """
+        group_cols = [g for g in self.group_cols if g in df.columns]
+        with_winrate = 'WinStatus' in df.columns
+        columns = self.feature_columns(group_cols, with_winrate)
+        new = df.sort_values('BidDate', kind='stable')
+        dates = new['BidDate'].to_numpy(dtype='datetime64[ns]').view('int64')
+        values = np.column_stack([
+            pd.to_numeric(new[c], errors='coerce').to_numpy(dtype=float) if c in new.columns else np.full(len(new), np.nan)
+            for c in VALUE_COLS
+        ])
+        out = {c: np.full(len(new), np.nan) for c in columns}
+
+        for g in group_cols:
+            for key, idx in new.groupby(g, sort=False, observed=True).indices.items():
+                hist_dates, hist_values = self.history(g, key)
+                h = len(hist_dates)
+                group_dates = np.concatenate([hist_dates, dates[idx]])
+                group_values = np.vstack([hist_values, values[idx]])
+                means = time_window_means(group_dates, group_values, self.windows_ns, start=h,
+                                          exclude_current=[True] * len(VALUE_COLS))
+                for i, w in enumerate(self.windows):
+                    out[f'{g}_rolling_{w}d_mean_BidAmount'][idx] = means[i, :, 0]
+                    if with_winrate:
+                        out[f'{g}_rolling_{w}d_winrate'][idx] = means[i, :, 1]
+                pos = np.arange(h, h + len(idx))
+                for lag in self.lags:
+                    src = pos - lag
+                    lagged = np.where((src >= 0)[:, None], group_values[np.maximum(src, 0)], np.nan)
+                    for j, c in enumerate(VALUE_COLS):
+                        out[f'{g}_lag_{lag}_{c}'][idx] = lagged[:, j]
+                self._retain(g, key, group_dates, group_values)
+
+        self.rows_seen += len(new)
+        return pd.DataFrame(out, index=new.index, columns=columns).reindex(df.index)
+
+    def save(self, path: str):
+        p = Path(path)
+        p.mkdir(parents=True, exist_ok=True)
+        keys = self.groups()
+        sizes = [len(self._history[k][0]) for k in keys]
+        np.save(p / 'dates.npy', np.concatenate([self._history[k][0] for k in keys] or [np.empty(0, dtype=np.int64)]))
+        np.save(p / 'values.npy', np.concatenate([self._history[k][1] for k in keys] or [np.empty((0, len(VALUE_COLS)))]))
+        np.save(p / 'offsets.npy', np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64))
+        manifest = {
+            'group_cols': self.group_cols,
+            'windows': self.windows,
+            'lags': self.lags,
+            'rows_seen': self.rows_seen,
+            'keys': [[g, key] for g, key in keys],
+            'meta': self.meta,
+        }
+        (p / 'manifest.json').write_text(json.dumps(manifest, indent=2, default=str))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> 'FeatureStore':
+        """Load saved state; ``mmap=True`` maps the arrays read-only so workers share the pages."""
+        p = Path(path)
+        manifest = json.loads((p / 'manifest.json').read_text())
+        store = cls(manifest['group_cols'], manifest['windows'], manifest['lags'])
+        store.rows_seen = manifest['rows_seen']
+        store.meta = manifest.get('meta', {})
+        mode = 'r' if mmap else None
+        dates, values = np.load(p / 'dates.npy', mmap_mode=mode), np.load(p / 'values.npy', mmap_mode=mode)
+        offsets = np.load(p / 'offsets.npy')
+        for i, (g, key) in enumerate(manifest['keys']):
+            store._history[(g, key)] = (dates[offsets[i]:offsets[i + 1]], values[offsets[i]:offsets[i + 1]])
+        return store
+
+
+def _fingerprint(df: pd.DataFrame, columns: List[str]) -> str:
+    cols = [c for c in columns if c in df.columns]
+    return hashlib.sha256(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes()).hexdigest()
+
+
+def append_features(df: pd.DataFrame, path: str, **store_kwargs) -> pd.DataFrame:
+    """Rolling and lag features for every row of ``df``, computing only rows added since the last run.
+
+    ``df`` is the full history in file order. The store at ``path`` remembers how many
+    rows it has ingested and a fingerprint of them, plus their features; if ``df`` still
+    starts with exactly those rows only the tail is computed, otherwise the store is
+    rebuilt from scratch.
+    """
+    p = Path(path)
+    store, previous = None, None
+    if (p / 'manifest.json').exists() and (p / 'features.pkl').exists():
+        store = FeatureStore.load(str(p))
+        n = store.rows_seen
+        key_cols = ['BidDate'] + store.group_cols + VALUE_COLS
+        if n > len(df) or store.meta.get('fingerprint') != _fingerprint(df.iloc[:n], key_cols):
+            store = None
+        else:
+            previous = pd.read_pickle(p / 'features.pkl')
+            previous.index = df.index[:n]
+    if store is None:
+        store = FeatureStore(**store_kwargs)
+        previous = None
+
+    n = store.rows_seen
+    new = store.update(df.iloc[n:])
+    features = new if previous is None else pd.concat([previous, new])
+    store.meta['fingerprint'] = _fingerprint(df, ['BidDate'] + store.group_cols + VALUE_COLS)
+    store.save(str(p))
+    features.reset_index(drop=True).to_pickle(p / 'features.pkl')
+    return features
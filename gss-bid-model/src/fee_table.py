@@ -0,0 +1,180 @@
+"""Precomputed P(win) curves per cell so /optimize can answer without a model call.
+
+A cell is a segment (ProjectType x Location x ClientType) and a CompetitorCount
+bucket. Bids are normalized by the opportunity's EstimatedCost, the scale the win
+model prices against: each cell's curve is P(win) over ratio = bid / EstimatedCost,
+scored once on a representative opportunity (the cell's medians) at
+bid = ratio * its EstimatedCost, with ratios spaced geometrically. A lookup divides
+the requested bids by the request's own EstimatedCost and interpolates linearly in
+log(ratio). The arrays are stored as .npy files and memory-mapped on load, so the
+table costs no heap per worker.
+
+The curve still ignores everything else about a request: the bid date, the rolling
+and lag group features and the macro series are those of the representative. The
+table is therefore an approximation. ``evaluate`` measures it against live scoring
+over the /optimize window of real rows, and scripts/build_fee_table.py stores that
+error, on rows held out from building the table, in the manifest. The API only
+serves a table whose stored p95 error is within ``MAX_P95_ERROR`` (``validated``);
+otherwise it scores live.
+"""
+import json
+from pathlib import Path
+from typing import Callable, List, Optional
+import numpy as np
+import pandas as pd
+from src.optimize import baseline_bid, bid_window, score_candidate_grid
+
+
+SEGMENT_COLS = ['ProjectType', 'Location', 'ClientType']
+COST_COL = 'EstimatedCost'
+BUCKET_COL = 'CompetitorCount'
+# CompetitorCount buckets: 1, 2, 3, 4-5, 6-9, 10+
+BUCKET_EDGES = (2, 3, 4, 6, 10)
+DEFAULT_RATIOS = np.geomspace(0.1, 10.0, 193)
+# largest p95 |table - live| P(win) on held-out rows at which a table is served
+MAX_P95_ERROR = 0.02
+
+
+class FeeTable:
+    def __init__(self, segment_cols: List[str], segments: List[tuple], ref_cost: np.ndarray, ratios: np.ndarray,
+                 p_win: np.ndarray, bucket_edges=BUCKET_EDGES, error: Optional[dict] = None):
+        self.segment_cols = list(segment_cols)
+        self.segments = [tuple(s) for s in segments]
+        self.ref_cost = ref_cost
+        self.ratios = ratios
+        self.log_ratios = np.log(np.asarray(ratios, dtype=float))
+        self.p_win = p_win
+        self.bucket_edges = tuple(bucket_edges)
+        self.error = error or {}
+        self._index = {s: i for i, s in enumerate(self.segments)}
+
+    def bucket(self, count) -> Optional[int]:
+        count = pd.to_numeric(count, errors='coerce')
+        return None if pd.isna(count) else int(np.searchsorted(self.bucket_edges, count, side='right'))
+
+    def cell_index(self, row) -> Optional[int]:
+        """Row of the table for an opportunity's segment and competitor bucket, or None if not seen in training."""
+        bucket = self.bucket(row.get(BUCKET_COL))
+        if bucket is None:
+            return None
+        return self._index.get(tuple(row.get(c) for c in self.segment_cols) + (bucket,))
+
+    def lookup(self, i: int, bids, cost: float) -> np.ndarray:
+        """Interpolated P(win) for cell ``i`` at absolute ``bids`` on an opportunity costing ``cost``."""
+        x = np.log(np.asarray(bids, dtype=float) / cost)
+        return np.interp(x, self.log_ratios, np.asarray(self.p_win[i], dtype=float))
+
+    def scorer(self, row, low: float, high: float) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+        """bids -> P(win) for the opportunity ``row`` over [low, high], or None when the table does not cover it."""
+        i = self.cell_index(row)
+        cost = pd.to_numeric(row.get(COST_COL), errors='coerce')
+        if i is None or pd.isna(cost) or cost <= 0:
+            return None
+        if not (self.ratios[0] * cost <= low and high <= self.ratios[-1] * cost):
+            return None
+        return lambda bids: self.lookup(i, bids, float(cost))
+
+    def validated(self, max_p95_abs: float = MAX_P95_ERROR) -> bool:
+        """The held-out error in ``error`` is within ``max_p95_abs``; a table without one is not."""
+        p95 = self.error.get('p95_abs')
+        return p95 is not None and p95 <= max_p95_abs
+
+    def save(self, path: str):
+        p = Path(path)
+        p.mkdir(parents=True, exist_ok=True)
+        np.save(p / 'p_win.npy', np.asarray(self.p_win, dtype=np.float32))
+        np.save(p / 'ref_cost.npy', np.asarray(self.ref_cost, dtype=np.float64))
+        np.save(p / 'ratios.npy', np.asarray(self.ratios, dtype=np.float64))
+        manifest = {
+            'segment_cols': self.segment_cols,
+            'cost_col': COST_COL,
+            'bucket_col': BUCKET_COL,
+            'bucket_edges': list(self.bucket_edges),
+            'segments': [list(s) for s in self.segments],
+            'error': self.error,
+        }
+        (p / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'FeeTable':
+        p = Path(path)
+        mode = 'r' if mmap else None
+        manifest = json.loads((p / 'manifest.json').read_text())
+        if 'bucket_edges' not in manifest:
+            raise ValueError(f'{p} is a fee table from an older version (keyed on segment only); rebuild it '
+                             f'with scripts/build_fee_table.py')
+        return cls(manifest['segment_cols'], manifest['segments'],
+                   np.load(p / 'ref_cost.npy', mmap_mode=mode), np.load(p / 'ratios.npy'),
+                   np.load(p / 'p_win.npy', mmap_mode=mode), manifest['bucket_edges'], manifest.get('error'))
+
+
+def _representatives(X: pd.DataFrame, cell_cols: List[str]) -> pd.DataFrame:
+    """One row per cell: numeric medians, first value of any other column."""
+    groups = X.groupby(cell_cols, sort=True, observed=True)
+    numeric = [c for c in X.select_dtypes('number').columns if c not in cell_cols]
+    reps = groups[numeric].median()
+    other = [c for c in X.columns if c not in numeric and c not in cell_cols]
+    if other:
+        reps = reps.join(groups[other].first())
+    return reps.reset_index()
+
+
+def build_fee_table(clf, X: pd.DataFrame, segment_cols: List[str] = SEGMENT_COLS, bid_col: str = 'BidAmount',
+                    ratios: np.ndarray = DEFAULT_RATIOS, bucket_edges=BUCKET_EDGES) -> FeeTable:
+    """Score every cell seen in ``X`` over ``ratios`` x its median EstimatedCost.
+
+    The table's ``error`` is left empty; measure it with ``evaluate`` on rows not
+    in ``X``.
+    """
+    segment_cols = [c for c in segment_cols if c in X.columns]
+    missing = [c for c in (COST_COL, BUCKET_COL) if c not in X.columns]
+    if not segment_cols or missing:
+        raise ValueError(f'X needs {COST_COL}, {BUCKET_COL} and at least one of {SEGMENT_COLS}')
+    edges = tuple(bucket_edges)
+    cost = pd.to_numeric(X[COST_COL], errors='coerce')
+    counts = pd.to_numeric(X[BUCKET_COL], errors='coerce')
+    keep = X[segment_cols].notna().all(axis=1) & counts.notna() & (cost > 0)
+    X = X[keep].assign(_bucket=np.searchsorted(edges, counts[keep].to_numpy(), side='right'))
+    cell_cols = segment_cols + ['_bucket']
+    reps = _representatives(X, cell_cols)
+    ref_cost = reps[COST_COL].to_numpy(dtype=float)
+    ratios = np.asarray(ratios, dtype=float)
+
+    p_win = score_candidate_grid(clf, reps.drop(columns='_bucket'), ref_cost[:, None] * ratios[None, :], bid_col)
+    segments = [tuple(r[:-1]) + (int(r[-1]),) for r in reps[cell_cols].itertuples(index=False)]
+    return FeeTable(segment_cols, segments, ref_cost, ratios, p_win.astype(np.float32), edges)
+
+
+def evaluate(table: FeeTable, clf, X: pd.DataFrame, pct_range: float = 0.2, n_steps: int = 41,
+             bid_col: str = 'BidAmount') -> dict:
+    """Table against live scoring on the real rows of ``X``, over each row's /optimize window.
+
+    ``max_abs``/``mean_abs``/``p95_abs`` are the P(win) errors over all candidates of
+    the covered rows; ``best_bid_rel_error`` is how far the table's best bid lands from
+    the live one, relative to the baseline bid. ``coverage`` is the fraction of rows
+    the table answers (the others fall back to live scoring).
+    """
+    covered, grids, table_p = [], [], []
+    for j, (_, row) in enumerate(X.iterrows()):
+        low, high = bid_window(baseline_bid(row), pct_range)
+        score = table.scorer(row, low, high)
+        if score is not None:
+            bids = np.linspace(low, high, n_steps)
+            covered.append(j)
+            grids.append(bids)
+            table_p.append(score(bids))
+    out = {'rows': int(len(X)), 'coverage': len(covered) / len(X) if len(X) else 0.0,
+           'pct_range': pct_range, 'n_steps': n_steps}
+    if not covered:
+        return out
+    grids, table_p = np.vstack(grids), np.vstack(table_p)
+    live_p = score_candidate_grid(clf, X.iloc[covered], grids, bid_col)
+    err = np.abs(table_p - live_p)
+    rows = np.arange(len(covered))
+    best_table = grids[rows, (table_p * grids).argmax(axis=1)]
+    best_live = grids[rows, (live_p * grids).argmax(axis=1)]
+    best_err = np.abs(best_table - best_live) / grids.mean(axis=1)
+    out.update({'max_abs': float(err.max()), 'mean_abs': float(err.mean()),
+                'p95_abs': float(np.percentile(err, 95)),
+                'best_bid_rel_error': {'mean': float(best_err.mean()), 'max': float(best_err.max())}})
+    return out
@@ -1,4 +1,20 @@
+"""FRED macro series: one-off fetches and a local multi-series cache.
+
+``FredCache`` keeps one file per series (``<SERIES>.npy``: a structured array of int64
+ns dates and float values, oldest first, so it can be memory-mapped) plus
+``manifest.json`` with each series' last observation date. ``refresh`` asks the
+backend only for observations after that date, several series at a time, retrying
+transient failures. A backend is any object with
+``get_series(series_id, start=None, end=None) -> pd.Series``: ``FredApiBackend`` wraps
+fredapi, ``FakeFredBackend`` generates deterministic series offline for training and
+tests (``FRED_BACKEND=fake``).
+"""
+import json
 import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -37,3 +53,171 @@ def save_fred(df: pd.DataFrame, path: str):
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(p)
+
+
+SERIES_DTYPE = np.dtype([('date', '<i8'), ('value', '<f8')])
+DEFAULT_CACHE_DIR = 'data/fred'
+
+
+class FredApiBackend:
+    """FRED through the fredapi package; needs FRED_API_KEY (or ``api_key``)."""
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or os.getenv('FRED_API_KEY')
+        self._fred = None
+
+    def get_series(self, series_id: str, start=None, end=None) -> pd.Series:
+        if self._fred is None:
+            if self.api_key is None:
+                raise RuntimeError('FRED API key not set')
+            from fredapi import Fred
+            self._fred = Fred(api_key=self.api_key)
+        return self._fred.get_series(series_id, observation_start=start, observation_end=end)
+
+
+class FakeFredBackend:
+    """Offline stand-in: a deterministic monthly random walk per series id.
+
+    The full history from ``first`` to ``end`` is fixed by the series id, so an
+    incremental fetch returns exactly the observations a full fetch would; move ``end``
+    forward to simulate new releases. ``calls`` records every request.
+    """
+
+    def __init__(self, end=None, first: str = '2015-01-01', series: dict = None):
+        self.end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+        self.first = pd.Timestamp(first)
+        self.series = dict(series or {})
+        self.calls = []
+
+    def _history(self, series_id: str) -> pd.Series:
+        if series_id in self.series:
+            return pd.Series(self.series[series_id]).sort_index()
+        dates = pd.date_range(self.first, self.end, freq='MS')
+        rng = np.random.default_rng(zlib.crc32(series_id.encode()))
+        steps = rng.normal(0, 0.1, len(dates))
+        return pd.Series(5.0 + np.cumsum(steps), index=dates, name=series_id)
+
+    def get_series(self, series_id: str, start=None, end=None) -> pd.Series:
+        self.calls.append((series_id, start, end))
+        s = self._history(series_id)
+        s = s[s.index <= min(self.end, pd.Timestamp(end) if end is not None else self.end)]
+        return s[s.index >= pd.Timestamp(start)] if start is not None else s
+
+
+def backend_from_env():
+    """``FRED_BACKEND=fake`` selects the offline backend; anything else uses fredapi."""
+    return FakeFredBackend() if os.getenv('FRED_BACKEND', '').lower() == 'fake' else FredApiBackend()
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Network failures and HTTP 429/5xx; not configuration errors such as a missing API key."""
+    code = getattr(exc, 'code', None)  # urllib's HTTPError
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return isinstance(exc, OSError)  # URLError, ConnectionError, timeouts
+
+
+def _with_retry(fn, attempts: int = 3, backoff_s: float = 0.5):
+    """``fn()``, retried with exponential backoff on transient errors; anything else is raised at once."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1 or not _is_transient(e):
+                raise
+            time.sleep(backoff_s * 2 ** attempt)
+
+
+class FredCache:
+    def __init__(self, path: str = DEFAULT_CACHE_DIR, backend=None):
+        self.path = Path(path)
+        self.backend = backend if backend is not None else backend_from_env()
+        m = self.path / 'manifest.json'
+        self.manifest = json.loads(m.read_text()) if m.exists() else {'series': {}}
+
+    def series_ids(self) -> list:
+        return sorted(self.manifest['series'])
+
+    def arrays(self, series_id: str, mmap: bool = True) -> np.ndarray:
+        """The cached observations of one series (fields ``date``, ``value``)."""
+        f = self.path / f'{series_id}.npy'
+        if not f.exists():
+            return np.empty(0, dtype=SERIES_DTYPE)
+        return np.load(f, mmap_mode='r' if mmap else None)
+
+    def _store(self, series_id: str, obs: np.ndarray):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f'.{series_id}.npy.tmp'
+        with open(tmp, 'wb') as fh:
+            np.save(fh, obs)
+        os.replace(tmp, self.path / f'{series_id}.npy')
+
+    def _write_manifest(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / 'manifest.json').write_text(json.dumps(self.manifest, indent=2, sort_keys=True))
+
+    def _update_one(self, series_id: str, end=None) -> int:
+        old = self.arrays(series_id, mmap=False)
+        last = pd.Timestamp(int(old['date'][-1])) if len(old) else None
+        start = (last + pd.Timedelta(days=1)).date().isoformat() if last is not None else None
+        fetched = _with_retry(lambda: self.backend.get_series(series_id, start=start, end=end))
+        fetched = pd.Series(fetched, dtype=float).dropna()
+        fetched.index = pd.to_datetime(fetched.index)
+        if last is not None:
+            fetched = fetched[fetched.index > last]
+        fetched = fetched[~fetched.index.duplicated(keep='last')].sort_index()
+        new = np.empty(len(fetched), dtype=SERIES_DTYPE)
+        new['date'] = fetched.index.to_numpy(dtype='datetime64[ns]').view('int64')
+        new['value'] = fetched.to_numpy()
+        if len(new) or not len(old):
+            self._store(series_id, np.concatenate([old, new]))
+        return len(new)
+
+    def refresh(self, series_ids, workers: int = 4, end=None) -> dict:
+        """Fetch observations newer than each series' last cached date, several series at a time.
+
+        Returns the number of new observations per series; a series whose fetch still
+        fails after retries keeps its cached data and is reported as an exception.
+        """
+        series_ids = list(dict.fromkeys(series_ids))
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(series_ids)))) as pool:
+            futures = {s: pool.submit(self._update_one, s, end) for s in series_ids}
+            for s, future in futures.items():
+                try:
+                    results[s] = future.result()
+                except Exception as e:
+                    print(f'Warning: unable to refresh FRED series {s}: {e}')
+                    results[s] = e
+        for s, n in results.items():
+            obs = self.arrays(s, mmap=False)
+            if not isinstance(n, Exception) and len(obs):
+                self.manifest['series'][s] = {
+                    'last_date': pd.Timestamp(int(obs['date'][-1])).date().isoformat(),
+                    'rows': int(len(obs)),
+                    'refreshed_at': pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds'),
+                }
+        self._write_manifest()
+        return results
+
+    def import_frame(self, df: pd.DataFrame):
+        """Seed the cache from a date-indexed frame, e.g. the old ``data/fred_cached.csv``."""
+        for s in df.columns:
+            col = df[s].dropna()
+            obs = np.empty(len(col), dtype=SERIES_DTYPE)
+            obs['date'] = pd.to_datetime(col.index).to_numpy(dtype='datetime64[ns]').view('int64')
+            obs['value'] = col.to_numpy(dtype=float)
+            obs.sort(order='date')
+            self._store(s, obs)
+            self.manifest['series'][s] = {'last_date': pd.Timestamp(int(obs['date'][-1])).date().isoformat() if len(obs) else None,
+                                          'rows': int(len(obs)), 'refreshed_at': None}
+        self._write_manifest()
+
+    def frame(self, series_ids=None) -> pd.DataFrame:
+        """Cached series side by side, indexed by observation date (the shape fetch_fred_series returns)."""
+        columns = {}
+        for s in series_ids if series_ids is not None else self.series_ids():
+            obs = self.arrays(s)
+            if len(obs):
+                columns[s] = pd.Series(np.asarray(obs['value']), index=pd.to_datetime(np.asarray(obs['date'])))
+        return pd.DataFrame(columns).sort_index() if columns else pd.DataFrame()
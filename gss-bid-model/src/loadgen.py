@@ -0,0 +1,102 @@
+"""Closed-loop HTTP load generation against an ASGI app (in-process) or a running server.
+
+``run_level`` keeps ``concurrency`` requests in flight for ``duration`` seconds, each
+client sending its next request as soon as the previous one returns, and reports
+throughput (completed requests over wall-clock time), latency percentiles and the error
+rate. Stepping the concurrency up until throughput stops growing gives the saturation
+throughput; ``saturation`` and ``capacity_at_slo`` pick it out of a list of levels.
+
+Requests come from a ``RequestMix``: weighted request kinds (``/predict``,
+``/optimize``, ...), each drawing its body either from a small hot set (repeat
+opportunities, which hit the recommendation caches) or from the unused bodies in turn.
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.benchmark import summarize
+
+
+class RequestMix:
+    def __init__(self, kinds: Dict[str, Tuple[float, str, list]], repeat_frac: float = 0.0, hot_set: int = 16,
+                 seed: int = 0):
+        """``kinds`` maps a name to ``(weight, path, bodies)``; kinds with no weight or bodies are dropped."""
+        self.kinds = {k: v for k, v in kinds.items() if v[0] > 0 and v[2]}
+        if not self.kinds:
+            raise ValueError('request mix is empty')
+        self.names = list(self.kinds)
+        self.weights = [self.kinds[k][0] for k in self.names]
+        self.repeat_frac = repeat_frac
+        self.hot_set = hot_set
+        self._next_unique = dict.fromkeys(self.names, 0)
+        self._rng = random.Random(seed)
+
+    def next(self) -> Tuple[str, str, dict]:
+        kind = self._rng.choices(self.names, self.weights)[0]
+        _, path, bodies = self.kinds[kind]
+        hot = min(self.hot_set, len(bodies))
+        if self._rng.random() < self.repeat_frac or hot == len(bodies):
+            body = bodies[self._rng.randrange(hot)]
+        else:
+            # unique bodies come after the hot set; wraps around once exhausted
+            i = self._next_unique[kind]
+            self._next_unique[kind] = i + 1
+            body = bodies[hot + i % (len(bodies) - hot)]
+        return kind, path, body
+
+
+async def run_level(client, mix: RequestMix, concurrency: int, duration: float,
+                    timeout: Optional[float] = 30.0) -> dict:
+    """Drive ``client`` (an ``httpx.AsyncClient``) at ``concurrency`` for ``duration`` seconds."""
+    latencies: List[float] = []
+    by_kind: Dict[str, List[float]] = {k: [] for k in mix.names}
+    errors: Counter = Counter()
+    stop = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < stop:
+            kind, path, body = mix.next()
+            start = time.perf_counter()
+            try:
+                r = await client.post(path, json=body, timeout=timeout)
+                failed = str(r.status_code) if r.status_code >= 400 else None
+            except Exception as e:
+                failed = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if failed:
+                errors[failed] += 1
+            else:
+                latencies.append(elapsed)
+                by_kind[kind].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    total = len(latencies) + sum(errors.values())
+    out = summarize(latencies) if latencies else {'calls': 0}
+    out.update({
+        'concurrency': concurrency,
+        'requests': total,
+        'throughput_rps': len(latencies) / wall,  # successful requests per wall-clock second
+        'error_rate': sum(errors.values()) / total if total else 0.0,
+        'errors': dict(errors),
+        'p95_ms_by_kind': {k: float(np.percentile(v, 95)) * 1e3 for k, v in by_kind.items() if v},
+    })
+    # summarize's rates divide by summed latency, which overlaps under concurrency
+    out['calls_per_s'] = total / wall
+    out['items_per_s'] = out['throughput_rps']
+    return out
+
+
+def saturation(levels: List[dict], max_error_rate: float = 0.01) -> Optional[dict]:
+    """The level with the highest throughput among those within ``max_error_rate``."""
+    ok = [lv for lv in levels if lv['error_rate'] <= max_error_rate and lv.get('calls')]
+    return max(ok, key=lambda lv: lv['throughput_rps']) if ok else None
+
+
+def capacity_at_slo(levels: List[dict], slo_p95_ms: float, max_error_rate: float = 0.01) -> Optional[dict]:
+    """The highest-throughput level whose p95 latency meets ``slo_p95_ms``."""
+    return saturation([lv for lv in levels if lv.get('p95_ms', float('inf')) <= slo_p95_ms], max_error_rate)
@@ -0,0 +1,95 @@
+"""Macro indicators compiled for as-of lookups by date.
+
+``MacroFeatures`` holds the union of the series' observation dates as one sorted int64
+array and, for every such date, the latest value of each series up to it (each series
+carried forward on its own). The value of a series as of any date is then the row
+``searchsorted(dates, date, side='right') - 1``: one vectorised call for a training
+frame, one bisect for a request. Rows keep their order and index, and dates before the
+first observation get NaN.
+
+Built from a ``FredCache`` (or a date-indexed DataFrame) at training time and saved
+next to the models as .npy arrays plus a JSON manifest, like the feature store, so the
+API can memory-map it and attach the same macro columns to every request.
+"""
+import json
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+
+class MacroFeatures:
+    def __init__(self, columns, dates: np.ndarray, values: np.ndarray):
+        self.columns = list(columns)
+        self.dates = dates
+        self.values = values
+        self._dates_list = dates.tolist()
+
+    @classmethod
+    def from_frame(cls, fred_df: pd.DataFrame) -> 'MacroFeatures':
+        """From a date-indexed frame with one column per series (the fetch_fred_series shape)."""
+        if fred_df is None or fred_df.empty:
+            return cls([], np.empty(0, dtype=np.int64), np.empty((0, 0)))
+        frame = fred_df.copy()
+        frame.index = pd.to_datetime(frame.index)
+        frame = frame[frame.index.notna()]
+        frame = frame.groupby(level=0).last().sort_index().ffill()
+        return cls([str(c) for c in frame.columns], frame.index.to_numpy(dtype='datetime64[ns]').view('int64'),
+                   frame.to_numpy(dtype=float))
+
+    @classmethod
+    def from_cache(cls, cache, series_ids=None) -> 'MacroFeatures':
+        """From a ``FredCache``: every cached series, or only ``series_ids``."""
+        return cls.from_frame(cache.frame(series_ids))
+
+    def _rows(self, dates_ns: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        rows = np.searchsorted(self.dates, dates_ns, side='right') - 1
+        return np.where(valid, rows, -1)
+
+    def lookup(self, dates) -> np.ndarray:
+        """(len(dates), len(columns)) values as of each date, in the order given."""
+        dates = pd.Series(dates)
+        if not pd.api.types.is_datetime64_dtype(dates):
+            dates = pd.to_datetime(dates)
+        when = dates.to_numpy(dtype='datetime64[ns]')
+        rows = self._rows(when.view('int64'), ~np.isnat(when))
+        out = np.full((len(rows), len(self.columns)), np.nan)
+        found = rows >= 0
+        out[found] = self.values[rows[found]]
+        return out
+
+    def features(self, when) -> Dict[str, float]:
+        """Macro values as of one date (a request's BidDate)."""
+        if when is None or not self.columns:
+            return dict.fromkeys(self.columns, np.nan)
+        when = pd.Timestamp(when)
+        if when is pd.NaT:
+            return dict.fromkeys(self.columns, np.nan)
+        row = bisect_right(self._dates_list, when.value) - 1
+        if row < 0:
+            return dict.fromkeys(self.columns, np.nan)
+        return dict(zip(self.columns, self.values[row].tolist()))
+
+    def join(self, df: pd.DataFrame, date_col: str = 'BidDate') -> pd.DataFrame:
+        """``df`` with one column per series added; rows and index unchanged."""
+        if not self.columns or date_col not in df.columns:
+            return df
+        values = pd.DataFrame(self.lookup(df[date_col]), index=df.index, columns=self.columns)
+        stale = [c for c in self.columns if c in df.columns]
+        return pd.concat([df.drop(columns=stale) if stale else df, values], axis=1)
+
+    def save(self, path: str):
+        p = Path(path)
+        p.mkdir(parents=True, exist_ok=True)
+        np.save(p / 'dates.npy', self.dates)
+        np.save(p / 'values.npy', self.values)
+        last = pd.Timestamp(int(self.dates[-1])).date().isoformat() if len(self.dates) else None
+        (p / 'manifest.json').write_text(json.dumps({'columns': self.columns, 'last_date': last}, indent=2))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'MacroFeatures':
+        p = Path(path)
+        manifest = json.loads((p / 'manifest.json').read_text())
+        mode = 'r' if mmap else None
+        return cls(manifest['columns'], np.load(p / 'dates.npy'), np.load(p / 'values.npy', mmap_mode=mode))
@@ -1,3 +1,5 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import joblib
 from pathlib import Path
 import pandas as pd
@@ -5,8 +7,11 @@ import numpy as np
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 from xgboost import XGBClassifier, XGBRegressor
+from gss_common.artifact_store import is_artifact_dir
+from src.native import export_native, load_native_artifacts, save_native_artifacts
+from src.timing import StageTimer
 
 
 def build_preprocessor(categorical_cols, numeric_cols):
@@ -28,40 +33,104 @@ def build_preprocessor(categorical_cols, numeric_cols):
     return preprocessor
 
 
-def train_models(X: pd.DataFrame, y_reg: pd.Series, y_clf: pd.Series, categorical_cols, numeric_cols, output_dir: str):
-    p = Path(output_dir)
-    p.mkdir(parents=True, exist_ok=True)
+def column_selector(indices) -> FunctionTransformer:
+    """Picklable step keeping the given columns of a transformed matrix."""
+    return FunctionTransformer(np.take, kw_args={'indices': [int(i) for i in indices], 'axis': 1})
 
-    pre = build_preprocessor(categorical_cols, numeric_cols)
 
-    # Classification model for Win probability
-    clf = Pipeline([
-        ('pre', pre),
-        ('model', XGBClassifier(n_estimators=200, learning_rate=0.05, use_label_encoder=False, eval_metric='logloss', random_state=42))
-    ])
+def default_n_jobs(models: int = 2) -> int:
+    """Threads per model when ``models`` boosters train side by side."""
+    return max(1, (os.cpu_count() or 1) // models)
 
-    clf.fit(X, y_clf)
 
-    # Regression model for BidAmount
-    reg = Pipeline([
-        ('pre', pre),
-        ('model', XGBRegressor(n_estimators=200, learning_rate=0.05, random_state=42))
-    ])
+# hist bins each column once into a quantile matrix instead of sorting it at every split
+CLF_PARAMS = dict(n_estimators=200, learning_rate=0.05, use_label_encoder=False, eval_metric='logloss',
+                  tree_method='hist', random_state=42)
+REG_PARAMS = dict(n_estimators=200, learning_rate=0.05, tree_method='hist', random_state=42)
 
-    reg.fit(X, y_reg)
 
-    # Save artifacts
-    joblib.dump(clf, p / 'win_model.joblib')
-    joblib.dump(reg, p / 'bid_model.joblib')
-    # Save preprocessor separately
-    joblib.dump(pre, p / 'preprocessor.joblib')
+def shared_matrix(X: pd.DataFrame, target: str, categorical_cols, numeric_cols):
+    """Fit the preprocessor once; return it, the float32 matrix and the columns the regressor keeps.
+
+    The regressor's matrix is the same one without the ``target`` column.
+    """
+    pre = build_preprocessor(categorical_cols, numeric_cols)
+    Xt = np.ascontiguousarray(pre.fit_transform(X), dtype=np.float32)
+    keep = [i for i, name in enumerate(pre.get_feature_names_out()) if name != f'num__{target}']
+    return pre, Xt, keep
+
+
+def train_models(X: pd.DataFrame, y_reg: pd.Series, y_clf: pd.Series, categorical_cols, numeric_cols, output_dir: str,
+                 n_jobs: int = None, parallel: bool = True, timer: StageTimer = None,
+                 clf_params: dict = None, reg_params: dict = None):
+    """Fit the win-probability classifier and the bid-amount regressor and save them.
+
+    The preprocessor is fitted once and X transformed once; the regressor sees the same
+    matrix without its own target column. With ``parallel`` the two boosters train at
+    the same time in threads (XGBoost releases the GIL), each with ``n_jobs`` threads
+    (default: half the cores each, or all of them when training one after the other).
+    ``clf_params``/``reg_params`` override the XGBoost defaults, e.g. with tuned values.
+    """
+    p = Path(output_dir)
+    p.mkdir(parents=True, exist_ok=True)
+    timer = timer or StageTimer()
+    if n_jobs is None:
+        n_jobs = default_n_jobs(2 if parallel else 1)
+
+    with timer.stage('preprocess'):
+        pre, Xt, keep = shared_matrix(X, y_reg.name, categorical_cols, numeric_cols)
+
+    # Regression model for BidAmount; its own target is not an input
+    select = column_selector(keep).fit(Xt[:1])
+    Xt_reg = Xt[:, keep] if len(keep) < Xt.shape[1] else Xt
+
+    # Classification model for Win probability
+    clf_model = XGBClassifier(**{**CLF_PARAMS, **(clf_params or {}), 'n_jobs': n_jobs})
+    reg_model = XGBRegressor(**{**REG_PARAMS, **(reg_params or {}), 'n_jobs': n_jobs})
+
+    def fit(name, model, Xm, y):
+        with timer.stage(f'fit {name}'):
+            model.fit(Xm, y)
+
+    with timer.stage('fit'):
+        jobs = [('clf', clf_model, Xt, y_clf), ('reg', reg_model, Xt_reg, y_reg)]
+        if parallel:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                for future in [pool.submit(fit, *job) for job in jobs]:
+                    future.result()
+        else:
+            for job in jobs:
+                fit(*job)
+
+    clf = Pipeline([('pre', pre), ('model', clf_model)])
+    reg = Pipeline([('pre', pre), ('select', select), ('model', reg_model)])
+
+    with timer.stage('save'):
+        joblib.dump(clf, p / 'win_model.joblib')
+        joblib.dump(reg, p / 'bid_model.joblib')
+        # Save preprocessor separately
+        joblib.dump(pre, p / 'preprocessor.joblib')
+        # Native boosters + flattened preprocessing for sklearn-free serving (src/native.py)
+        export_native(clf, p / 'native', 'win_model')
+        export_native(reg, p / 'native', 'bid_model')
+        # The same as one memory-mapped artifact directory (gss_common.artifact_store)
+        save_native_artifacts({'win_model': clf, 'bid_model': reg}, p / 'artifacts')
     print(f"Saved models to {p}")
 
-    return {'clf': p / 'win_model.joblib', 'reg': p / 'bid_model.joblib', 'pre': p / 'preprocessor.joblib'}
+    return {'clf': p / 'win_model.joblib', 'reg': p / 'bid_model.joblib', 'pre': p / 'preprocessor.joblib',
+            'native': p / 'native', 'artifacts': p / 'artifacts'}
 
 
 def load_models(model_dir: str):
+    """``(clf, reg, pre)``: native models from ``<model_dir>/artifacts`` when present, else the joblib pipelines.
+
+    The native classifier's preprocessor is returned as ``pre``.
+    """
     p = Path(model_dir)
+    if is_artifact_dir(p / 'artifacts'):
+        models = load_native_artifacts(p / 'artifacts')
+        clf, reg = models['win_model'], models['bid_model']
+        return clf, reg, clf.named_steps['pre']
     clf = joblib.load(p / 'win_model.joblib')
     reg = joblib.load(p / 'bid_model.joblib')
     pre = joblib.load(p / 'preprocessor.joblib')
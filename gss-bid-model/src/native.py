@@ -0,0 +1,267 @@
+"""Lean serving format: native XGBoost booster plus a flattened preprocessing spec.
+
+``export_native`` takes a fitted ``Pipeline([('pre', ColumnTransformer), ('model', XGB...)])``
+as built by ``src.models`` (optionally with a ``select`` column step in between) and
+writes the booster in XGBoost's own format (``.ubj`` or ``.json``) next to
+``<name>.preprocess.json``: the category list of every one-hot column, the imputation
+medians and the scaler means/scales. ``load_native`` rebuilds
+the feature matrix from those with NumPy and calls ``Booster.inplace_predict``, so
+serving never unpickles sklearn objects.
+
+The loaded model mimics the pipeline surface the rest of the code relies on
+(``predict``, ``predict_proba`` for classifiers, ``named_steps['pre'|'model']``), so
+``src.optimize`` and the fee table work with either.
+
+``save_native_artifacts`` writes the same models into an artifact directory
+(gss_common.artifact_store) instead: both boosters plus their specs in one manifest, with
+the medians, means and scales as .npy files. ``load_native_artifacts`` maps those
+read-only, so pre-forked or co-located workers share them.
+
+xgboost (and the sklearn it imports) is only imported by ``load_native`` and
+``load_native_artifacts``, so an API process can bind its port before paying for it
+(see gss_common.startup).
+"""
+import json
+from pathlib import Path
+import numpy as np
+from gss_common.artifact_store import load_artifacts, save_artifacts
+
+
+def _onehot_block(trans, columns) -> dict:
+    imputer, ohe = trans.named_steps['imputer'], trans.named_steps['ohe']
+    if imputer.strategy != 'constant' or ohe.handle_unknown != 'ignore' or ohe.drop is not None:
+        raise ValueError('Only constant imputation + OneHotEncoder(handle_unknown="ignore") without drop is supported')
+    return {
+        'type': 'onehot',
+        'fill_value': imputer.fill_value,
+        'columns': list(columns),
+        'categories': [c.tolist() for c in ohe.categories_],
+    }
+
+
+def _numeric_block(trans, columns) -> dict:
+    imputer, scaler = trans.named_steps['imputer'], trans.named_steps['scaler']
+    medians = np.asarray(imputer.statistics_, dtype=float)
+    # SimpleImputer drops columns that were entirely missing at fit time
+    kept = [c for c, m in zip(columns, medians) if not np.isnan(m)]
+    medians = medians[~np.isnan(medians)]
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(len(kept))
+    scale = scaler.scale_ if scaler.with_std else np.ones(len(kept))
+    return {
+        'type': 'numeric',
+        'columns': kept,
+        'median': medians.tolist(),
+        'mean': np.asarray(mean, dtype=float).tolist(),
+        'scale': np.asarray(scale, dtype=float).tolist(),
+    }
+
+
+def preprocess_spec(pre) -> dict:
+    """Flatten a fitted ``build_preprocessor`` ColumnTransformer into plain lists."""
+    blocks = []
+    for name, trans, columns in pre.transformers_:
+        if name == 'remainder' or isinstance(trans, str):
+            continue
+        steps = getattr(trans, 'named_steps', {})
+        if 'ohe' in steps:
+            blocks.append(_onehot_block(trans, columns))
+        elif 'scaler' in steps:
+            blocks.append(_numeric_block(trans, columns))
+        else:
+            raise ValueError(f'Unsupported transformer {name!r} in preprocessor')
+    return {'input_columns': [str(c) for c in pre.feature_names_in_], 'blocks': blocks}
+
+
+def select_outputs(spec: dict, indices) -> dict:
+    """Spec producing only the output columns ``indices`` (in order) of ``spec``.
+
+    Used for the ``select`` step that gives the regressor the shared matrix without its
+    target; only whole numeric columns can be dropped.
+    """
+    keep = set(int(i) for i in indices)
+    if sorted(keep) != [int(i) for i in indices]:
+        raise ValueError('Selected columns must be increasing')
+    blocks, offset = [], 0
+    for block in spec['blocks']:
+        if block['type'] == 'onehot':
+            width = sum(len(c) for c in block['categories'])
+            kept = [offset + j in keep for j in range(width)]
+            if not all(kept):
+                raise ValueError('Only whole numeric columns can be dropped from a native spec')
+            blocks.append(block)
+        else:
+            width = len(block['columns'])
+            kept = [j for j in range(width) if offset + j in keep]
+            blocks.append({'type': 'numeric', **{k: [block[k][j] for j in kept]
+                                                 for k in ('columns', 'median', 'mean', 'scale')}})
+        offset += width
+    return {'input_columns': spec['input_columns'], 'blocks': blocks}
+
+
+def pipeline_spec(pipeline) -> dict:
+    """Preprocessing spec of a fitted pipeline, its ``select`` step included."""
+    model = pipeline.named_steps['model']
+    if hasattr(model, 'predict_proba') and len(model.classes_) != 2:
+        raise ValueError('Only binary classifiers are supported')
+    preprocess = preprocess_spec(pipeline.named_steps['pre'])
+    if 'select' in pipeline.named_steps:
+        preprocess = select_outputs(preprocess, pipeline.named_steps['select'].kw_args['indices'])
+    return preprocess
+
+
+def export_native(pipeline, output_dir: str, name: str, fmt: str = 'ubj') -> dict:
+    """Write ``<name>.<fmt>`` (booster) and ``<name>.preprocess.json`` to ``output_dir``."""
+    if fmt not in ('ubj', 'json'):
+        raise ValueError("fmt must be 'ubj' or 'json'")
+    model = pipeline.named_steps['model']
+    kind = 'classifier' if hasattr(model, 'predict_proba') else 'regressor'
+    best = getattr(model, 'best_iteration', None)
+    preprocess = pipeline_spec(pipeline)
+
+    p = Path(output_dir)
+    p.mkdir(parents=True, exist_ok=True)
+    booster_path = p / f'{name}.{fmt}'
+    model.get_booster().save_model(str(booster_path))
+    spec = {
+        'kind': kind,
+        'booster': booster_path.name,
+        'iteration_range': [0, int(best) + 1] if best is not None else None,
+        'preprocess': preprocess,
+    }
+    spec_path = p / f'{name}.preprocess.json'
+    spec_path.write_text(json.dumps(spec, indent=2))
+    return {'booster': booster_path, 'spec': spec_path}
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+class NativePreprocessor:
+    """NumPy replay of the fitted ColumnTransformer: one-hot blocks, then imputed and scaled numerics."""
+
+    def __init__(self, spec: dict):
+        self.feature_names_in_ = np.array(spec['input_columns'], dtype=object)
+        self.blocks = []
+        for block in spec['blocks']:
+            if block['type'] == 'onehot':
+                lookups = [{v: i for i, v in enumerate(cats)} for cats in block['categories']]
+                self.blocks.append(('onehot', block['columns'], block['fill_value'], lookups))
+            else:
+                self.blocks.append(('numeric', block['columns'], np.asarray(block['median']),
+                                    np.asarray(block['mean']), np.asarray(block['scale'])))
+        self.n_features_out = sum(
+            sum(len(l) for l in b[3]) if b[0] == 'onehot' else len(b[1]) for b in self.blocks
+        )
+        # output column names, to line up preprocessors that differ only in dropped columns
+        self.feature_names_out = [
+            name for b in self.blocks for name in (
+                [f'{col}_{v}' for col, l in zip(b[1], b[3]) for v in l] if b[0] == 'onehot' else list(b[1]))
+        ]
+
+    def transform(self, X) -> np.ndarray:
+        """Feature matrix for a DataFrame (or dict of columns); absent columns count as missing."""
+        n = len(X)
+        out = np.zeros((n, self.n_features_out))
+        offset = 0
+        for block in self.blocks:
+            if block[0] == 'onehot':
+                _, columns, fill, lookups = block
+                for col, lookup in zip(columns, lookups):
+                    values = X[col] if col in X else [None] * n
+                    for r, v in enumerate(values):
+                        j = lookup.get(fill if _is_missing(v) else v)
+                        if j is not None:
+                            out[r, offset + j] = 1.0
+                    offset += len(lookup)
+            else:
+                _, columns, median, mean, scale = block
+                num = np.column_stack([
+                    np.asarray(X[c], dtype=float) if c in X else np.full(n, np.nan) for c in columns
+                ]) if columns else np.empty((n, 0))
+                num = np.where(np.isnan(num), median, num)
+                out[:, offset:offset + len(columns)] = (num - mean) / scale
+                offset += len(columns)
+        return out
+
+
+class NativeBooster:
+    """Booster with the sklearn-style prediction methods of the estimator it was exported from."""
+
+    def __init__(self, booster: 'xgb.Booster', kind: str, iteration_range=None):
+        self.booster = booster
+        self.kind = kind
+        self.iteration_range = tuple(iteration_range) if iteration_range else (0, 0)
+
+    def _raw(self, Xt) -> np.ndarray:
+        return self.booster.inplace_predict(np.asarray(Xt), iteration_range=self.iteration_range)
+
+    @property
+    def predict_proba(self):
+        if self.kind != 'classifier':
+            raise AttributeError('predict_proba is only available for classifiers')
+        return self._predict_proba
+
+    def _predict_proba(self, Xt) -> np.ndarray:
+        p = self._raw(Xt)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, Xt) -> np.ndarray:
+        p = self._raw(Xt)
+        return (p > 0.5).astype(int) if self.kind == 'classifier' else p
+
+
+class NativeModel:
+    """``pre`` + ``model`` like the exported Pipeline, without sklearn."""
+
+    def __init__(self, pre: NativePreprocessor, model: NativeBooster):
+        self.named_steps = {'pre': pre, 'model': model}
+
+    @property
+    def predict_proba(self):
+        model_proba = self.named_steps['model'].predict_proba
+        return lambda X: model_proba(self.named_steps['pre'].transform(X))
+
+    def predict(self, X) -> np.ndarray:
+        return self.named_steps['model'].predict(self.named_steps['pre'].transform(X))
+
+
+def has_native(model_dir: str, name: str) -> bool:
+    return (Path(model_dir) / f'{name}.preprocess.json').exists()
+
+
+def native_files(model_dir: str, name: str) -> list:
+    """Paths making up one exported model (spec first), for hashing or copying."""
+    p = Path(model_dir)
+    spec = json.loads((p / f'{name}.preprocess.json').read_text())
+    return [p / f'{name}.preprocess.json', p / spec['booster']]
+
+
+def load_native(model_dir: str, name: str) -> NativeModel:
+    p = Path(model_dir)
+    spec = json.loads((p / f'{name}.preprocess.json').read_text())
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(str(p / spec['booster']))
+    return NativeModel(NativePreprocessor(spec['preprocess']),
+                       NativeBooster(booster, spec['kind'], spec.get('iteration_range')))
+
+
+def save_native_artifacts(pipelines: dict, output_dir: str, sources=()) -> Path:
+    """Write ``{name: pipeline}`` as an artifact directory: ``<name>`` (booster) and ``<name>.preprocess``."""
+    artifacts = {}
+    for name, pipeline in pipelines.items():
+        spec = pipeline_spec(pipeline)
+        for block in spec['blocks']:
+            if block['type'] == 'numeric':
+                block.update({k: np.asarray(block[k], dtype=float) for k in ('median', 'mean', 'scale')})
+        artifacts[name] = pipeline.named_steps['model']
+        artifacts[f'{name}.preprocess'] = spec
+    return save_artifacts(artifacts, output_dir, sources)
+
+
+def load_native_artifacts(artifact_dir: str, names=('win_model', 'bid_model')) -> dict:
+    """``{name: NativeModel}`` from a directory written by ``save_native_artifacts``."""
+    artifacts = load_artifacts(artifact_dir)
+    return {name: NativeModel(NativePreprocessor(artifacts[f'{name}.preprocess']), artifacts[name]) for name in names}
@@ -0,0 +1,82 @@
+"""Serving-time rolling and lag features from the per-group feature state.
+
+Training computes ``{group}_rolling_{w}d_mean_BidAmount``, ``{group}_rolling_{w}d_winrate``
+and ``{group}_lag_{n}_{col}`` from each group's history (``src.feature_store``).
+``OnlineFeatures`` keeps, for every group value in that state, the retained dates with
+prefix sums and counts of BidAmount and WinStatus, and the last values for the lags.
+A request's w-day window is then one bisect into the dates plus a subtraction, so
+filling a request takes microseconds.
+
+As in training, both the rolling mean and the win rate cover the preceding bids only:
+a request's own BidAmount and WinStatus are the labels of the models it is scored by.
+``record`` folds new outcomes into the state without a restart.
+"""
+import math
+import threading
+from bisect import bisect_right
+from typing import Dict, Mapping
+import numpy as np
+import pandas as pd
+from src.feature_store import FeatureStore
+
+
+def _prefix(values: np.ndarray) -> list:
+    valid = ~np.isnan(values)
+    return [0.0] + np.cumsum(np.where(valid, values, 0.0)).tolist(), [0] + np.cumsum(valid).tolist()
+
+
+class OnlineFeatures:
+    def __init__(self, store: FeatureStore):
+        self.store = store
+        self.columns = store.feature_columns()
+        self._lock = threading.Lock()
+        self._summaries = {key: self._summarize(*key) for key in store.groups()}
+
+    def _summarize(self, g: str, key) -> tuple:
+        dates, values = self.store.history(g, key)
+        lags = [tuple(float(v) for v in values[-n]) if len(values) >= n else (math.nan, math.nan) for n in self.store.lags]
+        return np.maximum.accumulate(dates).tolist(), _prefix(values[:, 0]), _prefix(values[:, 1]), lags
+
+    def features(self, row: Mapping) -> Dict[str, float]:
+        """Rolling and lag features for one request (BidDate and the group columns)."""
+        when = row.get('BidDate')
+        when = pd.Timestamp(when).value if when is not None else None
+        summaries = self._summaries
+        out = {}
+        for g in self.store.group_cols:
+            key = row.get(g)
+            summary = summaries.get((g, key)) if key is not None else None
+            for w, w_ns in zip(self.store.windows, self.store.windows_ns):
+                mean_col, win_col = f'{g}_rolling_{w}d_mean_BidAmount', f'{g}_rolling_{w}d_winrate'
+                if key is None:
+                    out[mean_col] = out[win_col] = math.nan
+                    continue
+                bid_sum = bid_n = win_sum = win_n = 0
+                if summary is not None:
+                    dates, (bid_cs, bid_cn), (win_cs, win_cn), _ = summary
+                    latest = dates[-1] if when is None else max(when, dates[-1])
+                    lo = bisect_right(dates, latest - w_ns)
+                    bid_sum, bid_n = bid_cs[-1] - bid_cs[lo], bid_cn[-1] - bid_cn[lo]
+                    win_sum, win_n = win_cs[-1] - win_cs[lo], win_cn[-1] - win_cn[lo]
+                out[mean_col] = bid_sum / bid_n if bid_n else math.nan
+                out[win_col] = win_sum / win_n if win_n else math.nan
+            for i, n in enumerate(self.store.lags):
+                values = summary[3][i] if summary is not None else (math.nan, math.nan)
+                out[f'{g}_lag_{n}_BidAmount'], out[f'{g}_lag_{n}_WinStatus'] = values
+        return out
+
+    def features_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        rows = [self.features(r) for r in df.to_dict(orient='records')]
+        return pd.DataFrame(rows, index=df.index, columns=self.columns)
+
+    def record(self, outcomes: pd.DataFrame) -> int:
+        """Fold observed outcomes (BidDate, group columns, BidAmount, WinStatus) into the state."""
+        with self._lock:
+            self.store.update(outcomes)
+            summaries = dict(self._summaries)
+            for g in self.store.group_cols:
+                if g in outcomes.columns:
+                    for key in outcomes[g].dropna().unique():
+                        summaries[(g, key)] = self._summarize(g, key)
+            self._summaries = summaries  # swapped whole, so readers never see a half update
+        return len(outcomes)
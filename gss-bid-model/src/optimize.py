@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from gss_common.instrumentation import stage
+from gss_common.search import search
+
+
+DEFAULT_BASELINE = 100000.0
+
+
+def baseline_bid(row: pd.Series) -> float:
+    """Centre of the search: the submitted BidAmount, else EstimatedCost, else a default."""
+    for col in ('BidAmount', 'EstimatedCost'):
+        val = pd.to_numeric(row.get(col), errors='coerce')
+        if pd.notna(val) and val > 0:
+            return float(val)
+    return DEFAULT_BASELINE
+
+
+def bid_window(baseline: float, pct_range: float = 0.2):
+    return baseline * (1 - pct_range), baseline * (1 + pct_range)
+
+
+def candidate_grid(baseline: float, pct_range: float = 0.2, n_steps: int = 41) -> np.ndarray:
+    return np.linspace(*bid_window(baseline, pct_range), n_steps)
+
+
+def _predict_win(model, X) -> np.ndarray:
+    with stage('model'):
+        p = model.predict_proba(X)[:, 1] if hasattr(model, 'predict_proba') else model.predict(X)
+    return np.asarray(p, dtype=float).ravel()
+
+
+def _align_columns(X: pd.DataFrame, pre) -> pd.DataFrame:
+    """Add any column the preprocessor was fitted on as NaN so its imputers fill it."""
+    expected = getattr(pre, 'feature_names_in_', None)
+    if expected is None:
+        return X
+    missing = [c for c in expected if c not in X.columns]
+    if not missing:
+        return X
+    return X.assign(**{c: np.nan for c in missing})
+
+
+def encoded_features(clf, X: pd.DataFrame) -> np.ndarray:
+    """The first row of ``X`` as the model sees it (after the pipeline's preprocessor)."""
+    steps = getattr(clf, 'named_steps', None)
+    if steps and 'pre' in steps:
+        return np.asarray(steps['pre'].transform(_align_columns(X.iloc[[0]], steps['pre'])), dtype=float)[0]
+    return pd.to_numeric(X.iloc[0], errors='coerce').to_numpy(dtype=float)
+
+
+def _with_bid(X: pd.DataFrame, bids, bid_col: str) -> pd.DataFrame:
+    """Row i of ``X`` repeated once per entry of ``bids[i]`` with the bid substituted."""
+    bids = np.atleast_2d(np.asarray(bids, dtype=float))
+    Xc = X.iloc[np.repeat(np.arange(len(X)), bids.shape[1])].reset_index(drop=True)
+    Xc[bid_col] = bids.ravel()
+    return Xc
+
+
+def _bid_scorer(clf, X: pd.DataFrame, lo, hi, bid_col: str):
+    """Compile a function mapping candidate bids of shape (len(X), k) to P(win).
+
+    For a fitted ``Pipeline([('pre', ...), ('model', ...)])`` the preprocessor runs once
+    on a three-row probe per opportunity (``lo``, ``hi`` and their midpoint). The numeric
+    branch is affine per column (median imputer + scaler), so the lo/hi rows pin down
+    how ``bid_col`` maps into the transformed matrix and the mid row checks that
+    assumption. Each call then fills the bid column in transformed space and sends the
+    whole batch through the underlying estimator. If the check fails every call
+    transforms its full candidate frame instead, still as a single batch.
+    """
+    steps = getattr(clf, 'named_steps', None)
+    if not steps or 'pre' not in steps or 'model' not in steps:
+        return lambda c: _predict_win(clf, _with_bid(X, c, bid_col)).reshape(c.shape)
+
+    pre, model = steps['pre'], steps['model']
+    X = _align_columns(X, pre)
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    hi = np.where(hi == lo, lo + 1.0, hi)
+    mid = (lo + hi) / 2
+    with stage('preprocess'):
+        probe = np.asarray(pre.transform(_with_bid(X, np.column_stack([lo, hi, mid]), bid_col)), dtype=float)
+    probe = probe.reshape(len(X), 3, -1)
+    slope = (probe[:, 1] - probe[:, 0]) / (hi - lo)[:, None]
+    cols = np.flatnonzero((slope != 0).any(axis=0))
+    base = probe[:, 0]
+    if not np.allclose(probe[:, 2, cols], base[:, cols] + slope[:, cols] * (mid - lo)[:, None]):
+        return lambda c: _predict_win(model, np.asarray(pre.transform(_with_bid(X, c, bid_col)), dtype=float)).reshape(c.shape)
+
+    def score(candidates):
+        n, k = candidates.shape
+        Xt = np.repeat(base[:, None, :], k, axis=1)
+        Xt[:, :, cols] = base[:, None, cols] + (candidates - lo[:, None])[:, :, None] * slope[:, None, cols]
+        return _predict_win(model, Xt.reshape(n * k, -1)).reshape(n, k)
+    return score
+
+
+def score_candidate_grid(clf, X: pd.DataFrame, candidates, bid_col: str = 'BidAmount') -> np.ndarray:
+    """P(win) for row i of ``X`` at every bid in ``candidates[i]``, in one model call.
+
+    ``candidates`` has shape (len(X), k) and the result has the same shape.
+    """
+    candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+    return _bid_scorer(clf, X, candidates.min(axis=1), candidates.max(axis=1), bid_col)(candidates)
+
+
+def score_candidates(clf, X: pd.DataFrame, candidates, bid_col: str = 'BidAmount') -> np.ndarray:
+    """P(win) for the first row of ``X`` at every candidate bid, in one model call."""
+    return score_candidate_grid(clf, X.iloc[[0]], [candidates], bid_col)[0]
+
+
+def _curve(candidates: np.ndarray, p_win: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({'candidate': candidates, 'p_win': p_win, 'expected_profit': p_win * candidates})
+
+
+def sweep(clf, X: pd.DataFrame, pct_range: float = 0.2, n_steps: int = 41, bid_col: str = 'BidAmount',
+          strategy: str = 'grid', tol: float = 0.01, score=None) -> pd.DataFrame:
+    """Expected profit = P(win) * bid around the baseline bid.
+
+    ``strategy`` picks how the window is searched (see ``gss_common.search``); the result has
+    one row per evaluation, sorted by candidate. ``score`` replaces live model scoring
+    with another bids -> P(win) function, e.g. a precomputed fee table lookup.
+    """
+    low, high = bid_window(baseline_bid(X.iloc[0]), pct_range)
+    if score is None:
+        scorer = _bid_scorer(clf, X.iloc[[0]], [low], [high], bid_col)
+        score = lambda bids: scorer(bids[np.newaxis, :])[0]
+    candidates, p_win = search(score, low, high, strategy, n_steps, tol)
+    return _curve(candidates, p_win)
+
+
+def sweep_batch(clf, X: pd.DataFrame, pct_range: float = 0.2, n_steps: int = 41, bid_col: str = 'BidAmount') -> list:
+    """``sweep`` for every row of ``X``, scored as one stacked candidate matrix."""
+    candidates = np.vstack([candidate_grid(baseline_bid(row), pct_range, n_steps) for _, row in X.iterrows()])
+    p_win = score_candidate_grid(clf, X, candidates, bid_col)
+    return [_curve(c, p) for c, p in zip(candidates, p_win)]
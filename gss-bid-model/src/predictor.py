@@ -0,0 +1,141 @@
+"""Serving call path for the win-probability classifier and the bid regressor, fixed at load time.
+
+The saved models come in a few shapes: sklearn Pipelines (``pre`` then ``model``; the
+regressor has a ``select`` step in between that drops its own target column),
+``NativeModel``s with the same named steps (``src.native``), or bare estimators next
+to a separate ``preprocessor.joblib``. Rather than calling a model on each request and
+retrying another way when it raises, ``Predictor`` tries the candidate paths once on a
+probe row and keeps, per model, the first one that runs and agrees with the model's
+own output:
+
+``shared``
+    the input is preprocessed once (the classifier's ``pre``, or the separate
+    preprocessor for bare estimators) and both models continue from that matrix;
+    the regressor through its remaining steps, or for native models through the
+    columns its own preprocessing keeps.
+``direct``
+    the model is called on the frame and preprocesses it itself.
+
+A model with neither is reported when the artifacts load, not on every request.
+"""
+from typing import Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+from gss_common.instrumentation import stage
+
+
+def input_columns(model, pre=None) -> Optional[list]:
+    """Columns ``model`` (or its ``pre`` step, or ``pre``) was fitted on, if recorded."""
+    steps = getattr(model, 'named_steps', None) or {}
+    for obj in (model, steps.get('pre'), pre):
+        names = getattr(obj, 'feature_names_in_', None)
+        if names is not None:
+            return [str(c) for c in names]
+    return None
+
+
+def missing_probe(columns) -> pd.DataFrame:
+    """One row with every column missing, as a request carrying only optional-field defaults."""
+    return pd.DataFrame({c: pd.Series([np.nan], dtype=object) for c in columns})
+
+
+def _estimator_call(est, output: str) -> Callable:
+    if output == 'proba' and hasattr(est, 'predict_proba'):
+        return lambda Xt: est.predict_proba(Xt)[:, 1]
+    return est.predict
+
+
+def column_map(shared, own) -> Optional[np.ndarray]:
+    """Positions of ``own``'s output columns in ``shared``'s (NativePreprocessor names), if all present."""
+    names = getattr(shared, 'feature_names_out', None)
+    own_names = getattr(own, 'feature_names_out', None)
+    if not names or not own_names:
+        return None
+    pos = {name: i for i, name in enumerate(names)}
+    if any(name not in pos for name in own_names):
+        return None
+    return np.array([pos[name] for name in own_names])
+
+
+def _shared_head(model, shared, output: str) -> Optional[Callable]:
+    """``model`` as a function of ``shared``'s output, or None where it cannot be one."""
+    steps = getattr(model, 'named_steps', None)
+    if steps is None:
+        # bare estimator fed by the separate preprocessor
+        return _estimator_call(model, output)
+    own = steps.get('pre')
+    if own is None:
+        return None
+    if hasattr(model, 'steps'):  # sklearn Pipeline
+        middle = [step for _, step in model.steps[1:-1]]
+        final = _estimator_call(model.steps[-1][1], output)
+        if not middle:
+            return final
+
+        def head(Xt):
+            for step in middle:
+                Xt = step.transform(Xt)
+            return final(Xt)
+        return head
+    final = _estimator_call(steps['model'], output)
+    if own is shared:
+        return final
+    idx = column_map(shared, own)
+    return None if idx is None else (lambda Xt: final(Xt[:, idx]))
+
+
+def _run(fn: Callable, X) -> Optional[np.ndarray]:
+    try:
+        return np.asarray(fn(X), dtype=float).ravel()
+    except Exception:
+        return None
+
+
+class Predictor:
+    """``predictor(X) -> (p_win, predicted_bid)`` with one preprocessing pass where the models allow."""
+
+    def __init__(self, clf, reg, pre=None, probe: pd.DataFrame = None, rtol: float = 1e-5):
+        """Pick each model's call path on ``probe`` (default: one all-missing row of the fitted columns).
+
+        Raises ValueError when a model cannot be called on the probe either way.
+        """
+        if probe is None:
+            columns = input_columns(clf, pre) or input_columns(reg, pre)
+            if columns is None:
+                raise ValueError('No probe given and the models do not record their input columns')
+            probe = missing_probe(columns)
+        steps = getattr(clf, 'named_steps', None)
+        self.shared = steps.get('pre') if steps is not None else pre
+        Xt = None
+        if self.shared is not None:
+            try:
+                Xt = self.shared.transform(probe)
+            except Exception:
+                self.shared = None
+
+        self.calls: Dict[str, Callable] = {}
+        self.modes: Dict[str, str] = {}
+        for name, model, output in (('clf', clf, 'proba'), ('reg', reg, 'predict')):
+            direct = _estimator_call(model, output)
+            expected = _run(direct, probe)
+            head = _shared_head(model, self.shared, output) if Xt is not None else None
+            got = _run(head, Xt) if head is not None else None
+            # a bare estimator cannot be called directly, so there is nothing to compare with
+            if got is not None and (expected is None or np.allclose(got, expected, rtol=rtol, atol=1e-6)):
+                self.calls[name], self.modes[name] = head, 'shared'
+            elif expected is not None:
+                self.calls[name], self.modes[name] = direct, 'direct'
+            else:
+                missing = sorted(set(input_columns(model, pre) or []) - set(map(str, probe.columns)))
+                raise ValueError(f'{name} cannot be called on the serving frame'
+                                 + (f' (missing columns {missing})' if missing else ''))
+        if 'shared' not in self.modes.values():
+            self.shared = None
+
+    def __call__(self, X: pd.DataFrame):
+        if self.shared is not None:
+            with stage('preprocess'):
+                Xt = self.shared.transform(X)
+        with stage('model'):
+            out = [self.calls[name](Xt if self.modes[name] == 'shared' else X) for name in ('clf', 'reg')]
+        return tuple(np.asarray(o, dtype=float).ravel() for o in out)
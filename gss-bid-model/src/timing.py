@@ -0,0 +1,31 @@
+"""Wall-clock timing of named pipeline stages (load, features, preprocess, fit, ...).
+
+Stages may nest or run in different threads; each ``stage`` records its own elapsed
+time, so the ``fit`` stage around two concurrent fits is shorter than the sum of
+``fit clf`` and ``fit reg``.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        with self._lock:
+            self.timings.setdefault(name, 0.0)  # report stages in the order they started
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] += elapsed
+
+    def report(self) -> str:
+        width = max((len(name) for name in self.timings), default=0)
+        return '\n'.join(f'{name:<{width}}  {seconds:8.2f} s' for name, seconds in self.timings.items())
@@ -0,0 +1,190 @@
+"""Budgeted hyperparameter search for the win and bid models.
+
+Candidates are random draws from ``SEARCH_SPACE``. Each is scored on expanding-window
+folds ordered by BidDate (``time_folds``): train on everything before a validation
+block, validate on the block, never the other way round. Every fit uses XGBoost early
+stopping on its validation block, so a candidate only grows the trees that still help.
+
+With ``method='halving'`` (successive halving) all candidates first get a small round
+budget, the best 1/eta move on to eta times the budget, and so on until ``max_rounds``;
+``method='random'`` gives every candidate the full budget. Candidates within a rung are
+fitted concurrently.
+
+Each evaluation becomes a leaderboard row: validation logloss (win model) or RMSE (bid
+model), rounds kept by early stopping, fit time per fold and booster latency per 1,000
+rows, so the pick can respect a latency SLO as well as accuracy (``best_params``).
+"""
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier, XGBRegressor
+from src.models import CLF_PARAMS, REG_PARAMS, default_n_jobs, shared_matrix
+
+
+# name -> (low, high, log scale, integer)
+SEARCH_SPACE = {
+    'max_depth': (2, 8, False, True),
+    'learning_rate': (0.02, 0.3, True, False),
+    'min_child_weight': (1, 20, True, False),
+    'subsample': (0.6, 1.0, False, False),
+    'colsample_bytree': (0.6, 1.0, False, False),
+    'reg_lambda': (0.1, 10.0, True, False),
+}
+METRICS = {'win': 'logloss', 'bid': 'rmse'}
+
+
+def time_folds(dates, n_folds: int = 3, valid_frac: float = 0.15) -> list:
+    """(train, valid) row positions for expanding-window folds over ``dates``.
+
+    The last ``n_folds * valid_frac`` of the rows, in date order, are cut into
+    ``n_folds`` validation blocks. Each block trains on the rows dated strictly before
+    its first day, so bids from the same day never straddle the split.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    order = np.argsort(dates, kind='stable')
+    n, size = len(order), int(len(order) * valid_frac)
+    if size < 1:
+        raise ValueError('Not enough rows for the requested folds')
+    folds = []
+    for k in range(n_folds, 0, -1):
+        valid = order[n - k * size:n - (k - 1) * size]
+        train = np.flatnonzero(dates < dates[valid].min())
+        if len(train):
+            folds.append((train, np.sort(valid)))
+    if not folds:
+        raise ValueError('Every validation block starts on the first date; no rows left to train on')
+    return folds
+
+
+def sample_params(n: int, seed: int = 42) -> list:
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for _ in range(n):
+        params = {}
+        for name, (low, high, log, integer) in SEARCH_SPACE.items():
+            if integer:
+                params[name] = int(rng.integers(low, high + 1))
+            else:
+                value = math.exp(rng.uniform(math.log(low), math.log(high))) if log else rng.uniform(low, high)
+                params[name] = round(float(value), 4)
+        candidates.append(params)
+    return candidates
+
+
+def _estimator(model: str, params: dict, n_rounds: int, early_stopping_rounds: int, n_jobs: int):
+    base = CLF_PARAMS if model == 'win' else REG_PARAMS
+    cls = XGBClassifier if model == 'win' else XGBRegressor
+    return cls(**{**base, **params, 'n_estimators': n_rounds, 'eval_metric': METRICS[model],
+                  'early_stopping_rounds': early_stopping_rounds, 'n_jobs': n_jobs})
+
+
+def _latency_ms_per_1k(estimator, Xv: np.ndarray, repeat: int = 5) -> float:
+    rows = Xv[:1000] if len(Xv) >= 1000 else np.resize(Xv, (1000, Xv.shape[1]))
+    predict = estimator.predict_proba if hasattr(estimator, 'predict_proba') else estimator.predict
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(rows)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def evaluate(model: str, params: dict, Xt: np.ndarray, y: np.ndarray, folds: list, n_rounds: int,
+             early_stopping_rounds: int = 25, n_jobs: int = 1) -> dict:
+    """Mean validation score, rounds kept, fit seconds and latency over ``folds``."""
+    scores, rounds, stopped, fit_s, latency = [], [], [], [], []
+    for train, valid in folds:
+        est = _estimator(model, params, n_rounds, early_stopping_rounds, n_jobs)
+        start = time.perf_counter()
+        est.fit(Xt[train], y[train], eval_set=[(Xt[valid], y[valid])], verbose=False)
+        fit_s.append(time.perf_counter() - start)
+        history = est.evals_result()['validation_0'][METRICS[model]]
+        best = getattr(est, 'best_iteration', None)
+        best = len(history) - 1 if best is None else best
+        scores.append(history[best])
+        rounds.append(best + 1)
+        stopped.append(len(history) < n_rounds)
+        latency.append(_latency_ms_per_1k(est, Xt[valid]))
+    return {
+        'score': float(np.mean(scores)),
+        'score_std': float(np.std(scores)),
+        'best_rounds': int(round(np.mean(rounds))),
+        'stopped_early': all(stopped),
+        'fit_s_per_fold': float(np.mean(fit_s)),
+        'latency_ms_per_1k': float(np.median(latency)),
+    }
+
+
+def search(model: str, Xt: np.ndarray, y: np.ndarray, folds: list, candidates: list, method: str = 'halving',
+           max_rounds: int = 900, eta: int = 3, workers: int = None, early_stopping_rounds: int = 25) -> list:
+    """Leaderboard rows for one model: one per (candidate, rung) evaluated."""
+    if method not in ('halving', 'random'):
+        raise ValueError("method must be 'halving' or 'random'")
+    workers = workers or min(len(candidates), default_n_jobs(1))
+    n_jobs = max(1, default_n_jobs(1) // workers)
+    rungs = 1
+    if method == 'halving':
+        while len(candidates) // eta ** rungs >= 1 and max_rounds // eta ** rungs >= early_stopping_rounds:
+            rungs += 1
+    alive = list(range(len(candidates)))
+    rows, results = [], {}
+    for rung in range(rungs):
+        budget = max_rounds // eta ** (rungs - 1 - rung)
+        # a candidate that early-stopped on every fold would grow the same trees with a bigger budget
+        refit = [i for i in alive if not (i in results and results[i]['stopped_early'])]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {i: pool.submit(evaluate, model, candidates[i], Xt, y, folds, budget, early_stopping_rounds, n_jobs)
+                       for i in refit}
+            results.update({i: f.result() for i, f in futures.items()})
+        for i in alive:
+            rows.append({'model': model, 'metric': METRICS[model], 'candidate': i, 'rung': rung, 'budget_rounds': budget,
+                         **results[i], 'params': json.dumps(candidates[i], sort_keys=True)})
+        if rung < rungs - 1:
+            alive = sorted(alive, key=lambda i: results[i]['score'])[:max(1, math.ceil(len(alive) / eta))]
+    return rows
+
+
+def tune(X: pd.DataFrame, y_reg: pd.Series, y_clf: pd.Series, dates, categorical_cols, numeric_cols,
+         n_candidates: int = 16, n_folds: int = 3, method: str = 'halving', max_rounds: int = 900, eta: int = 3,
+         workers: int = None, seed: int = 42) -> pd.DataFrame:
+    """Search both models on time-ordered folds and return the combined leaderboard.
+
+    The preprocessor is fitted once on all rows and shared by every fold; trees do not
+    depend on the scaling, and only the imputation medians see the validation rows.
+    """
+    _, Xt, keep = shared_matrix(X, y_reg.name, categorical_cols, numeric_cols)
+    folds = time_folds(dates, n_folds)
+    candidates = sample_params(n_candidates, seed)
+    rows = search('win', Xt, np.asarray(y_clf), folds, candidates, method, max_rounds, eta, workers)
+    rows += search('bid', np.ascontiguousarray(Xt[:, keep]), np.asarray(y_reg, dtype=float), folds, candidates,
+                   method, max_rounds, eta, workers)
+    board = pd.DataFrame(rows)
+    return board.sort_values(['model', 'rung', 'score'], ascending=[False, False, True]).reset_index(drop=True)
+
+
+def best_params(board: pd.DataFrame, model: str, max_latency_ms: float = None) -> dict:
+    """XGBoost params of the pick for ``model``, with ``n_estimators`` from early stopping.
+
+    Each candidate counts with its last (largest-budget) evaluation. Candidates slower
+    than ``max_latency_ms`` per 1k rows are dropped; of the rest, the best score among
+    those that got furthest wins.
+    """
+    rows = board[board['model'] == model].sort_values('rung').groupby('candidate').tail(1)
+    if max_latency_ms is not None:
+        rows = rows[rows['latency_ms_per_1k'] <= max_latency_ms]
+        if rows.empty:
+            raise ValueError(f'No {model} candidate predicts 1k rows within {max_latency_ms} ms')
+    rows = rows[rows['rung'] == rows['rung'].max()]
+    best = rows.sort_values('score').iloc[0]
+    return {**json.loads(best['params']), 'n_estimators': int(best['best_rounds'])}
+
+
+def save_leaderboard(board: pd.DataFrame, output_dir: str) -> Path:
+    p = Path(output_dir)
+    p.mkdir(parents=True, exist_ok=True)
+    board.to_csv(p / 'leaderboard.csv', index=False)
+    return p / 'leaderboard.csv'
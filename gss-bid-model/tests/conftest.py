@@ -0,0 +1,21 @@
+import tempfile
+from pathlib import Path
+import pytest
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+from src.data_loader import save_sample_data
+from src.models import build_preprocessor
+
+
+@pytest.fixture(scope='session')
+def win_pipeline():
+    """A small fitted win-probability pipeline (BidAmount among its inputs) and its training X."""
+    tmpdir = Path(tempfile.mkdtemp())
+    df = save_sample_data(str(tmpdir / 'sample.csv'), n=300)
+    X = df.drop(columns=['BidDate', 'WinStatus'])
+    clf = Pipeline([
+        ('pre', build_preprocessor(['ProjectType', 'Location', 'ClientType'], ['BidAmount', 'EstimatedCost', 'CompetitorCount'])),
+        ('model', XGBClassifier(n_estimators=20, max_depth=3, eval_metric='logloss', random_state=42))
+    ])
+    clf.fit(X, df['WinStatus'])
+    return clf, X
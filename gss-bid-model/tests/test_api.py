@@ -0,0 +1,47 @@
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+import api
+from gss_common.startup import Readiness
+from src.fee_table import build_fee_table
+
+REQUEST = {'BidDate': '2024-03-15', 'ProjectType': 'Commercial', 'Location': 'NY', 'ClientType': 'Private',
+           'EstimatedCost': 100000.0, 'CompetitorCount': 3, 'BidAmount': 120000.0}
+
+
+@pytest.mark.parametrize('query', ['strategy=anneal', 'strategy=golden&tol=1e-17', 'tol=0',
+                                   'pct_range=1.5', 'pct_range=0', 'pct_range=nan', 'n_steps=0'])
+def test_optimize_rejects_bad_search_options(query):
+    # validated before the models are needed, so no startup here
+    r = TestClient(api.app).post(f'/optimize?{query}', json=REQUEST)
+    assert r.status_code == 422
+
+
+@pytest.mark.parametrize('query', ['pct_range=1.5', 'pct_range=-0.2', 'n_steps=0'])
+def test_optimize_batch_rejects_bad_window(query):
+    r = TestClient(api.app).post(f'/optimize_batch?{query}', json=[REQUEST, REQUEST])
+    assert r.status_code == 422
+
+
+def test_health_reports_models_preloaded_before_startup(monkeypatch):
+    calls = []
+    readiness = Readiness(lambda: calls.append('load'), lambda: calls.append('warmup'))
+    monkeypatch.setattr(api, 'readiness', readiness)
+    client = TestClient(api.app)
+    assert client.get('/health').json()['models_loaded'] is False
+
+    readiness.preload()  # as gss_common.prefork's parent does before forking
+    api.startup_event()  # a worker's startup: only warms up
+    assert readiness.wait(timeout=5) and calls == ['load', 'warmup']
+    assert client.get('/health').json()['models_loaded'] is True
+
+
+def test_fee_table_over_the_error_threshold_is_not_served(win_pipeline, monkeypatch):
+    clf, X = win_pipeline
+    table = build_fee_table(clf, X)
+    path = tempfile.mkdtemp()
+    monkeypatch.setattr(api, 'FEE_TABLE_MAX_P95_ERROR', 0.02)
+    for error, served in [({}, False), ({'p95_abs': 0.4}, False), ({'p95_abs': 0.01}, True)]:
+        table.error = error
+        table.save(path)
+        assert (api._load_fee_table(path) is not None) == served
@@ -0,0 +1,64 @@
+import json
+import tempfile
+from pathlib import Path
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder
+from xgboost import XGBClassifier, XGBRegressor
+from gss_common.artifact_store import LookupTable, artifact_version, convert, load_artifacts, save_artifacts, verify
+
+
+def test_bundle_round_trip_with_mapped_tables(win_pipeline):
+    _, X = win_pipeline
+    features = ['EstimatedCost', 'CompetitorCount', 'BidAmount']
+    rng = np.random.default_rng(0)
+    bundle = {
+        'features': features,
+        'encoders': {'Location': {v: float(i) for i, v in enumerate(sorted(X['Location'].unique()))},
+                     'ZipCode': LabelEncoder().fit(['02139', '10001', '94105'])},
+        'train_medians': X[features].median(),
+        'model_full': XGBRegressor(n_estimators=10, max_depth=3).fit(X[features], X['BidAmount']),
+        'clf': XGBClassifier(n_estimators=10, max_depth=3).fit(X[features], rng.integers(0, 2, len(X))),
+        'multi': XGBClassifier(n_estimators=10, max_depth=3).fit(X[features], rng.integers(0, 3, len(X))),
+        'calibration': None,
+    }
+    tmp = Path(tempfile.mkdtemp())
+    joblib.dump(bundle, tmp / 'bundle.joblib')
+    out = convert([tmp / 'bundle.joblib'], tmp / 'artifacts')
+    loaded = load_artifacts(out)
+
+    assert loaded['features'] == features and loaded['calibration'] is None
+    assert isinstance(loaded['encoders']['ZipCode'].key_array, np.memmap)
+    assert loaded['encoders']['ZipCode'].get('10001') == 1.0 and loaded['encoders']['ZipCode'].get('99999', -1) == -1
+    assert list(loaded['encoders']['ZipCode'].classes_) == ['02139', '10001', '94105']
+    assert dict(loaded['encoders']['Location']) == bundle['encoders']['Location']
+    assert loaded['train_medians'].get('EstimatedCost') == bundle['train_medians']['EstimatedCost']
+    assert loaded['train_medians'].get(None, np.nan) is np.nan
+    assert all(diff == 0 or diff < 1e-6 for diff in verify(bundle, loaded).values())
+
+    Xq = X[features].head(20)
+    np.testing.assert_allclose(loaded['multi'].predict_proba(Xq.to_numpy()), bundle['multi'].predict_proba(Xq))
+    np.testing.assert_array_equal(loaded['clf'].predict(Xq), bundle['clf'].predict(Xq))
+    assert not hasattr(loaded['model_full'], 'predict_proba')
+
+    # rewritten in place: the version changes, the old directory is swapped out whole
+    version = artifact_version(out)
+    save_artifacts({**bundle, 'features': features[:2]}, out)
+    assert artifact_version(out) != version and load_artifacts(out)['features'] == features[:2]
+    assert sorted(p.name for p in tmp.iterdir()) == ['artifacts', 'bundle.joblib']
+
+
+def test_unsupported_entries_and_newer_formats_are_rejected():
+    tmp = Path(tempfile.mkdtemp())
+    with pytest.raises(TypeError):
+        save_artifacts({'model': object()}, tmp / 'a')
+    assert not (tmp / 'a').exists()
+
+    save_artifacts({'table': LookupTable.from_items([('b', 2), ('a', 1)])}, tmp / 'b')
+    manifest = json.loads((tmp / 'b' / 'manifest.json').read_text())
+    (tmp / 'b' / 'manifest.json').write_text(json.dumps({**manifest, 'format_version': 99}))
+    with pytest.raises(ValueError, match='format version 99'):
+        load_artifacts(tmp / 'b')
+    with pytest.raises(ValueError, match='not unique'):
+        LookupTable.from_items([(1, 1.0), ('1', 2.0)])
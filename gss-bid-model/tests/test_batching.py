@@ -0,0 +1,31 @@
+import pytest
+from gss_common.batching import MicroBatcher
+
+
+def test_coalesces_requests_and_isolates_item_errors():
+    sizes = []
+
+    def fn(items):
+        sizes.append(len(items))
+        return [ValueError(f'bad {x}') if x < 0 else x * 2 for x in items]
+
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=200, workers=1)
+    futures = [batcher.submit(x) for x in [1, 2, -3, 4, 5, 6, 7, 8, 9, 10]]
+    assert [f.result(timeout=5) for i, f in enumerate(futures) if i != 2] == [2, 4, 8, 10, 12, 14, 16, 18, 20]
+    with pytest.raises(ValueError, match='bad -3'):
+        futures[2].result(timeout=5)
+    assert sizes == [4, 4, 2]
+    assert batcher.stats()['batches'] == 3 and batcher.stats()['largest_batch'] == 4
+    batcher.close()
+
+
+def test_batch_failure_reaches_every_caller():
+    def fn(items):
+        raise RuntimeError('model unavailable')
+
+    batcher = MicroBatcher(fn, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(x) for x in range(3)]
+    for f in futures:
+        with pytest.raises(RuntimeError, match='model unavailable'):
+            f.result(timeout=5)
+    batcher.close()
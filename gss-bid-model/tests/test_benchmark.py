@@ -0,0 +1,50 @@
+import os
+import tempfile
+from pathlib import Path
+import pytest
+from src.benchmark import compare, measure, process_memory, process_tree, summarize
+from src.data_loader import save_sample_data
+
+
+def test_summary_and_regression_flags():
+    stats = summarize([0.001] * 98 + [0.010, 0.020], items_per_call=10)
+    assert stats['p50_ms'] == 1.0 and stats['p99_ms'] > 9.0 and stats['calls'] == 100
+    assert abs(stats['items_per_s'] - 1000 / 0.128) < 1e-6
+
+    base = {'results': [{'name': 'a', 'scale': 10, 'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0},
+                        {'name': 'b', 'scale': None, 'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0}]}
+    new = {'results': [{'name': 'a', 'scale': 10, 'p50_ms': 1.05, 'p95_ms': 2.0, 'p99_ms': 3.0},
+                       {'name': 'b', 'scale': None, 'p50_ms': 1.0, 'p95_ms': 3.0, 'p99_ms': 3.0},
+                       {'name': 'c', 'scale': None, 'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0}]}
+    rows = compare(base, new, threshold=0.1)
+    assert [(r['name'], r['regression']) for r in rows] == [('a', False), ('b', True)]
+
+
+def test_measure_reports_memory():
+    stats = measure(lambda n: bytearray(n), lambda i: (1 << 20,), iterations=5, warmup=1)
+    assert stats['calls'] == 5 and stats['peak_rss_mb'] > 0
+
+
+@pytest.mark.skipif(not Path('/proc/self/smaps_rollup').exists(), reason='needs /proc/<pid>/smaps_rollup')
+def test_process_memory_of_a_forked_child():
+    block = bytearray(32 << 20)  # touched, so resident and shared with the child after fork
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.read(r, 1)
+        os._exit(0)
+    try:
+        assert process_tree(os.getpid())[0] == os.getpid() and pid in process_tree(os.getpid())
+        parent, child = process_memory(os.getpid()), process_memory(pid)
+        assert child['rss_mb'] >= 32 and child['uss_mb'] < child['pss_mb'] < child['rss_mb']
+        assert parent['uss_mb'] < parent['rss_mb']
+    finally:
+        os.write(w, b'x')
+        os.waitpid(pid, 0)
+    assert process_memory(pid) is None and len(block)
+
+
+def test_sample_data_scales_past_the_timestamp_range():
+    df = save_sample_data(str(Path(tempfile.mkdtemp()) / 'sample.csv'), n=120_000, seed=0)
+    assert len(df) == 120_000 and df['BidDate'].is_monotonic_increasing
+    assert df['BidDate'].min() == df['BidDate'].iloc[0] and df['BidDate'].nunique() == 3 * 365
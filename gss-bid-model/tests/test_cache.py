@@ -0,0 +1,25 @@
+import time
+import numpy as np
+from gss_common.cache import RecommendationCache
+
+
+def test_lru_ttl_and_version_invalidation():
+    cache = RecommendationCache(maxsize=2, ttl=0.05)
+    k1 = RecommendationCache.make_key(np.array([1.0, 0.0]), 'grid', 0.01)
+    k2 = RecommendationCache.make_key(np.array([0.0, 1.0]), 'grid', 0.01)
+    k3 = RecommendationCache.make_key(np.array([1.0, 0.0]), 'golden', 0.01)
+    assert len({k1, k2, k3}) == 3
+    assert k1 == RecommendationCache.make_key(np.array([1, 0]), 'grid', 0.01)
+
+    cache.put(k1, 'a', 'v1')
+    cache.put(k2, 'b', 'v1')
+    assert cache.get(k1, 'v1') == 'a'
+    cache.put(k3, 'c', 'v1')  # evicts k2, the least recently used
+    assert cache.get(k2, 'v1') is None and cache.stats()['evictions'] == 1
+
+    time.sleep(0.06)
+    assert cache.get(k1, 'v1') is None  # expired
+
+    cache.put(k1, 'a', 'v1')
+    assert cache.get(k1, 'v2') is None and cache.stats()['invalidations'] == 1
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 3
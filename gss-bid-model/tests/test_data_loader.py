@@ -0,0 +1,31 @@
+import json
+import tempfile
+from pathlib import Path
+import pandas as pd
+import pytest
+from src.data_loader import DTYPES, load_bid_history, load_csv, save_sample_data
+
+pytest.importorskip('pyarrow')
+
+
+def test_cached_history_matches_csv_and_filters_by_month():
+    tmp = Path(tempfile.mkdtemp())
+    save_sample_data(str(tmp / 'bids.csv'), n=120)
+    cache = tmp / 'cache'
+    expected = load_csv(str(tmp / 'bids.csv')).astype({c: t for c, t in DTYPES.items()})
+
+    df = load_bid_history(str(tmp / 'bids.csv'), cache_dir=str(cache), chunksize=50)
+    assert sorted(p.name for p in cache.glob('month=*')) == ['month=2023-01', 'month=2023-02', 'month=2023-03', 'month=2023-04']
+    assert df['Location'].dtype == 'category' and df['BidAmount'].dtype == 'float32'
+    pd.testing.assert_frame_equal(df, expected, check_categorical=False)
+
+    part = load_bid_history(str(tmp / 'bids.csv'), columns=['BidAmount'], start='2023-02-10', end='2023-03-05',
+                            cache_dir=str(cache))
+    assert list(part.columns) == ['BidDate', 'BidAmount']
+    window = expected[(expected['BidDate'] >= '2023-02-10') & (expected['BidDate'] <= '2023-03-05')]
+    pd.testing.assert_frame_equal(part, window[['BidDate', 'BidAmount']].reset_index(drop=True))
+
+    # a changed CSV invalidates the cache
+    save_sample_data(str(tmp / 'bids.csv'), n=40)
+    assert len(load_bid_history(str(tmp / 'bids.csv'), cache_dir=str(cache))) == 40
+    assert json.loads((cache / 'manifest.json').read_text())['rows'] == 40
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from src.feature_engineering import add_rolling_group_features
+
+
+def _mean_without_own(rolls, own: pd.Series) -> pd.Series:
+    """pandas' time-window mean with each row's own value taken out."""
+    total = pd.concat([r[own.name].sum() for r in rolls]) - own.fillna(0)
+    count = pd.concat([r[own.name].count() for r in rolls]) - own.notna()
+    return total / count.where(count > 0)
+
+
+def test_rolling_windows_are_time_based():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        'BidDate': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 200, n), 'D'),  # ties and gaps
+        'ClientType': rng.choice(['Gov', 'Private', None], n),
+        'BidAmount': rng.normal(1e5, 2e4, n),
+        'WinStatus': rng.integers(0, 2, n),
+    })
+    df.loc[::7, 'BidAmount'] = np.nan
+
+    out = add_rolling_group_features(df, ['ClientType'], 'BidAmount', [7, 30])
+    ordered = df.sort_values('BidDate', kind='stable')
+    assert out.index.equals(ordered.index)
+    for w in [7, 30]:
+        groups = [g.rolling(f'{w}D', on='BidDate', min_periods=1) for _, g in ordered.groupby('ClientType')]
+        # both leave out the row's own value (a label)
+        for col, name in (('BidAmount', f'ClientType_rolling_{w}d_mean_BidAmount'), ('WinStatus', f'ClientType_rolling_{w}d_winrate')):
+            expected = _mean_without_own(groups, ordered[col]).reindex(out.index)
+            np.testing.assert_allclose(out[name].to_numpy(float), expected.to_numpy(float), rtol=1e-9)
+    assert out.loc[df['ClientType'].isna(), 'ClientType_rolling_7d_winrate'].isna().all()
@@ -0,0 +1,28 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+from src.data_loader import save_sample_data
+from src.feature_engineering import add_rolling_group_features, add_lag_features
+from src.feature_store import FeatureStore, append_features
+
+
+def test_incremental_store_matches_full_recompute():
+    df = save_sample_data(str(Path(tempfile.mkdtemp()) / 'sample.csv'), n=600)
+    df.loc[df.index[::13], 'BidAmount'] = np.nan
+    groups = ['ClientType', 'Location']
+    full = add_rolling_group_features(df, groups, 'BidAmount', [7, 30, 90])
+    full = add_lag_features(full, groups, ['BidAmount', 'WinStatus'], [1, 2])
+    cols = FeatureStore().feature_columns()
+    assert cols == list(full.columns[-len(cols):])
+
+    # first run sees 450 rows, the second the whole file; the state goes through disk in between
+    path = tempfile.mkdtemp()
+    append_features(df.iloc[:450], path)
+    assert FeatureStore.load(path).rows_seen == 450
+    features = append_features(df, path)
+    assert FeatureStore.load(path).rows_seen == 600
+    np.testing.assert_allclose(features.loc[full.index, cols].to_numpy(float), full[cols].to_numpy(float), rtol=1e-9)
+
+    # history rewritten rather than appended: rebuilt from scratch
+    features = append_features(df.iloc[::-1].reset_index(drop=True), path)
+    assert FeatureStore.load(path).rows_seen == 600 and len(features) == 600
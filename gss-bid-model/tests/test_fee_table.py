@@ -0,0 +1,75 @@
+import json
+import tempfile
+from pathlib import Path
+import numpy as np
+import pytest
+from src.fee_table import FeeTable, build_fee_table, evaluate
+
+
+def test_fee_table_roundtrip_and_lookup(win_pipeline):
+    clf, X = win_pipeline
+    table = build_fee_table(clf, X, ratios=np.geomspace(0.5, 2.0, 33))
+    buckets = np.searchsorted(table.bucket_edges, X['CompetitorCount'], side='right')
+    assert len(table.segments) == X[['ProjectType', 'Location', 'ClientType']].assign(b=buckets).drop_duplicates().shape[0]
+
+    path = tempfile.mkdtemp()
+    table.save(path)
+    loaded = FeeTable.load(path)
+    assert isinstance(loaded.p_win, np.memmap)
+
+    # at a cell's own cost the table's grid points are its scored curve
+    i = 0
+    grid_bids = loaded.ref_cost[i] * loaded.ratios
+    np.testing.assert_allclose(loaded.lookup(i, grid_bids, loaded.ref_cost[i]), table.p_win[i], rtol=1e-6)
+
+    row = X.iloc[0]
+    i = loaded.cell_index(row)
+    assert loaded.segments[i][:3] == tuple(row[['ProjectType', 'Location', 'ClientType']])
+    assert loaded.cell_index(row.drop('Location')) is None
+    cost = row['EstimatedCost']
+    assert loaded.scorer(row, 0.6 * cost, 1.8 * cost) is not None
+    assert loaded.scorer(row, 0.4 * cost, 1.8 * cost) is None
+
+
+def test_fee_table_lookup_follows_cost_and_competitors(win_pipeline):
+    clf, X = win_pipeline
+    table = build_fee_table(clf, X)
+    row = X.iloc[0].copy()
+    row['CompetitorCount'] = 1
+    bids = np.linspace(0.9, 1.1, 5) * row['EstimatedCost']
+
+    cheap, crowded = row.copy(), row.copy()
+    cheap['EstimatedCost'] = row['EstimatedCost'] / 2
+    crowded['CompetitorCount'] = 12
+    base, half_cost = table.scorer(row, bids[0], bids[-1]), table.scorer(cheap, bids[0], bids[-1])
+    # the same absolute bids on half the cost are twice the ratio
+    np.testing.assert_allclose(half_cost(bids), base(2 * bids))
+    assert not np.allclose(half_cost(bids), base(bids))
+    # another competitor bucket is another cell, or none if it was not seen
+    assert table.cell_index(crowded) != table.cell_index(row)
+
+
+def test_evaluate_against_live_scoring(win_pipeline):
+    clf, X = win_pipeline
+    table = build_fee_table(clf, X.iloc[:200])
+    err = evaluate(table, clf, X.iloc[200:])
+    assert err['rows'] == 100 and 0 < err['coverage'] <= 1
+    assert 0 <= err['mean_abs'] <= err['p95_abs'] <= err['max_abs'] <= 1
+    assert 0 <= err['best_bid_rel_error']['mean'] <= err['best_bid_rel_error']['max']
+    assert evaluate(table, clf, X.iloc[:0]) == {'rows': 0, 'coverage': 0.0, 'pct_range': 0.2, 'n_steps': 41}
+
+    # served only with a measured error within the threshold
+    assert not table.validated()
+    table.error = err
+    assert table.validated(max_p95_abs=err['p95_abs']) and not table.validated(max_p95_abs=err['p95_abs'] / 2)
+
+
+def test_old_table_format_is_rejected(win_pipeline):
+    clf, X = win_pipeline
+    path = Path(tempfile.mkdtemp())
+    build_fee_table(clf, X).save(str(path))
+    manifest = json.loads((path / 'manifest.json').read_text())
+    del manifest['bucket_edges']
+    (path / 'manifest.json').write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match='older version'):
+        FeeTable.load(str(path))
@@ -0,0 +1,61 @@
+import tempfile
+import time
+from urllib.error import HTTPError
+import pandas as pd
+import pytest
+from src.feature_engineering import merge_fred
+from src.fred_client import FakeFredBackend, FredApiBackend, FredCache, _with_retry
+
+
+def test_refresh_fetches_only_new_observations():
+    path = tempfile.mkdtemp()
+    backend = FakeFredBackend(end='2023-06-30')
+    cache = FredCache(path, backend)
+    assert cache.refresh(['UNRATE', 'CPIAUCSL']) == {'UNRATE': 102, 'CPIAUCSL': 102}
+    assert cache.manifest['series']['UNRATE']['last_date'] == '2023-06-01'
+
+    backend.end = pd.Timestamp('2023-09-30')
+    backend.calls.clear()
+    assert FredCache(path, backend).refresh(['UNRATE', 'CPIAUCSL']) == {'UNRATE': 3, 'CPIAUCSL': 3}
+    assert {start for _, start, _ in backend.calls} == {'2023-06-02'}
+
+    # the cache holds exactly what one full fetch returns
+    full = FakeFredBackend(end='2023-09-30').get_series('UNRATE')
+    cached = FredCache(path, backend).frame(['UNRATE'])['UNRATE']
+    pd.testing.assert_series_equal(cached, full, check_names=False, check_freq=False)
+
+
+def test_merge_fred_reads_from_cache():
+    cache = FredCache(tempfile.mkdtemp(), FakeFredBackend(end='2023-12-31'))
+    cache.refresh(['UNRATE'])
+    df = pd.DataFrame({'BidDate': pd.to_datetime(['2023-03-15', '2023-01-01', '2023-07-31'])})
+    merged = merge_fred(df, cache).sort_values('BidDate')
+    expected = cache.frame()['UNRATE'].loc[['2023-01-01', '2023-03-01', '2023-07-01']].to_numpy()
+    assert merged['UNRATE'].tolist() == expected.tolist()
+
+
+def test_retry_only_transient_errors(monkeypatch):
+    calls = []
+
+    def flaky(exc, failures):
+        def fn():
+            calls.append(exc)
+            if len(calls) <= failures:
+                raise exc
+            return 'ok'
+        return fn
+
+    assert _with_retry(flaky(ConnectionError('reset'), 2), backoff_s=0) == 'ok' and len(calls) == 3
+    calls.clear()
+    too_many = HTTPError('https://api.stlouisfed.org', 429, 'Too Many Requests', None, None)
+    assert _with_retry(flaky(too_many, 1), backoff_s=0) == 'ok' and len(calls) == 2
+
+    # configuration errors fail on the first call, and refresh keeps going without sleeping
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        _with_retry(flaky(RuntimeError('FRED API key not set'), 1), backoff_s=0)
+    assert len(calls) == 1
+    monkeypatch.delenv('FRED_API_KEY', raising=False)
+    start = time.monotonic()
+    results = FredCache(tempfile.mkdtemp(), FredApiBackend(api_key=None)).refresh(['UNRATE'])
+    assert isinstance(results['UNRATE'], RuntimeError) and time.monotonic() - start < 0.5
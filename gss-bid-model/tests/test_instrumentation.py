@@ -0,0 +1,45 @@
+import time
+from gss_common import instrumentation
+from gss_common.instrumentation import SamplingProfiler, endpoint, fallback, stage
+
+
+def test_stages_record_self_time_per_endpoint():
+    instrumentation.reset()
+    with endpoint('predict'):
+        with stage('optimizer'):
+            time.sleep(0.01)
+            with stage('model'):
+                time.sleep(0.02)
+    fallback('x')
+    fallback('x')
+    stats = instrumentation.stats()
+    stages = stats['stages']['predict']
+    assert stages['model']['calls'] == 1
+    assert stages['model']['total_s'] >= 0.02
+    assert 0.01 <= stages['optimizer']['total_s'] < 0.02
+    assert stats['fallbacks'] == {'x': 2}
+    instrumentation.reset()
+    assert instrumentation.stats() == {'stages': {}, 'fallbacks': {}}
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profiler_samples_only_when_enabled():
+    off = SamplingProfiler(rate=0.0)
+    with off.profile('predict'):
+        busy(0.01)
+    assert not off.enabled and off.collapsed() == ''
+
+    on = SamplingProfiler(rate=1.0, interval=0.001)
+    with on.profile('predict'):
+        busy(0.05)
+    lines = on.collapsed().splitlines()
+    assert on.profiled['predict'] == 1
+    assert lines and all(line.startswith('predict;') for line in lines)
+    assert any('test_instrumentation.py:busy' in line for line in lines)
+    on.reset()
+    assert on.collapsed() == ''
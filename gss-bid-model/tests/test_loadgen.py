@@ -0,0 +1,41 @@
+import asyncio
+import httpx
+from fastapi import FastAPI, HTTPException
+from src.loadgen import RequestMix, capacity_at_slo, run_level, saturation
+
+app = FastAPI()
+
+
+@app.post('/echo')
+async def echo(body: dict):
+    if body['i'] < 0:
+        raise HTTPException(status_code=500)
+    await asyncio.sleep(0.001)
+    return body
+
+
+def test_mix_draws_hot_set_and_fresh_bodies():
+    bodies = [{'i': i} for i in range(10)]
+    mix = RequestMix({'a': (1.0, '/echo', bodies), 'b': (0.0, '/echo', bodies)}, repeat_frac=0.0, hot_set=2)
+    assert mix.names == ['a']
+    assert [mix.next()[2]['i'] for _ in range(10)] == [2, 3, 4, 5, 6, 7, 8, 9, 2, 3]
+    hot = RequestMix({'a': (1.0, '/echo', bodies)}, repeat_frac=1.0, hot_set=2)
+    assert {hot.next()[2]['i'] for _ in range(50)} == {0, 1}
+
+
+def test_level_counts_throughput_and_errors():
+    mix = RequestMix({'ok': (3.0, '/echo', [{'i': i} for i in range(100)]),
+                      'fail': (1.0, '/echo', [{'i': -1}])}, seed=1)
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://t') as client:
+            return [await run_level(client, mix, c, duration=0.3) for c in (1, 4)]
+
+    levels = asyncio.run(go())
+    for level in levels:
+        assert level['requests'] > 0 and 0.1 < level['error_rate'] < 0.5 and level['errors'] == {'500': level['requests'] - level['calls']}
+        assert level['throughput_rps'] > 0 and set(level['p95_ms_by_kind']) == {'ok'}
+    assert saturation(levels, max_error_rate=0.01) is None
+    best = saturation(levels, max_error_rate=0.5)
+    assert best['throughput_rps'] == max(lv['throughput_rps'] for lv in levels)
+    assert capacity_at_slo(levels, slo_p95_ms=0.0, max_error_rate=0.5) is None
@@ -0,0 +1,28 @@
+import tempfile
+import numpy as np
+import pandas as pd
+from src.feature_engineering import merge_fred
+from src.macro_features import MacroFeatures
+
+
+def test_asof_join_keeps_row_order_and_matches_merge_asof():
+    monthly = pd.Series([4.0, 4.2, 4.1], index=pd.to_datetime(['2023-01-01', '2023-02-01', '2023-03-01']))
+    weekly = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(['2023-01-20', '2023-02-10', '2023-02-24']))
+    fred = pd.DataFrame({'UNRATE': monthly, 'RATE': weekly})
+    df = pd.DataFrame({'BidDate': pd.to_datetime(['2023-02-15', '2022-12-31', '2023-03-05', None, '2023-01-25']),
+                       'x': range(5)}, index=[10, 11, 12, 13, 14])
+
+    merged = merge_fred(df, fred)
+    assert list(merged.index) == list(df.index) and list(merged['x']) == list(df['x'])
+    # each series carried forward on its own
+    for col, series in (('UNRATE', monthly), ('RATE', weekly)):
+        ref = pd.merge_asof(df.dropna().sort_values('BidDate'), series.rename(col).rename_axis('BidDate').reset_index(),
+                            on='BidDate', direction='backward').set_index(df.dropna().sort_values('BidDate').index)
+        np.testing.assert_array_equal(merged.loc[ref.index, col], ref[col])
+    assert merged.loc[13, ['UNRATE', 'RATE']].isna().all()
+
+    path = tempfile.mkdtemp()
+    MacroFeatures.from_frame(fred).save(path)
+    macro = MacroFeatures.load(path)
+    assert macro.features('2023-02-15') == {'UNRATE': 4.2, 'RATE': 2.0}
+    assert np.isnan(macro.features('2022-12-31')['UNRATE'])
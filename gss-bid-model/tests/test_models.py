@@ -0,0 +1,35 @@
+import tempfile
+from pathlib import Path
+import joblib
+import numpy as np
+from src.data_loader import save_sample_data
+from src.models import load_models, train_models
+from src.native import load_native
+from src.timing import StageTimer
+
+
+def test_shared_preprocessing_keeps_target_out_of_regressor():
+    tmp = Path(tempfile.mkdtemp())
+    df = save_sample_data(str(tmp / 'sample.csv'), n=200)
+    X = df.drop(columns=['BidDate', 'WinStatus'])
+    timer = StageTimer()
+    train_models(X, df['BidAmount'], df['WinStatus'], ['ProjectType', 'Location', 'ClientType'],
+                 ['BidAmount', 'EstimatedCost', 'CompetitorCount'], str(tmp), n_jobs=1, timer=timer)
+    assert {'preprocess', 'fit clf', 'fit reg', 'save'} <= set(timer.timings)
+
+    clf, reg = joblib.load(tmp / 'win_model.joblib'), joblib.load(tmp / 'bid_model.joblib')
+    pre = joblib.load(tmp / 'preprocessor.joblib')
+    assert pre.transform(X).shape[1] == clf.named_steps['model'].n_features_in_
+    assert reg.named_steps['model'].n_features_in_ == clf.named_steps['model'].n_features_in_ - 1
+    # the regressor does not see its own target
+    shifted = X.assign(BidAmount=X['BidAmount'] * 3)
+    np.testing.assert_array_equal(reg.predict(shifted), reg.predict(X))
+
+    native = load_native(str(tmp / 'native'), 'bid_model')
+    np.testing.assert_allclose(native.predict(X.drop(columns=['BidAmount'])), reg.predict(X), rtol=1e-6)
+
+    # the artifact directory is preferred by load_models: native models over mapped arrays
+    native_clf, native_reg, native_pre = load_models(str(tmp))
+    assert native_pre is native_clf.named_steps['pre']
+    np.testing.assert_allclose(native_clf.predict_proba(X), clf.predict_proba(X), rtol=1e-6)
+    np.testing.assert_allclose(native_reg.predict(X), reg.predict(X), rtol=1e-6)
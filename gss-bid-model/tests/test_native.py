@@ -0,0 +1,35 @@
+import tempfile
+import numpy as np
+from sklearn.pipeline import Pipeline
+from xgboost import XGBRegressor
+from src.models import build_preprocessor
+from src.native import export_native, load_native
+from src.optimize import sweep
+
+
+def test_native_export_matches_pipeline(win_pipeline):
+    clf, X = win_pipeline
+    reg = Pipeline([
+        ('pre', build_preprocessor(['ProjectType', 'Location', 'ClientType'], ['EstimatedCost', 'CompetitorCount'])),
+        ('model', XGBRegressor(n_estimators=20, max_depth=3, random_state=42))
+    ])
+    reg.fit(X, X['BidAmount'])
+
+    path = tempfile.mkdtemp()
+    export_native(clf, path, 'win_model')
+    export_native(reg, path, 'bid_model', fmt='json')
+    native_clf, native_reg = load_native(path, 'win_model'), load_native(path, 'bid_model')
+
+    # Missing values and an unseen category exercise imputation and handle_unknown='ignore'
+    Xq = X.head(50).copy()
+    Xq.loc[Xq.index[:5], 'EstimatedCost'] = np.nan
+    Xq.loc[Xq.index[5:10], 'Location'] = None
+    Xq.loc[Xq.index[10:15], 'ProjectType'] = 'never-seen'
+
+    np.testing.assert_allclose(native_clf.named_steps['pre'].transform(Xq), clf.named_steps['pre'].transform(Xq), rtol=1e-12)
+    np.testing.assert_allclose(native_clf.predict_proba(Xq), clf.predict_proba(Xq), rtol=1e-6)
+    np.testing.assert_allclose(native_reg.predict(Xq), reg.predict(Xq), rtol=1e-6)
+    assert not hasattr(native_reg, 'predict_proba')
+
+    expected, actual = sweep(clf, X.iloc[[0]]), sweep(native_clf, X.iloc[[0]])
+    np.testing.assert_allclose(actual['p_win'].values, expected['p_win'].values, rtol=1e-6)
@@ -0,0 +1,38 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.data_loader import save_sample_data
+from src.feature_engineering import add_rolling_group_features, add_lag_features
+from src.feature_store import FeatureStore
+from src.online_features import OnlineFeatures
+
+
+def _batch_features(df):
+    groups = ['ClientType', 'Location']
+    out = add_rolling_group_features(df, groups, 'BidAmount', [7, 30, 90])
+    return add_lag_features(out, groups, ['BidAmount', 'WinStatus'], [1, 2])
+
+
+def test_online_features_match_training_for_the_next_bid():
+    df = save_sample_data(str(Path(tempfile.mkdtemp()) / 'sample.csv'), n=400)
+    history, requests = df.iloc[:300], df.iloc[300:303]
+
+    store = FeatureStore()
+    store.update(history)
+    path = tempfile.mkdtemp()
+    store.save(path)
+    online = OnlineFeatures(FeatureStore.load(path, mmap=True))
+
+    for i, (_, req) in enumerate(requests.iterrows()):
+        # training sees the row with its outcome, which must not leak into its features
+        expected = _batch_features(pd.concat([history, requests.iloc[:i + 1]]))
+        got = online.features(req.drop('WinStatus').to_dict())
+        np.testing.assert_allclose([got[c] for c in online.columns], expected.loc[req.name, online.columns].to_numpy(float), rtol=1e-9)
+        online.record(requests.iloc[[i]])
+
+    assert online.store.rows_seen == 303
+    unseen = online.features({'ClientType': 'nobody', 'Location': None, 'BidAmount': 5.0})
+    # no history yet, and the request's own bid is not part of its features
+    assert np.isnan(unseen['ClientType_rolling_7d_mean_BidAmount']) and np.isnan(unseen['ClientType_lag_1_BidAmount'])
+    assert np.isnan(unseen['Location_rolling_7d_mean_BidAmount'])
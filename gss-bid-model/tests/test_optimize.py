@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from src.optimize import candidate_grid, score_candidates, sweep, sweep_batch
+
+
+def test_batched_sweep_matches_per_candidate_loop(win_pipeline):
+    clf, X = win_pipeline
+    X = X.iloc[[0]]
+    candidates = candidate_grid(float(X['BidAmount'].iloc[0]), 0.2, 41)
+    expected = []
+    for c in candidates:
+        Xc = X.copy()
+        Xc['BidAmount'] = c
+        expected.append(clf.predict_proba(Xc)[0, 1])
+    np.testing.assert_allclose(score_candidates(clf, X, candidates), expected, rtol=1e-6)
+
+    res = sweep(clf, X)
+    assert list(res.columns) == ['candidate', 'p_win', 'expected_profit']
+    np.testing.assert_allclose(res['p_win'], expected, rtol=1e-6)
+
+
+def test_sweep_batch_matches_single_sweeps(win_pipeline):
+    clf, X = win_pipeline
+    X = X.iloc[:5].reset_index(drop=True)
+    for i, res in enumerate(sweep_batch(clf, X, n_steps=11)):
+        pd.testing.assert_frame_equal(res, sweep(clf, X.iloc[[i]], n_steps=11), rtol=1e-6)
+
+
+def test_sweep_imputes_columns_missing_from_payload(win_pipeline):
+    clf, X = win_pipeline
+    res = sweep(clf, X.iloc[[0]][['BidAmount', 'ProjectType']], n_steps=5)
+    assert len(res) == 5 and res['p_win'].between(0, 1).all()
@@ -0,0 +1,46 @@
+import tempfile
+from pathlib import Path
+import joblib
+import numpy as np
+import pytest
+from src.data_loader import save_sample_data
+from src.models import train_models
+from src.native import load_native
+from src.predictor import Predictor
+
+
+@pytest.fixture(scope='module')
+def trained():
+    tmp = Path(tempfile.mkdtemp())
+    df = save_sample_data(str(tmp / 'sample.csv'), n=200, seed=0)
+    X = df.drop(columns=['BidDate', 'WinStatus'])
+    train_models(X, df['BidAmount'], df['WinStatus'], ['ProjectType', 'Location', 'ClientType'],
+                 ['BidAmount', 'EstimatedCost', 'CompetitorCount'], str(tmp), n_jobs=1,
+                 clf_params={'n_estimators': 10}, reg_params={'n_estimators': 10})
+    return tmp, X
+
+
+def test_pipelines_share_one_preprocessing_pass(trained):
+    tmp, X = trained
+    clf, reg = joblib.load(tmp / 'win_model.joblib'), joblib.load(tmp / 'bid_model.joblib')
+    predictor = Predictor(clf, reg)
+    assert predictor.modes == {'clf': 'shared', 'reg': 'shared'}
+    p_win, bid = predictor(X.head(20))
+    np.testing.assert_allclose(p_win, clf.predict_proba(X.head(20))[:, 1], rtol=1e-6)
+    np.testing.assert_allclose(bid, reg.predict(X.head(20)), rtol=1e-6)
+
+    native = Predictor(load_native(str(tmp / 'native'), 'win_model'), load_native(str(tmp / 'native'), 'bid_model'))
+    assert native.modes == {'clf': 'shared', 'reg': 'shared'}
+    np.testing.assert_allclose(native(X.head(20))[1], bid, rtol=1e-6)
+
+
+def test_bare_estimators_use_the_separate_preprocessor(trained):
+    tmp, X = trained
+    clf, reg = joblib.load(tmp / 'win_model.joblib'), joblib.load(tmp / 'bid_model.joblib')
+    pre = joblib.load(tmp / 'preprocessor.joblib')
+    predictor = Predictor(clf.named_steps['model'], reg, pre, probe=X.head(1))
+    assert predictor.modes == {'clf': 'shared', 'reg': 'shared'}
+    np.testing.assert_allclose(predictor(X.head(5))[0], clf.predict_proba(X.head(5))[:, 1], rtol=1e-6)
+    # the bare regressor expects the matrix without its target, which the preprocessor does not produce
+    with pytest.raises(ValueError, match='reg cannot be called'):
+        Predictor(clf, reg.named_steps['model'], pre, probe=X.head(1))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from gss_common.search import MIN_TOL, search
+
+
+def _win_curve(bids):
+    return 1 / (1 + np.exp((bids - 100.0) / 8.0))
+
+
+@pytest.mark.parametrize('strategy', ['coarse_to_fine', 'golden'])
+def test_adaptive_search_matches_grid_with_fewer_evaluations(strategy):
+    grid_bids, grid_p = search(_win_curve, 60.0, 140.0, strategy='grid', n_steps=41)
+    bids, p = search(_win_curve, 60.0, 140.0, strategy=strategy, tol=0.01)
+    assert (bids * p).max() >= (grid_bids * grid_p).max() - 1e-9
+    assert len(bids) < len(grid_bids)
+    assert np.all(np.diff(bids) > 0)
+
+
+def test_model_calls_per_strategy():
+    calls = []
+    score = lambda bids: calls.append(len(bids)) or _win_curve(bids)
+    for strategy, n_calls in [('grid', 1), ('coarse_to_fine', 5), ('golden', 8)]:
+        calls.clear()
+        search(score, 60.0, 140.0, strategy=strategy, tol=0.01)
+        assert len(calls) <= n_calls
+
+
+def test_unknown_strategy_and_empty_grid_rejected():
+    with pytest.raises(ValueError):
+        search(_win_curve, 60.0, 140.0, strategy='anneal')
+    with pytest.raises(ValueError):
+        search(_win_curve, 60.0, 140.0, strategy='grid', n_steps=0)
+
+
+def test_tiny_tol_rejected_and_golden_stops_at_float_resolution():
+    with pytest.raises(ValueError):
+        search(_win_curve, 60.0, 140.0, strategy='golden', tol=1e-17)
+    # at 1e16 neighbouring floats are 2 apart, so the bracket can never reach tol
+    calls = []
+    score = lambda bids: calls.append(len(bids)) or np.full(len(bids), 0.5)
+    for strategy in ('coarse_to_fine', 'golden'):
+        search(score, 1e16, 1e16 + 64, strategy=strategy, tol=MIN_TOL)
+    assert len(calls) < 100
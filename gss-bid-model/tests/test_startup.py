@@ -0,0 +1,51 @@
+import threading
+import pytest
+from gss_common.startup import Readiness, load_parallel
+
+
+def test_load_parallel_runs_loaders_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def loader(value):
+        def load():
+            barrier.wait()  # deadlocks (BrokenBarrierError) unless all three run at once
+            return value
+        return load
+
+    assert load_parallel({k: loader(k) for k in 'abc'}) == {'a': 'a', 'b': 'b', 'c': 'c'}
+    with pytest.raises(KeyError):
+        load_parallel({'ok': lambda: 1, 'bad': lambda: {}['missing']})
+
+
+def test_readiness_waits_for_warmup_and_retries_failures():
+    calls = []
+    readiness = Readiness(lambda: calls.append('load'), lambda: calls.append('warmup'))
+    readiness.start()
+    assert readiness.wait(timeout=5)
+    assert calls == ['load', 'warmup']
+    assert {'load_s', 'warmup_s', 'total_s'} <= set(readiness.status())
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FileNotFoundError('models/win_model.joblib')
+
+    readiness = Readiness(flaky)
+    readiness.start(background=False)
+    assert not readiness.ready and readiness.status()['error'].startswith('FileNotFoundError')
+    readiness.start(background=False)
+    assert readiness.ready and readiness.error is None
+
+
+def test_preloaded_readiness_only_warms_up():
+    calls = []
+    readiness = Readiness(lambda: calls.append('load'), lambda: calls.append('warmup'))
+    assert not readiness.loaded
+    readiness.preload()
+    assert calls == ['load'] and readiness.loaded and not readiness.ready
+    readiness.start(background=False)  # as a forked worker's startup event does
+    readiness.start(background=False)  # no-op once ready
+    assert readiness.ready and calls == ['load', 'warmup']
+    assert readiness.timings['total_s'] >= readiness.timings['load_s']
@@ -0,0 +1,27 @@
+import tempfile
+from pathlib import Path
+import pandas as pd
+from src.data_loader import save_sample_data
+from src.tuning import best_params, time_folds, tune
+
+
+def test_folds_train_strictly_before_validation():
+    dates = pd.Series(pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-02', '2023-01-03'] * 25)).sample(frac=1, random_state=0)
+    for train, valid in time_folds(dates, n_folds=2, valid_frac=0.2):
+        assert dates.iloc[train].max() < dates.iloc[valid].min()
+
+
+def test_halving_search_leaderboard():
+    df = save_sample_data(str(Path(tempfile.mkdtemp()) / 'sample.csv'), n=300)
+    X = df.drop(columns=['BidDate', 'WinStatus'])
+    board = tune(X, df['BidAmount'], df['WinStatus'], df['BidDate'], ['ProjectType', 'Location', 'ClientType'],
+                 ['BidAmount', 'EstimatedCost', 'CompetitorCount'], n_candidates=4, n_folds=2, max_rounds=60,
+                 eta=2, workers=2)
+    assert set(board['model']) == {'win', 'bid'}
+    assert {'score', 'best_rounds', 'fit_s_per_fold', 'latency_ms_per_1k'} <= set(board.columns)
+    # halving: fewer candidates reach each larger budget
+    win = board[board['model'] == 'win']
+    assert win.groupby('rung').size().is_monotonic_decreasing and win['budget_rounds'].max() == 60
+
+    params = best_params(board, 'win')
+    assert 1 <= params['n_estimators'] <= 60 and 'max_depth' in params
@@ -0,0 +1,13 @@
+"""Serving modules shared by the bid recommendation services.
+
+The top-level app (app.py, bid_inference.py), deployment/ and gss-bid-model/ all
+import these from one installed package instead of keeping copies:
+
+  artifact_store   versioned artifact directories: manifest, memory-mapped .npy, boosters
+  batching         micro-batching of concurrent requests into one model call
+  cache            LRU/TTL cache for recommendations, keyed on encoded features
+  instrumentation  per-stage latency, fallback counters and a sampling profiler
+  prefork          load the artifacts once, then fork uvicorn workers that share them
+  search           fee/bid search strategies (grid, coarse_to_fine, golden)
+  startup          background loading, warm-up and readiness (/health vs /ready)
+"""
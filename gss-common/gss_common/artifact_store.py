@@ -0,0 +1,420 @@
+"""Versioned artifact directories: a JSON manifest, memory-mapped .npy arrays and native boosters.
+
+The pickled bundles (``bid_recommendation_artifacts.joblib``, ``model_metadata.joblib``
+and the models next to them) are dicts of feature lists, encoders, ``train_medians``
+and fitted XGBoost estimators. Unpickling them imports sklearn and builds every object
+on the heap of every worker. An artifact directory stores the same entries as
+
+  manifest.json          format and format_version, the sources it was converted
+                         from, one record per entry and the SHA-256 of every file
+  <name>.keys.npy        lookup tables (encoders, medians): sorted fixed-width
+  <name>.values.npy      unicode keys and float64 values
+  <name>.<i>.npy         arrays inside JSON entries
+  <name>.ubj             boosters, in XGBoost's own format
+
+``load_artifacts`` returns a plain dict. Small values come from the manifest. Arrays
+and lookup tables are opened with ``np.load(mmap_mode='r')``: their pages are read when
+first touched and shared by every process that maps them. Boosters are wrapped in
+``BoosterModel``, which has the ``predict``/``predict_proba`` of the estimator they came
+from. A lookup table is a read-only ``Mapping`` with a binary search over the mapped
+keys; the keys actually requested are remembered, so repeated lookups cost a dict hit.
+It also has the ``classes_``/``transform`` of a LabelEncoder.
+
+Entries are stored by type: None, strings, numbers, lists and JSON-able dicts as JSON
+values (with any ndarray inside moved to its own .npy file), mappings of numbers
+(dicts, Series) as lookup tables, dicts of encoders (LabelEncoders or value -> code
+dicts) as a table per column, and fitted XGBoost estimators as boosters. Anything else
+raises TypeError.
+
+The directory is written next to the target and swapped in when complete, so a
+reader never sees a partial one, and processes that mapped the old files keep them
+until they reload.
+
+Convert existing bundles with
+    python -m gss_common.artifact_store models/bid_recommendation_artifacts.joblib --output models/bid_recommendation_artifacts
+    python -m gss_common.artifact_store models/bid_fee_model.joblib models/model_metadata.joblib --output models/artifacts
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+
+FORMAT = 'bid-model-artifacts'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+
+class LookupTable(Mapping):
+    """Read-only ``{str: float}`` over sorted key and value arrays (usually memory-mapped)."""
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray):
+        self.key_array = keys
+        self.value_array = values
+        self._hits: Dict[str, float] = {}
+
+    @classmethod
+    def from_items(cls, items) -> 'LookupTable':
+        keys, values = [], []
+        for k, v in items:
+            keys.append(str(k))
+            values.append(v)
+        keys, values = np.array(keys, dtype=str), np.asarray(values, dtype=np.float64)
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        if len(keys) > 1 and (keys[1:] == keys[:-1]).any():
+            raise ValueError('Keys are not unique once converted to strings')
+        return cls(keys, values)
+
+    def get(self, key, default=None):
+        if not isinstance(key, str):
+            return default
+        value = self._hits.get(key)
+        if value is not None:
+            return value
+        i = int(np.searchsorted(self.key_array, key))
+        if i < len(self.key_array) and self.key_array[i] == key:
+            value = self._hits[key] = float(self.value_array[i])
+            return value
+        return default
+
+    def __getitem__(self, key) -> float:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self):
+        return (str(k) for k in self.key_array)
+
+    def __len__(self) -> int:
+        return len(self.key_array)
+
+    @property
+    def classes_(self) -> np.ndarray:
+        """Keys in code order, like ``LabelEncoder.classes_`` for a table converted from one."""
+        return self.key_array[np.argsort(self.value_array, kind='stable')]
+
+    def transform(self, values) -> np.ndarray:
+        """Codes of ``values``; raises ValueError on unseen ones, like ``LabelEncoder.transform``."""
+        codes = [self.get(str(v)) for v in values]
+        unseen = [v for v, c in zip(values, codes) if c is None]
+        if unseen:
+            raise ValueError(f'y contains previously unseen labels: {unseen}')
+        return np.asarray(codes)
+
+
+class BoosterModel:
+    """Native XGBoost booster with the prediction methods of the sklearn estimator it was saved from."""
+
+    def __init__(self, booster, kind: str, n_classes: int = None, iteration_range=None):
+        self.booster = booster
+        self.kind = kind
+        self.n_classes_ = n_classes
+        self.classes_ = np.arange(n_classes) if kind == 'classifier' else None
+        self.iteration_range = tuple(iteration_range) if iteration_range else (0, 0)
+        names = booster.feature_names
+        self.feature_names_in_ = np.array(names, dtype=object) if names else None
+        self.n_features_in_ = booster.num_features()
+
+    def get_booster(self):
+        return self.booster
+
+    def _raw(self, X) -> np.ndarray:
+        # DataFrames are passed through so XGBoost checks their column names
+        return self.booster.inplace_predict(X if hasattr(X, 'columns') else np.asarray(X),
+                                            iteration_range=self.iteration_range)
+
+    @property
+    def predict_proba(self):
+        if self.kind != 'classifier':
+            raise AttributeError('predict_proba is only available for classifiers')
+        return self._predict_proba
+
+    def _predict_proba(self, X) -> np.ndarray:
+        p = self._raw(X)
+        return p if p.ndim == 2 else np.column_stack([1 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        p = self._raw(X)
+        if self.kind != 'classifier':
+            return p
+        return p.argmax(axis=1) if p.ndim == 2 else (p > 0.5).astype(int)
+
+
+def _is_encoder(value) -> bool:
+    return hasattr(value, 'classes_') or isinstance(value, Mapping)
+
+
+def _numeric_items(value) -> Optional[list]:
+    """``value``'s items when it is a non-empty mapping (or Series) of real numbers, else None."""
+    if not hasattr(value, 'items') or isinstance(value, (str, bytes)) or not len(value):
+        return None
+    items = list(value.items())
+    if all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for _, v in items):
+        return items
+    return None
+
+
+def _encoder_items(encoder) -> list:
+    if hasattr(encoder, 'classes_'):
+        # LabelEncoder: a class's code is its position in classes_
+        return [(c, float(i)) for i, c in enumerate(encoder.classes_)]
+    items = _numeric_items(encoder)
+    if items is None:
+        raise TypeError('Encoder mappings must map values to numeric codes')
+    return items
+
+
+class _Writer:
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, str] = {}
+
+    def _name(self, stem: str, suffix: str) -> str:
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', stem) + suffix
+        if name in self.files:
+            raise ValueError(f'Two entries map to the file {name}')
+        return name
+
+    def _record(self, name: str) -> str:
+        h = hashlib.sha256()
+        with open(self.path / name, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        self.files[name] = h.hexdigest()
+        return name
+
+    def array(self, stem: str, arr: np.ndarray) -> str:
+        name = self._name(stem, '.npy')
+        np.save(self.path / name, arr, allow_pickle=False)
+        return self._record(name)
+
+    def table(self, stem: str, table: LookupTable) -> dict:
+        return {'keys': self.array(f'{stem}.keys', np.asarray(table.key_array)),
+                'values': self.array(f'{stem}.values', np.asarray(table.value_array))}
+
+    def json_value(self, stem: str, value, counter: List[int]):
+        """``value`` with ndarrays swapped for ``{"npy": file}`` references."""
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            counter[0] += 1
+            return {'npy': self.array(f'{stem}.{counter[0]}', value)}
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, Mapping):
+            return {str(k): self.json_value(stem, v, counter) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.json_value(stem, v, counter) for v in value]
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return value
+        raise TypeError(f'Cannot store {type(value).__name__} in entry {stem!r}')
+
+    def booster(self, stem: str, model) -> dict:
+        name = self._name(stem, '.ubj')
+        model.get_booster().save_model(str(self.path / name))
+        kind = 'classifier' if hasattr(model, 'predict_proba') else 'regressor'
+        try:
+            best = model.best_iteration  # set by early stopping; the sklearn wrapper predicts up to it
+        except AttributeError:
+            best = None
+        if isinstance(model, BoosterModel):
+            iteration_range = list(model.iteration_range) if model.iteration_range != (0, 0) else None
+        else:
+            iteration_range = [0, int(best) + 1] if best is not None else None
+        return {'type': 'booster', 'file': self._record(name), 'kind': kind,
+                'n_classes': int(len(model.classes_)) if kind == 'classifier' else None,
+                'iteration_range': iteration_range, 'estimator': type(model).__name__}
+
+    def entry(self, name: str, value) -> dict:
+        if hasattr(value, 'get_booster'):
+            return self.booster(name, value)
+        if isinstance(value, LookupTable):
+            return {'type': 'table', **self.table(name, value)}
+        items = _numeric_items(value)
+        if items is not None:
+            return {'type': 'table', **self.table(name, LookupTable.from_items(items))}
+        if isinstance(value, Mapping) and value and all(_is_encoder(v) for v in value.values()):
+            return {'type': 'tables', 'tables': {
+                str(col): self.table(f'{name}.{i}', enc if isinstance(enc, LookupTable)
+                                     else LookupTable.from_items(_encoder_items(enc)))
+                for i, (col, enc) in enumerate(value.items())}}
+        return {'type': 'value', 'value': self.json_value(name, value, [0])}
+
+
+def save_artifacts(artifacts: dict, path: str, sources=()) -> Path:
+    """Write ``artifacts`` as an artifact directory at ``path``, replacing any existing one."""
+    p = Path(path)
+    tmp = p.with_name(f'{p.name}.tmp-{os.getpid()}')
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    try:
+        writer = _Writer(tmp)
+        entries = {str(name): writer.entry(str(name), value) for name, value in artifacts.items()}
+        manifest = {
+            'format': FORMAT,
+            'format_version': FORMAT_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'sources': [{'path': str(s), 'sha256': _sha256(s)} for s in sources],
+            'entries': entries,
+            'files': writer.files,
+        }
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    old = p.with_name(f'{p.name}.old-{os.getpid()}')
+    if p.exists():
+        p.rename(old)
+    tmp.rename(p)
+    shutil.rmtree(old, ignore_errors=True)
+    return p
+
+
+def _sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_artifact_dir(path) -> bool:
+    return (Path(path) / MANIFEST).is_file()
+
+
+def read_manifest(path) -> dict:
+    manifest = json.loads((Path(path) / MANIFEST).read_text())
+    if manifest.get('format') != FORMAT:
+        raise ValueError(f'{path} is not a {FORMAT} directory')
+    if manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {manifest['format_version']}; "
+                         f'this code reads up to {FORMAT_VERSION}')
+    return manifest
+
+
+def artifact_version(path) -> str:
+    """Content hash of an artifact directory (the manifest records the hash of every file)."""
+    return _sha256(Path(path) / MANIFEST)
+
+
+def load_artifacts(path, mmap: bool = True) -> dict:
+    """The entries of an artifact directory; ``mmap=False`` reads the arrays into memory instead."""
+    p = Path(path)
+    manifest = read_manifest(p)
+    mode = 'r' if mmap else None
+
+    def array(name):
+        return np.load(p / name, mmap_mode=mode, allow_pickle=False)
+
+    def table(spec):
+        return LookupTable(array(spec['keys']), array(spec['values']))
+
+    def value(v):
+        if isinstance(v, dict):
+            return array(v['npy']) if set(v) == {'npy'} else {k: value(x) for k, x in v.items()}
+        return [value(x) for x in v] if isinstance(v, list) else v
+
+    out = {}
+    for name, entry in manifest['entries'].items():
+        kind = entry['type']
+        if kind == 'value':
+            out[name] = value(entry['value'])
+        elif kind == 'table':
+            out[name] = table(entry)
+        elif kind == 'tables':
+            out[name] = {col: table(spec) for col, spec in entry['tables'].items()}
+        elif kind == 'booster':
+            import xgboost as xgb  # only paid by directories holding a model
+
+            booster = xgb.Booster()
+            booster.load_model(str(p / entry['file']))
+            out[name] = BoosterModel(booster, entry['kind'], entry.get('n_classes'), entry.get('iteration_range'))
+        else:
+            raise ValueError(f'Unknown entry type {kind!r} for {name!r} in {p / MANIFEST}')
+    return out
+
+
+def convert(joblib_paths, output: str) -> Path:
+    """Artifact directory from joblib files: a dict's items become entries, anything else one entry per file stem."""
+    import joblib
+
+    artifacts = {}
+    for path in joblib_paths:
+        obj = joblib.load(path)
+        items = obj.items() if isinstance(obj, dict) else [(Path(path).stem, obj)]
+        for name, value in items:
+            if name in artifacts:
+                raise ValueError(f'Entry {name!r} appears in more than one source')
+            artifacts[name] = value
+    return save_artifacts(artifacts, output, sources=joblib_paths)
+
+
+def verify(original: dict, loaded: dict, rows: int = 256, seed: int = 0) -> Dict[str, float]:
+    """Largest difference per entry between the unpickled and the converted artifacts.
+
+    Tables are compared key by key, boosters by their predictions on random rows. An
+    estimator that cannot predict as unpickled (e.g. pickled by another XGBoost
+    version) is reported as None; its native booster was still converted.
+    """
+    rng = np.random.default_rng(seed)
+    out = {}
+    for name, value in original.items():
+        new = loaded[name]
+        if isinstance(new, BoosterModel):
+            X = rng.normal(size=(rows, new.n_features_in_))
+            if new.feature_names_in_ is not None:
+                import pandas as pd
+                X = pd.DataFrame(X, columns=list(new.feature_names_in_))
+            method = 'predict_proba' if new.kind == 'classifier' else 'predict'
+            try:
+                expected = getattr(value, method)(X)
+            except Exception:
+                out[name] = None
+                continue
+            out[name] = float(np.max(np.abs(expected - getattr(new, method)(X))))
+        elif isinstance(new, LookupTable):
+            out[name] = max((_diff(v, new[str(k)]) for k, v in value.items()), default=0.0)
+        elif isinstance(new, dict) and new and all(isinstance(t, LookupTable) for t in new.values()):
+            out[name] = max((_diff(c, new[col][str(k)]) for col, enc in value.items()
+                             for k, c in _encoder_items(enc)), default=0.0)
+    return out
+
+
+def _diff(a, b) -> float:
+    a, b = float(a), float(b)
+    return 0.0 if np.isnan(a) and np.isnan(b) else abs(a - b)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert joblib artifact files to a memory-mapped artifact directory')
+    parser.add_argument('sources', nargs='+', help='joblib files; their entries are merged into one directory')
+    parser.add_argument('--output', required=True, help='artifact directory to write')
+    args = parser.parse_args(argv)
+    import joblib
+
+    start = time.perf_counter()
+    out = convert(args.sources, args.output)
+    print(f'Wrote {out} in {time.perf_counter() - start:.2f} s')
+    original = {}
+    for path in args.sources:
+        obj = joblib.load(path)
+        original.update(obj if isinstance(obj, dict) else {Path(path).stem: obj})
+    for name, diff in verify(original, load_artifacts(out)).items():
+        print(f'{name}: ' + ('the unpickled estimator cannot predict here; not compared' if diff is None
+                             else f'max abs difference {diff:.3g}'))
+
+
+if __name__ == '__main__':
+    main()
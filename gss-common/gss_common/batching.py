@@ -0,0 +1,136 @@
+"""Micro-batching scheduler that coalesces concurrent requests into one model call.
+
+Callers ``submit`` single items and get a future back. A collector thread takes the
+first queued item, waits for a free worker, then keeps collecting until
+``max_batch_size`` items are in hand or ``max_wait_ms`` has passed since the first one
+arrived, and hands the batch to the worker pool. While every worker is busy new items
+keep queueing, so batches grow with load instead of latency.
+
+``fn`` maps a list of items to a list of results of the same length. A result that is
+an exception instance is raised to that item's caller only; if ``fn`` itself raises,
+every item in the batch gets the exception.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """Queue in front of a batch function, drained by a pool of ``workers``.
+
+    The default pool is threads, which suits NumPy/XGBoost scoring since it releases the
+    GIL. Any ``concurrent.futures`` executor can be passed instead, e.g. a
+    ``ProcessPoolExecutor`` when ``fn`` is a picklable module-level function.
+    """
+
+    def __init__(self, fn, max_batch_size: int = 32, max_wait_ms: float = 2.0, workers: int = 2, executor=None):
+        if max_batch_size < 1 or workers < 1 or max_wait_ms < 0:
+            raise ValueError('max_batch_size and workers must be positive and max_wait_ms non-negative')
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers, thread_name_prefix='microbatch')
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, item) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name='microbatch-collector', daemon=True)
+                self._thread.start()
+            fut = Future()
+            self._queue.put((time.monotonic(), item, fut))
+        return fut
+
+    async def run(self, item):
+        """Submit ``item`` and wait for its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            self._slots.acquire()
+            batch = [entry]
+            deadline = entry[0] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)  # stop after dispatching this batch
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        # Callers that gave up (e.g. a cancelled asyncio task) are dropped before scoring
+        batch = [(item, fut) for _, item, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            self._slots.release()
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            done = self.executor.submit(self.fn, [item for item, _ in batch])
+        except Exception as e:
+            self._slots.release()
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        done.add_done_callback(lambda f: self._resolve(batch, f))
+
+    def _resolve(self, batch, done: Future):
+        try:
+            try:
+                results = list(done.result())
+                error = None
+                if len(results) != len(batch):
+                    error = RuntimeError(f'Batch function returned {len(results)} results for {len(batch)} items')
+            except BaseException as e:
+                results, error = None, e
+            for i, (_, fut) in enumerate(batch):
+                result = error or results[i]
+                if isinstance(result, BaseException):
+                    fut.set_exception(result)
+                else:
+                    fut.set_result(result)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Dispatch everything already queued and wait for it; a later submit starts a new collector."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+            for _ in range(self.workers):
+                self._slots.acquire()
+            for _ in range(self.workers):
+                self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'workers': self.workers,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'queued': self._queue.qsize(),
+        }
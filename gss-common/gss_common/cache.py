@@ -0,0 +1,88 @@
+"""In-process LRU/TTL cache for bid and fee recommendations."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class RecommendationCache:
+    """Bounded LRU cache with a per-entry TTL for recommendation results.
+
+    Entries belong to one artifact version: the first lookup under a new version drops
+    everything cached for the previous one. Cached values are shared, not copied, so
+    callers must treat them as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Canonical hash of feature vectors (hashed by dtype, shape and bytes) and scalars."""
+        h = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                a = np.ascontiguousarray(part, dtype=float)
+                h.update(str(a.shape).encode())
+                h.update(a.tobytes())
+            else:
+                h.update(repr(part).encode())
+            h.update(b'\x1f')
+        return h.hexdigest()
+
+    def _sync_version(self, version):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+                self._data.clear()
+            self.version = version
+
+    def get(self, key: str, version):
+        with self._lock:
+            self._sync_version(version)
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value, version):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._sync_version(version)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
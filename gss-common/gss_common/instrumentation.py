@@ -0,0 +1,230 @@
+"""Per-stage latency, fallback counters and an opt-in sampling profiler for the serving path.
+
+Stages are timed with ``stage(name)`` inside an ``endpoint(name)`` block. Each stage
+records its self time (nested stages are subtracted from the enclosing one), so the
+stages of one call add up to its total: ``optimizer`` is the search loop without the
+``model`` calls made from it. A micro-batch counts as one call. ``TimingMiddleware``
+adds two stages the handler cannot see: ``parse`` (request arrival until the handler
+starts: body read, JSON decoding, validation) and ``serialize`` (handler return until
+the response starts).
+
+``fallback(path)`` counts the recovery branches that otherwise fail silently, e.g. a
+model call retried on the bare estimator or a constant win probability.
+
+Everything is exported as ``inference_stage_seconds{endpoint,stage}`` and
+``inference_fallbacks_total{path}`` when prometheus_client is installed, and kept in
+process for ``stats()`` (the ``/debug/stages`` endpoint) either way.
+
+The profiler is off unless ``PROFILE_SAMPLE_RATE`` (fraction of ``profile()`` blocks
+to sample, e.g. 0.01) is set. A sampled block has its thread's stack recorded every
+``PROFILE_INTERVAL_MS`` milliseconds, and ``profiler.collapsed()`` returns the counts in
+the collapsed-stack format read by flamegraph.pl and speedscope.
+"""
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    from prometheus_client import Counter as PromCounter, Histogram
+except ImportError:  # in-process stats only
+    STAGE_SECONDS = FALLBACKS = None
+else:
+    def _metric(cls, *args, **kwargs):
+        try:
+            return cls(*args, **kwargs)
+        except ValueError:
+            # another copy of this module registered it first (several apps in one process, as in
+            # scripts/load_test.py); this copy's observations stay out of /metrics
+            return cls(*args, registry=None, **kwargs)
+
+    STAGE_SECONDS = _metric(Histogram, 'inference_stage_seconds', 'Self time per serving stage', ['endpoint', 'stage'],
+                            buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5))
+    FALLBACKS = _metric(PromCounter, 'inference_fallbacks_total', 'Serving fallback paths taken', ['path'])
+
+RECENT = 2048  # observations kept per stage for the /debug/stages percentiles
+
+_lock = threading.Lock()
+_recent = defaultdict(lambda: deque(maxlen=RECENT))
+_totals = defaultdict(lambda: [0, 0.0])
+_fallbacks = Counter()
+_endpoint = contextvars.ContextVar('instrumented_endpoint', default='other')
+_children = contextvars.ContextVar('instrumented_children', default=None)
+
+
+def observe(endpoint_name: str, stage_name: str, seconds: float):
+    if STAGE_SECONDS is not None:
+        STAGE_SECONDS.labels(endpoint_name, stage_name).observe(seconds)
+    with _lock:
+        _recent[(endpoint_name, stage_name)].append(seconds)
+        total = _totals[(endpoint_name, stage_name)]
+        total[0] += 1
+        total[1] += seconds
+
+
+@contextmanager
+def endpoint(name: str):
+    """Attribute the stages inside the block (in this thread or task) to ``name``."""
+    token = _endpoint.set(name)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    parent = _children.get()
+    children = [0.0]
+    token = _children.set(children)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _children.reset(token)
+        if parent is not None:
+            parent[0] += elapsed
+        observe(_endpoint.get(), name, elapsed - children[0])
+
+
+def fallback(path: str):
+    if FALLBACKS is not None:
+        FALLBACKS.labels(path).inc()
+    with _lock:
+        _fallbacks[path] += 1
+
+
+def stats() -> dict:
+    """Per endpoint and stage: calls, total seconds and recent p50/p95/p99 (ms); fallback counts."""
+    with _lock:
+        recent = {k: np.asarray(v) for k, v in _recent.items()}
+        totals = {k: tuple(v) for k, v in _totals.items()}
+        fallbacks = dict(_fallbacks)
+    stages = defaultdict(dict)
+    for (ep, name), values in sorted(recent.items()):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1e3
+        stages[ep][name] = {'calls': totals[(ep, name)][0], 'total_s': totals[(ep, name)][1],
+                            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+    return {'stages': dict(stages), 'fallbacks': fallbacks}
+
+
+def reset():
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+        _fallbacks.clear()
+
+
+class TimingMiddleware:
+    """ASGI middleware timing ``parse`` and ``serialize`` around handlers that use ``handler()``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        state = scope.setdefault('state', {})
+        state['received_at'] = time.perf_counter()
+
+        async def timed_send(message):
+            if message['type'] == 'http.response.start' and 'handler_done_at' in state:
+                observe(state['handler_endpoint'], 'serialize', time.perf_counter() - state['handler_done_at'])
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+
+@contextmanager
+def handler(request, name: str):
+    """Wrap a handler body: records ``parse`` on entry and marks the end for ``serialize``."""
+    state = request.scope.setdefault('state', {})
+    if 'received_at' in state:
+        observe(name, 'parse', time.perf_counter() - state['received_at'])
+    with endpoint(name):
+        try:
+            yield
+        finally:
+            state['handler_endpoint'] = name
+            state['handler_done_at'] = time.perf_counter()
+
+
+class SamplingProfiler:
+    """Records the stacks of threads inside sampled ``profile()`` blocks."""
+
+    def __init__(self, rate: float = 0.0, interval: float = 0.005, max_depth: int = 64):
+        self.rate = rate
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.profiled = Counter()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    @contextmanager
+    def profile(self, label: str):
+        ident = threading.get_ident()
+        if not self.enabled or ident in self._active or random.random() >= self.rate:
+            yield
+            return
+        with self._lock:
+            self._active[ident] = label
+            self.profiled[label] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(ident, None)
+
+    def _stack(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = dict(self._active)
+                if not active:
+                    self._wake.clear()
+            if not active:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            stacks = [f'{label};{self._stack(frames[ident])}' for ident, label in active.items() if ident in frames]
+            with self._lock:
+                self.samples.update(stacks)
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """``label;outer;...;inner count`` lines, most sampled first."""
+        with self._lock:
+            return '\n'.join(f'{stack} {n}' for stack, n in self.samples.most_common())
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.profiled.clear()
+
+
+profiler = SamplingProfiler(rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+                            interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1e3)
@@ -0,0 +1,143 @@
+"""Pre-fork launcher: load the artifacts once, then fork the uvicorn workers.
+
+``uvicorn --workers N`` spawns N fresh interpreters, and each one imports the app and
+loads the models, preprocessors and lookup tables on its own, so N workers hold N
+copies. Here the parent imports the app and runs its ``readiness.preload()`` before
+forking. The children then share the parent's pages copy-on-write. Each child only
+warms up (its startup event calls ``readiness.start()``, which skips the load) and
+serves on a socket bound once by the parent.
+
+Before forking, ``gc.freeze()`` moves everything allocated so far into a permanent
+generation. Without it, the first collection in each child would write to the GC
+headers of every loaded object and copy their pages. Reference counting still dirties
+the pages of objects the request path touches (the model objects, the encoder
+dictionaries); the numpy buffers behind the booster, the medians and the lookup
+tables stay shared.
+
+``OMP_NUM_THREADS`` defaults to 1 (one CPU per worker): the OpenMP runtime used by
+XGBoost is not fork-safe once the parent has started its thread pool, and N workers
+with a pool of all cores each would oversubscribe the CPUs anyway.
+
+The parent forwards SIGTERM/SIGINT to the workers and replaces a worker that exits
+unexpectedly. Prometheus metrics and ``/debug/stages`` are per worker; a scrape
+reaches whichever worker accepts the connection. With one worker there is nothing to
+share, so the app is served in-process without a parent, as plain uvicorn would; the
+images run this launcher with ``WEB_CONCURRENCY`` (default 1) as the worker count.
+
+Usage (from the app's directory):
+    python -m gss_common.prefork api:app --workers 4 --port 8000   # gss-bid-model
+    python -m gss_common.prefork app:app --workers 4 --port 8000   # top level, deployment/
+"""
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+
+def import_app(target: str):
+    """``module:attribute`` -> (module, app)."""
+    module_name, _, attr = target.partition(':')
+    module = importlib.import_module(module_name)
+    return module, getattr(module, attr or 'app')
+
+
+def bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app, sock: socket.socket, log_level: str):
+    """Worker body; never returns."""
+    import uvicorn
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    code = 0
+    try:
+        uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+    except BaseException as e:
+        print(f'Warning: worker {os.getpid()} failed: {type(e).__name__}: {e}', file=sys.stderr)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def run(target: str, workers: int, host: str = '127.0.0.1', port: int = 8000, log_level: str = 'info',
+        readiness_attr: str = 'readiness'):
+    module, app = import_app(target)
+    if workers <= 1:
+        # nothing to share: serve in this process, loading in the background as under plain uvicorn
+        import uvicorn
+        uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level=log_level)).run()
+        return
+    readiness = getattr(module, readiness_attr, None)
+    if readiness is not None:
+        readiness.preload()
+        print(f"Loaded {target} in {readiness.timings['load_s'] * 1e3:.0f} ms; forking {workers} workers")
+    else:
+        print(f'Warning: {module.__name__} has no {readiness_attr!r}; each worker loads its own artifacts')
+    sock = bind(host, port)
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _serve(app, sock, log_level)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f'Warning: worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting')
+            time.sleep(0.5)  # do not spin on a worker that fails at startup
+            spawn()
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve an ASGI app from workers forked after loading its artifacts')
+    parser.add_argument('app', help='module:attribute, e.g. api:app or app:app')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '1')))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--readiness', default='readiness', help="the app module's Readiness attribute")
+    args = parser.parse_args(argv)
+    sys.path.insert(0, os.getcwd())
+    run(args.app, args.workers, args.host, args.port, args.log_level, args.readiness)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Search strategies for the bid that maximizes expected value = P(win | bid) * bid.
+
+Every strategy takes ``score``, a function mapping an array of bids to win
+probabilities with one model call, and returns the evaluated bids (sorted) with
+their win probabilities. ``len(bids)`` is the number of model evaluations used.
+
+``grid`` scores ``n_steps`` bids in a single call. The adaptive strategies score fewer
+bids (about 25 against 41 at the defaults) but need several calls in sequence: a
+coarse grid of ``coarse_steps`` bids, then one call per refinement round, about 5
+calls for ``coarse_to_fine`` and 8 for ``golden``. With a local booster each call
+costs far more than each extra row, so ``grid`` is the fastest; the adaptive
+strategies trade latency for fewer evaluations and a finer optimum than the grid.
+They pay off when an evaluation is expensive in itself, e.g. a remote model.
+``n_steps`` only sizes ``grid``. ``tol`` below ``MIN_TOL`` is rejected: the bracket
+cannot shrink much below float resolution.
+"""
+import numpy as np
+
+
+STRATEGIES = ('grid', 'coarse_to_fine', 'golden')
+GOLDEN = (np.sqrt(5) - 1) / 2
+MIN_TOL = 1e-9
+
+
+class _Evaluations:
+    """Memoizes scored bids so no strategy pays for the same point twice."""
+
+    def __init__(self, score):
+        self.score = score
+        self.p = {}
+
+    def __call__(self, bids):
+        new = [float(b) for b in np.atleast_1d(bids) if float(b) not in self.p]
+        if new:
+            for b, p in zip(new, np.asarray(self.score(np.asarray(new)), dtype=float)):
+                self.p[b] = float(p)
+        return np.array([self.p[float(b)] for b in np.atleast_1d(bids)])
+
+    def best(self):
+        return max(self.p, key=lambda b: self.p[b] * b)
+
+    def neighbours(self, b):
+        xs = sorted(self.p)
+        i = xs.index(b)
+        return xs[max(i - 1, 0)], xs[min(i + 1, len(xs) - 1)]
+
+    def curve(self):
+        xs = np.array(sorted(self.p))
+        return xs, np.array([self.p[b] for b in xs])
+
+
+def _grid(ev, low, high, n_steps, tol, coarse_steps):
+    ev(np.linspace(low, high, n_steps))
+
+
+def _coarse_to_fine(ev, low, high, n_steps, tol, coarse_steps):
+    """Coarse grid, then repeatedly bisect both sides of the best bid."""
+    ev(np.linspace(low, high, coarse_steps))
+    while True:
+        best = ev.best()
+        a, b = ev.neighbours(best)
+        n_before = len(ev.p)
+        if b - a <= tol * (high - low):
+            return
+        ev([(a + best) / 2, (best + b) / 2])
+        if len(ev.p) == n_before:  # bracket below float resolution
+            return
+
+
+def _golden(ev, low, high, n_steps, tol, coarse_steps):
+    """Coarse grid to bracket the best bid, then golden-section search inside the bracket."""
+    ev(np.linspace(low, high, coarse_steps))
+    a, b = ev.neighbours(ev.best())
+    c, d = b - GOLDEN * (b - a), a + GOLDEN * (b - a)
+    fc, fd = ev([c, d]) * (c, d)  # both interior points in one call
+    # each round shrinks the bracket by GOLDEN; the cap also stops it at float resolution
+    for _ in range(int(np.ceil(np.log(tol) / np.log(GOLDEN))) + 1):
+        if b - a <= tol * (high - low):
+            return
+        if fc >= fd:
+            b, d, fd = d, c, fc
+            c = b - GOLDEN * (b - a)
+            fc = ev(c)[0] * c
+        else:
+            a, c, fc = c, d, fd
+            d = a + GOLDEN * (b - a)
+            fd = ev(d)[0] * d
+
+
+_SEARCHES = {'grid': _grid, 'coarse_to_fine': _coarse_to_fine, 'golden': _golden}
+
+
+def search(score, low: float, high: float, strategy: str = 'grid', n_steps: int = 41, tol: float = 0.01, coarse_steps: int = 17):
+    """Evaluate ``score`` over [low, high] with the chosen strategy.
+
+    ``n_steps`` sizes the ``grid`` strategy; ``tol`` is the final bracket width for the
+    adaptive strategies as a fraction of the search window, and ``coarse_steps`` the size
+    of their initial bracketing grid. Returns (bids, p_win), sorted by bid.
+    """
+    if strategy not in _SEARCHES:
+        raise ValueError(f"Unknown search strategy {strategy!r}; expected one of {STRATEGIES}")
+    if not tol >= MIN_TOL:
+        raise ValueError(f'tol must be at least {MIN_TOL}')
+    if n_steps < 1 or coarse_steps < 2:
+        raise ValueError('n_steps must be at least 1 and coarse_steps at least 2')
+    ev = _Evaluations(score)
+    _SEARCHES[strategy](ev, float(low), float(high), n_steps, tol, coarse_steps)
+    return ev.curve()
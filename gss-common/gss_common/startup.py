@@ -0,0 +1,95 @@
+"""Background artifact loading, warm-up and readiness for the API processes.
+
+An app starts a ``Readiness`` from its startup event and begins answering at once:
+``/health`` (liveness) is up while the artifacts load in a background thread, and
+``/ready`` (readiness) returns 503 until they are loaded and a warm-up inference on
+synthetic rows has run. The first routed request therefore does not pay for first-call
+initialisation: XGBoost's predictor setup, pandas code paths and the modules imported
+lazily by the loaders.
+
+``load_parallel`` runs independent loaders on a thread pool. File reads, ``np.load``
+and booster deserialisation release the GIL, so they overlap with each other and with
+unpickling.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+def load_parallel(loaders: Dict[str, Callable[[], Any]], max_workers: int = None) -> Dict[str, Any]:
+    """``{name: loader()}`` with the loaders run concurrently; the first failure is re-raised."""
+    if len(loaders) <= 1:
+        return {name: load() for name, load in loaders.items()}
+    with ThreadPoolExecutor(max_workers=max_workers or len(loaders), thread_name_prefix='artifact-load') as pool:
+        futures = {name: pool.submit(load) for name, load in loaders.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+class Readiness:
+    """Runs ``load`` then ``warmup`` once, by default off the event loop, and records the outcome."""
+
+    def __init__(self, load: Callable[[], None], warmup: Optional[Callable[[], None]] = None):
+        self.load = load
+        self.warmup = warmup
+        self.ready = False
+        self.error = None
+        self.timings: Dict[str, float] = {}
+        self._loaded = False
+        self._done = threading.Event()
+
+    def preload(self):
+        """Run ``load`` now, in the foreground; ``start`` then only warms up.
+
+        Used by a pre-fork parent (see prefork.py) to load once for all its workers.
+        """
+        start = time.perf_counter()
+        self.load()
+        self._loaded = True
+        self.timings['load_s'] = time.perf_counter() - start
+
+    def start(self, background: bool = True):
+        """Begin (or, after a failure, retry) loading; a no-op once ready."""
+        if self.ready:
+            return
+        self._done.clear()
+        self.error = None
+        if background:
+            threading.Thread(target=self._run, name='startup', daemon=True).start()
+        else:
+            self._run()
+
+    def _run(self):
+        # total_s counts a preload as well
+        start = time.perf_counter() - (self.timings.get('load_s', 0.0) if self._loaded else 0.0)
+        try:
+            if not self._loaded:
+                self.load()
+                self._loaded = True
+                self.timings['load_s'] = time.perf_counter() - start
+            if self.warmup is not None:
+                warmup_start = time.perf_counter()
+                self.warmup()
+                self.timings['warmup_s'] = time.perf_counter() - warmup_start
+            self.ready = True
+        except Exception as e:
+            # the process stays up for /health and debugging; /ready keeps failing
+            self.error = f'{type(e).__name__}: {e}'
+            print('Warning: startup failed:', self.error)
+        finally:
+            self.timings['total_s'] = time.perf_counter() - start
+            self._done.set()
+
+    @property
+    def loaded(self) -> bool:
+        """``load`` has completed, here or in a pre-fork parent; warm-up may still be running."""
+        return self._loaded
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until loading finished (or ``timeout``); True when ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> dict:
+        return {'ready': self.ready, 'loaded': self._loaded, 'loading': not self._done.is_set(), 'error': self.error,
+                **self.timings}
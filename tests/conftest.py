@@ -0,0 +1,108 @@
+"""Small fitted artifacts for the top-level app (bid_inference.py) and deployment/app.py."""
+import importlib.util
+import os
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+from xgboost import XGBClassifier
+
+REPO = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO))
+
+ROOT_CATEGORIES = {'ZipCode': ['10001', '10002', '10003'], 'PropertyType': ['Office', 'Retail', 'Industrial'],
+                   'Market': ['NYC', 'Atlanta'], 'BidCompanyType': ['Large', 'Small']}
+
+
+def root_opportunities(n: int, seed: int = 0) -> list:
+    """Opportunities for bid_inference.py: the request fields plus the fee columns."""
+    rng = np.random.default_rng(seed)
+    fees = rng.uniform(2000, 6000, n)
+    rows = pd.DataFrame({c: rng.choice(v, n) for c, v in ROOT_CATEGORIES.items()})
+    return rows.assign(median_BidFee=fees, lag_1=fees * rng.uniform(0.8, 1.2, n)).to_dict('records')
+
+
+def make_root_bundle(n: int = 300, seed: int = 0, n_estimators: int = 20) -> dict:
+    """A bid_inference artifact bundle: encoders, medians and a classifier where a lower fee wins more."""
+    X = pd.DataFrame(root_opportunities(n, seed))
+    encoders = {c: {v: float(i) for i, v in enumerate(values)} for c, values in ROOT_CATEGORIES.items()}
+    for c, mapping in encoders.items():
+        X[c] = X[c].map(mapping)
+    won = (X['median_BidFee'] < np.random.default_rng(seed + 1).uniform(2000, 6000, n)).astype(int)
+    clf = XGBClassifier(n_estimators=n_estimators, max_depth=3, eval_metric='logloss', random_state=seed).fit(X, won)
+    return {'features': list(X.columns), 'encoders': encoders, 'train_medians': X.median(), 'model_full': None,
+            'clf': clf}
+
+
+@pytest.fixture(scope='session')
+def root_bundle():
+    return make_root_bundle()
+
+
+@pytest.fixture
+def opportunity():
+    """One opportunity drawn like the bundle's training rows, as a Series."""
+    return pd.Series(root_opportunities(1, seed=7)[0])
+
+
+@pytest.fixture
+def bundle_path(root_bundle, tmp_path):
+    path = tmp_path / 'bid_recommendation_artifacts.joblib'
+    joblib.dump(root_bundle, path)
+    return path
+
+
+@pytest.fixture
+def rewrite_bundle(root_bundle, bundle_path):
+    """``rewrite(tag)`` publishes a bundle tagged ``tag`` under a new mtime, atomically as a deploy would."""
+    def rewrite(tag: int):
+        tmp = bundle_path.with_name(bundle_path.name + '.tmp')
+        joblib.dump({**root_bundle, 'tag': tag}, tmp)
+        st = os.stat(bundle_path)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        os.replace(tmp, bundle_path)
+    return rewrite
+
+
+DEPLOYMENT_CATEGORIES = {'ZipCode': ['12345', '30301', '60601'], 'PropertyType': ['Office', 'Retail'],
+                         'Market': ['NYC', 'Atlanta', 'Chicago'], 'BusinessSegment': ['Commercial', 'Residential']}
+DEPLOYMENT_FEATURES = ['DistanceInMiles', 'Year', 'Month', 'Week', 'DayOfWeek', 'PopulationEstimate', 'MedianAge',
+                       'PopulationEstimate_zip_ratio', 'MedianAge_zip_ratio', 'JobCount',
+                       *[f'{c}_encoded' for c in DEPLOYMENT_CATEGORIES]]
+
+
+@pytest.fixture(scope='session')
+def deployment_model_dir(tmp_path_factory):
+    """bid_fee_model.joblib and model_metadata.joblib as deployment/app.py loads them."""
+    rng = np.random.default_rng(0)
+    encoders = {c: LabelEncoder().fit(v) for c, v in DEPLOYMENT_CATEGORIES.items()}
+    X = rng.uniform(0, 10, (200, len(DEPLOYMENT_FEATURES)))
+    model = XGBClassifier(n_estimators=10, max_depth=3, eval_metric='mlogloss').fit(X, rng.integers(0, 3, 200))
+    path = tmp_path_factory.mktemp('deployment_models')
+    joblib.dump(model, path / 'bid_fee_model.joblib')
+    joblib.dump({'feature_cols': DEPLOYMENT_FEATURES, 'encoders': encoders, 'cat_cols': list(DEPLOYMENT_CATEGORIES)},
+                path / 'model_metadata.joblib')
+    return path
+
+
+@pytest.fixture(scope='session')
+def deployment_app(deployment_model_dir):
+    """deployment/app.py imported as ``deployment_app`` (the top-level app.py owns ``app``), loaded and ready."""
+    sys.path.insert(0, str(REPO / 'deployment'))
+    saved = os.environ.get('MODEL_DIR')
+    os.environ['MODEL_DIR'] = str(deployment_model_dir)
+    try:
+        spec = importlib.util.spec_from_file_location('deployment_app', REPO / 'deployment' / 'app.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del os.environ['MODEL_DIR']
+        else:
+            os.environ['MODEL_DIR'] = saved
+    module.readiness.start(background=False)  # load and warm up, as the startup event does in the background
+    assert module.readiness.ready, module.readiness.error
+    return module
@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+import app
+from bid_inference import ArtifactRegistry, recommend_bid_fees
+
+
+@pytest.fixture
+def client(bundle_path, monkeypatch):
+    """The top-level app on the fixture bundle; no startup event, so nothing loads in the background."""
+    monkeypatch.setattr(app, 'registry', ArtifactRegistry(bundle_path))
+    app.cache.clear()
+    return TestClient(app.app)
+
+
+def test_model_info_counts_hot_reloads(client, rewrite_bundle):
+    first = client.post('/predict', json={'ZipCode': '10001', 'PropertyType': 'Office'})
+    assert first.status_code == 200
+    info = client.get('/model-info').json()
+    assert info['loaded'] and info['reload_count'] == 0
+
+    rewrite_bundle(1)
+    second = client.post('/predict', json={'ZipCode': '10001', 'PropertyType': 'Office'})
+    assert second.status_code == 200
+    new_info = client.get('/model-info').json()
+    assert new_info['reload_count'] == 1 and new_info['version'] != info['version']
+    # the reload changed the version, so the cached recommendation was not reused
+    assert new_info['cache']['hits'] == 0
+
+
+def test_predict_batch_matches_single_predictions_in_order(client):
+    opportunities = [{'ZipCode': '10001', 'PropertyType': 'Office'}, {'ZipCode': '99999', 'Market': 'Mars'},
+                     {'ZipCode': '10003'}]
+    batch = client.post('/predict_batch', json=opportunities)
+    assert batch.status_code == 200
+    for item, opportunity in zip(batch.json(), opportunities):
+        single = client.post('/predict', json=opportunity).json()
+        assert item['error'] is None and item['result']['best_fee'] == pytest.approx(single['best_fee'])
+
+
+def test_predict_batch_reports_bad_items_and_limits_size(client, root_bundle, monkeypatch):
+    # a record the encoder rejects fails alone; the endpoint's schema already requires ZipCode
+    out = recommend_bid_fees([{'ZipCode': '10001'}, {'PropertyType': 'Office'}, {'ZipCode': '10002'}],
+                             artifacts=root_bundle)
+    assert [o['error'] is None for o in out] == [True, False, True] and 'ZipCode' in out[1]['error']
+    assert out[1]['result'] is None and out[2]['result']['best_fee'] > 0
+
+    assert client.post('/predict_batch', json=[{'ZipCode': '10001'}, {'Market': 'NYC'}]).status_code == 422
+    monkeypatch.setattr(app, 'MAX_BATCH_SIZE', 2)
+    assert client.post('/predict_batch', json=[{'ZipCode': '10001'}] * 3).status_code == 413
@@ -0,0 +1,110 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+import bid_inference
+from bid_inference import ArtifactRegistry, fee_grid, find_optimal_fee, recommend_bid_fee, recommend_bid_fees
+from gss_common.cache import RecommendationCache
+
+
+def test_registry_reloads_only_when_the_content_changes(bundle_path, rewrite_bundle):
+    registry = ArtifactRegistry(bundle_path)
+    artifacts, version = registry.snapshot()
+    assert registry.get() is artifacts and registry.stats()['reload_count'] == 0
+
+    # same bytes under a new mtime: hashed again, not reloaded
+    os.utime(bundle_path, ns=(0, os.stat(bundle_path).st_mtime_ns + 10**9))
+    assert registry.snapshot() == (artifacts, version) and registry.reload_count == 0
+
+    rewrite_bundle(1)
+    reloaded, new_version = registry.snapshot()
+    assert reloaded['tag'] == 1 and new_version != version
+    assert registry.stats()['reload_count'] == 1 and registry.stats()['version'] == new_version
+
+
+def test_snapshots_stay_consistent_during_reloads(bundle_path, rewrite_bundle):
+    registry = ArtifactRegistry(bundle_path)
+    registry.snapshot()
+    seen, errors, stop = [], [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                artifacts, version = registry.snapshot()
+            except Exception as e:
+                errors.append(e)
+                return
+            seen.append((version, artifacts.get('tag')))
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for t in readers:
+        t.start()
+    try:
+        for tag in range(1, 6):
+            rewrite_bundle(tag)
+            registry.snapshot()
+    finally:
+        stop.set()
+        for t in readers:
+            t.join()
+
+    # a version is only ever paired with the bundle it was hashed from
+    assert not errors
+    tags = {}
+    for version, tag in seen:
+        assert tags.setdefault(version, tag) == tag
+    assert registry.reload_count == 5 and registry.snapshot()[0]['tag'] == 5
+
+
+def _per_fee_reference(row, artifacts, fees):
+    """The loop the vectorized grid replaced: one DataFrame and one predict_proba per fee."""
+    probs = []
+    for fee in fees:
+        r = row.copy()
+        for col in ('median_BidFee', 'lag_1'):
+            if col in r.index:
+                r[col] = fee
+        df_row = pd.DataFrame([r])[artifacts['features']].copy()
+        for col, m in artifacts['encoders'].items():
+            if col in df_row.columns:
+                df_row.at[0, col] = m.get(str(df_row.at[0, col]) if pd.notna(df_row.at[0, col]) else 'MISSING', 0.0)
+        df_row = df_row.apply(pd.to_numeric, errors='coerce').fillna(artifacts['train_medians'])
+        probs.append(min(max(float(artifacts['clf'].predict_proba(df_row)[:, 1][0]), 0.0), 1.0))
+    return np.array(probs)
+
+
+@pytest.mark.parametrize('case', ['sample', 'unseen_category', 'missing_fields'])
+def test_fee_grid_matches_per_fee_scoring(root_bundle, opportunity, case):
+    row = opportunity
+    if case == 'unseen_category':
+        row['PropertyType'] = 'Spaceport'
+    elif case == 'missing_fields':
+        row[['Market', 'BidCompanyType']] = np.nan
+    static = (root_bundle['features'], root_bundle['encoders'], root_bundle['train_medians'],
+              root_bundle['model_full'], root_bundle['clf'])
+
+    res = find_optimal_fee(row, *static)
+    fees = fee_grid(row, root_bundle['train_medians'])
+    expected = _per_fee_reference(row, root_bundle, fees)
+    np.testing.assert_allclose(res['fee_grid'], fees)
+    np.testing.assert_allclose(res['win_probs'], expected, rtol=1e-6)
+    best = int(np.argmax(expected * fees))
+    assert res['best_fee'] == pytest.approx(fees[best]) and res['best_prob'] == pytest.approx(expected[best], rel=1e-6)
+
+    # the stacked batch path scores the same grid
+    batch = recommend_bid_fees([row.to_dict()] * 2, artifacts=root_bundle)
+    assert [b['result']['best_fee'] for b in batch] == pytest.approx([res['best_fee']] * 2)
+
+
+def test_cache_miss_encodes_the_opportunity_once(root_bundle, opportunity, monkeypatch):
+    calls = []
+    encode = bid_inference.encode_opportunity
+    monkeypatch.setattr(bid_inference, 'encode_opportunity', lambda *a: calls.append(1) or encode(*a))
+    cache = RecommendationCache(maxsize=8, ttl=60)
+
+    first = recommend_bid_fee(opportunity, artifacts=root_bundle, cache=cache, artifacts_version='v1')
+    assert len(calls) == 1  # the cache key's encoding is reused for scoring
+    assert recommend_bid_fee(opportunity, artifacts=root_bundle, cache=cache, artifacts_version='v1') == first
+    assert len(calls) == 2 and cache.stats()['hits'] == 1
+    assert recommend_bid_fee(opportunity, artifacts=root_bundle)['best_fee'] == first['best_fee']
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+REQUEST = {'ZipCode': '12345', 'PropertyType': 'Office', 'DistanceInMiles': 10.5, 'BidDate': '2025-10-23',
+           'Market': 'NYC', 'PopulationEstimate': 50000.0, 'MedianAge': 35.0}
+
+
+@pytest.fixture
+def client(deployment_app):
+    # no context manager: its shutdown would close the module's micro-batcher for the later tests
+    return TestClient(deployment_app.app)
+
+
+def test_predict_batch_reports_bad_items_alone(client, deployment_app):
+    requests = [REQUEST, dict(REQUEST, BidDate='not a date'), dict(REQUEST, ZipCode='00000', Market='Nowhere')]
+    r = client.post('/predict_batch', json=requests)
+    assert r.status_code == 200
+    items = r.json()
+    assert [item['index'] for item in items] == [0, 1, 2]
+    assert items[1]['prediction'] is None and items[1]['error'].startswith('Feature preparation failed')
+    for item in (items[0], items[2]):
+        assert item['error'] is None and item['prediction']['features_used'] == deployment_app.feature_cols
+
+    # the batch scores each request as the single /predict does
+    single = client.post('/predict', json=REQUEST)
+    assert single.status_code == 200
+    assert single.json()['predicted_fee'] == items[0]['prediction']['predicted_fee']
+    assert single.json()['confidence_score'] == pytest.approx(items[0]['prediction']['confidence_score'])
+
+
+def test_predict_batch_limits_size(client, deployment_app, monkeypatch):
+    monkeypatch.setattr(deployment_app, 'MAX_BATCH_SIZE', 2)
+    assert client.post('/predict_batch', json=[REQUEST] * 3).status_code == 413
+    assert client.post('/predict_batch', json=[REQUEST] * 2).status_code == 200
+
+
+def test_batch_endpoints_wait_for_readiness(client, deployment_app, monkeypatch):
+    monkeypatch.setattr(deployment_app.readiness, 'ready', False)
+    assert client.post('/predict_batch', json=[REQUEST]).status_code == 503
+    assert client.post('/predict', json=REQUEST).status_code == 503
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+FULL_REQUEST = {'ZipCode': '12345', 'PropertyType': 'Office', 'DistanceInMiles': 10.5, 'BidDate': '2025-10-23',
+                'Market': 'NYC', 'BusinessSegment': 'Commercial', 'PopulationEstimate': 50000,
+                'AverageHouseValue': 500000, 'IncomePerHousehold': 75000, 'MedianAge': 35,
+                'NumberofBusinesses': 1000, 'NumberofEmployees': 10000, 'ZipPopulation': 25000}
+REQUESTS = {
+    'full': FULL_REQUEST,
+    'unseen_categories': {**FULL_REQUEST, 'ZipCode': '00000', 'PropertyType': 'Spaceport', 'Market': 'Nowhere'},
+    'none_fields': {**FULL_REQUEST, 'BusinessSegment': None, 'PopulationEstimate': None, 'MedianAge': None,
+                    'ZipPopulation': None},
+    'missing_fields': {'ZipCode': '30301', 'PropertyType': 'Retail', 'DistanceInMiles': 250.0,
+                       'BidDate': '2023-12-31T15:30:00', 'Market': 'Atlanta'},
+}
+
+
+@pytest.mark.parametrize('case', list(REQUESTS))
+def test_encoder_matches_prepare_features(deployment_app, case):
+    data = REQUESTS[case]
+    expected = deployment_app.prepare_features(data).to_numpy(dtype=float)[0]
+    actual = deployment_app.feature_encoder.transform(data)
+    cols = deployment_app.feature_encoder.feature_cols
+    diff = [c for c, a, e in zip(cols, actual, expected) if not np.isclose(a, e, equal_nan=True)]
+    assert not diff, f'FeatureEncoder differs from prepare_features on {diff}'
+
+
+def test_transform_many_stacks_single_rows(deployment_app):
+    records = list(REQUESTS.values())
+    expected = np.vstack([deployment_app.prepare_features(r).to_numpy(dtype=float) for r in records])
+    np.testing.assert_allclose(deployment_app.feature_encoder.transform_many(records), expected, equal_nan=True)
+